@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Débit du remplissage de l'effacement cryptographique : dd contre le remplissage natif (pwritev).
+
+La cible est entièrement écrasée. Par défaut, un fichier temporaire est utilisé ; pour une
+mesure représentative, passer un mapper dm-crypt ouvert sur un disque de test (root requis).
+
+Usage : python3 benchmarks/crypto_fill.py [--target CHEMIN] [--size Mo] [--source zero|random] [--writers 1,2,4,8]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+from device_fill import fill_device, FILL_CHUNK_SIZE
+
+def target_size(path: str) -> int:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.lseek(fd, 0, os.SEEK_END)
+    finally:
+        os.close(fd)
+
+def run_dd(path: str, source: str, size: int) -> float:
+    """Durée du remplissage par dd (bs=4M, comme erase_disk_crypto), synchronisation comprise."""
+    start = time.perf_counter()
+    subprocess.run(
+        ["dd", f"if=/dev/{'urandom' if source == 'random' else 'zero'}", f"of={path}", "bs=4M",
+         f"count={size // (4 * 1024 * 1024)}", "conv=fsync,notrunc"],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start
+
+def run_native(path: str, source: str, writers: int) -> float:
+    start = time.perf_counter()
+    fill_device(path, source, writers=writers)
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = ArgumentParser(description="Débit du remplissage de l'effacement cryptographique")
+    parser.add_argument("--target", help="Périphérique ou fichier à écraser (défaut : fichier temporaire)")
+    parser.add_argument("--size", type=int, default=1024, help="Taille du fichier temporaire en Mo (défaut : 1024)")
+    parser.add_argument("--source", choices=["zero", "random"], default="zero", help="Données écrites (défaut : zero)")
+    parser.add_argument("--writers", default="1,2,4,8", help="Nombres de threads écrivains à mesurer (défaut : 1,2,4,8)")
+    args = parser.parse_args()
+
+    temporary = None
+    path = args.target
+    if path is None:
+        # Taille arrondie au bloc de remplissage pour rester compatible avec O_DIRECT
+        size = max(1, args.size * 1024 * 1024 // FILL_CHUNK_SIZE) * FILL_CHUNK_SIZE
+        fd, temporary = tempfile.mkstemp(prefix="crypto_fill_", dir=os.environ.get("TMPDIR", "/var/tmp"))
+        os.ftruncate(fd, size)
+        os.close(fd)
+        path = temporary
+    try:
+        size = target_size(path)
+        print(f"Cible : {path} ({size // (1024 * 1024)} Mo), source {args.source}")
+        print(f"{'Méthode':<24} {'Durée (s)':>10} {'Mo/s':>10}")
+        elapsed = run_dd(path, args.source, size)
+        print(f"{'dd bs=4M':<24} {elapsed:>10.2f} {size / elapsed / (1024 * 1024):>10.1f}")
+        for writers in (int(value) for value in args.writers.split(",")):
+            elapsed = run_native(path, args.source, writers)
+            print(f"{f'natif, {writers} écrivain(s)':<24} {elapsed:>10.2f} {size / elapsed / (1024 * 1024):>10.1f}")
+    finally:
+        if temporary:
+            os.unlink(temporary)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Mesures de démarrage de Disk Eraser.
+
+- Temps d'import (python -X importtime) de main.py et de chaque interface
+- Temps jusqu'à la première fenêtre de la GUI (root + DISPLAY requis)
+
+Usage : python3 benchmarks/startup.py [--runs N]
+"""
+import os
+import sys
+import subprocess
+import statistics
+from argparse import ArgumentParser
+
+CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code")
+
+IMPORT_TARGETS = ["main", "cli_interface", "batch_interface", "erase_daemon", "gui_interface"]
+
+# Lance la GUI, attend le premier affichage de la fenêtre puis quitte en imprimant le délai
+FIRST_WINDOW_SNIPPET = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+from gui_interface import DiskEraserGUI
+root = tk.Tk()
+app = DiskEraserGUI(root)
+def painted():
+    print(f"{(time.perf_counter() - start) * 1000:.1f}")
+    root.destroy()
+root.after_idle(painted)
+root.mainloop()
+"""
+
+def import_time(module: str) -> tuple[float, list[str]]:
+    """
+    Retourne le temps d'import cumulé du module (ms) et la liste des modules importés.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=CODE_DIR, capture_output=True, text=True
+    )
+    modules = []
+    total = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append(name.strip())
+        if name.strip() == module:
+            total = int(cumulative) / 1000
+    if total is None:
+        raise RuntimeError(f"Import de {module} impossible : {result.stderr.strip().splitlines()[-1:]}")
+    return total, modules
+
+def first_window_time() -> float | None:
+    if os.geteuid() != 0 or not os.environ.get("DISPLAY"):
+        return None
+    result = subprocess.run([sys.executable, "-c", FIRST_WINDOW_SNIPPET], cwd=CODE_DIR, capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return None
+
+def main() -> None:
+    parser = ArgumentParser(description="Mesures de démarrage")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre de mesures par cible (médiane affichée)")
+    args = parser.parse_args()
+
+    print(f"{'Module':<20} {'Import (ms)':>12}  tkinter  log_handler")
+    for module in IMPORT_TARGETS:
+        try:
+            samples = []
+            for _ in range(args.runs):
+                total, modules = import_time(module)
+                samples.append(total)
+        except RuntimeError as e:
+            print(f"{module:<20} {'-':>12}  {str(e)}")
+            continue
+        print(f"{module:<20} {statistics.median(samples):>12.1f}  "
+              f"{'oui' if 'tkinter' in modules else 'non':<7}  {'oui' if 'log_handler' in modules else 'non'}")
+
+    samples = [value for value in (first_window_time() for _ in range(args.runs)) if value is not None]
+    if samples:
+        print(f"\nPremière fenêtre : {statistics.median(samples):.1f} ms (médiane sur {len(samples)})")
+    else:
+        print("\nPremière fenêtre : non mesurée (root et DISPLAY requis)")
+
+if __name__ == "__main__":
+    main()
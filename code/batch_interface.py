@@ -0,0 +1,424 @@
+import os
+import sys
+import json
+from fnmatch import fnmatch
+from datetime import datetime
+from disk_operations import get_active_disk, get_device_graph, process_disk
+from parallel_runner import run_adaptive
+from erase_jobs import CancellationToken, result_from_future, CANCELLED, DONE
+from erase_patterns import PROFILES, prepare_profile
+from dry_run import project_erasure, format_projection
+from io_isolation import IsolationPolicy, RATE_UNIT
+from crypto_profiles import CRYPTO_PROFILES, DEFAULT_CRYPTO_PROFILE
+from drive_health import HEALTH_POLICIES, DEFAULT_HEALTH_POLICY
+from disk_classes import load_classes, validate_classes, classify_disk, describe_assignment, ClassificationError
+from partition_table import parse_target, TARGET_DISK
+from disk_inventory import build_inventory
+from log_handler import log_info, log_error, log_erase_operation, session_start, session_end
+
+# Codes de sortie du processus en mode batch
+EXIT_OK = 0
+EXIT_DISK_FAILED = 1
+EXIT_MANIFEST_ERROR = 2
+EXIT_NO_DISK = 3
+EXIT_PROTECTION_UNAVAILABLE = 4
+EXIT_INTERRUPTED = 130
+
+# Codes de sortie par disque dans le fichier de résultats
+DISK_OK = 0
+DISK_FAILED = 1
+DISK_ACTIVE_REFUSED = 4
+DISK_NOT_FOUND = 5
+DISK_CANCELLED = 130
+
+DEFAULT_RESULTS_PATH = "/var/log/disk_erase_results.json"
+
+DEFAULT_SETTINGS = {
+    "method": "overwrite",
+    "passes": 5,
+    "fill": "random",
+    "filesystem": "ext4",
+    "verify": False,
+    "zero_skip": False,
+    "profile": None,
+    "max_rate": None,
+    "crypto_profile": DEFAULT_CRYPTO_PROFILE,
+    "target": TARGET_DISK,
+    "unlock_hpa": False,
+    "health_policy": DEFAULT_HEALTH_POLICY,
+}
+
+# Clés permettant de désigner un disque dans le manifeste (motifs fnmatch)
+SELECTOR_KEYS = ("serial", "wwn", "by_path", "by_id", "device")
+
+# Valeur de « class » : profil choisi par la table de classification d'après le disque
+CLASS_AUTO = "auto"
+
+class ManifestError(Exception):
+    """Levée lorsque le manifeste de lot est illisible ou invalide."""
+
+def load_manifest(path: str) -> dict:
+    """
+    Charge un manifeste JSON ou YAML (YAML nécessite le module PyYAML).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except OSError as e:
+        raise ManifestError(f"Impossible de lire le manifeste {path} : {str(e)}")
+
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ManifestError("Le module PyYAML est requis pour les manifestes YAML (paquet python3-yaml)")
+        try:
+            manifest = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise ManifestError(f"Manifeste YAML invalide : {str(e)}")
+    else:
+        try:
+            manifest = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ManifestError(f"Manifeste JSON invalide : {str(e)}")
+
+    return validate_manifest(manifest)
+
+def _validate_settings(settings: dict, context: str) -> dict:
+    if settings.get("method") not in ("overwrite", "crypto"):
+        raise ManifestError(f"{context} : méthode invalide '{settings.get('method')}' (overwrite ou crypto)")
+    if settings.get("fill") not in ("random", "zero"):
+        raise ManifestError(f"{context} : remplissage invalide '{settings.get('fill')}' (random ou zero)")
+    if settings.get("filesystem") not in ("ext4", "ntfs", "vfat"):
+        raise ManifestError(f"{context} : système de fichiers invalide '{settings.get('filesystem')}'")
+    if settings.get("profile") is not None and settings["profile"] not in PROFILES:
+        raise ManifestError(f"{context} : profil inconnu '{settings['profile']}' ({', '.join(PROFILES)})")
+    if settings.get("crypto_profile") not in CRYPTO_PROFILES:
+        raise ManifestError(f"{context} : profil cryptographique inconnu '{settings.get('crypto_profile')}' ({', '.join(CRYPTO_PROFILES)})")
+    if not isinstance(settings.get("zero_skip"), bool):
+        raise ManifestError(f"{context} : 'zero_skip' doit être un booléen")
+    # Une simple passe à zéro (passes = 0) n'est permise qu'avec zero_skip
+    min_passes = 0 if settings["zero_skip"] else 1
+    if not isinstance(settings.get("passes"), int) or isinstance(settings.get("passes"), bool) or settings["passes"] < min_passes:
+        raise ManifestError(f"{context} : le nombre de passes doit être un entier >= {min_passes}")
+    if not isinstance(settings.get("verify"), bool):
+        raise ManifestError(f"{context} : 'verify' doit être un booléen")
+    if not isinstance(settings.get("unlock_hpa"), bool):
+        raise ManifestError(f"{context} : 'unlock_hpa' doit être un booléen")
+    if settings.get("health_policy") not in HEALTH_POLICIES:
+        raise ManifestError(f"{context} : politique de santé inconnue '{settings.get('health_policy')}' ({', '.join(HEALTH_POLICIES)})")
+    max_rate = settings.get("max_rate")
+    if max_rate is not None and (not isinstance(max_rate, (int, float)) or isinstance(max_rate, bool) or max_rate <= 0):
+        raise ManifestError(f"{context} : 'max_rate' doit être un débit positif en Mo/s")
+    try:
+        settings["target"] = parse_target(settings.get("target"))
+    except (ValueError, AttributeError):
+        raise ManifestError(f"{context} : cible invalide '{settings.get('target')}' (disk, free ou partition:N)")
+    return settings
+
+def _validate_io(io: dict) -> dict:
+    """
+    Section « io » du manifeste : priorités des travaux et plafonds de débit par contrôleur.
+    """
+    if not isinstance(io, dict):
+        raise ManifestError("'io' doit être un objet")
+    for key in ("nice", "ionice", "weight"):
+        if key in io and (not isinstance(io[key], int) or isinstance(io[key], bool)):
+            raise ManifestError(f"io : '{key}' doit être un entier")
+    limits = io.get("controller_max_rate") or {}
+    if not isinstance(limits, dict) or any(
+            not isinstance(rate, (int, float)) or isinstance(rate, bool) or rate <= 0 for rate in limits.values()):
+        raise ManifestError("io : 'controller_max_rate' doit associer des contrôleurs à des débits positifs en Mo/s")
+    return io
+
+def _load_manifest_classes(classes) -> dict:
+    """Table de classification du manifeste : chemin d'un fichier, objet en ligne ou table par défaut."""
+    try:
+        if classes is None or isinstance(classes, str):
+            return load_classes(classes)
+        return validate_classes(classes)
+    except ClassificationError as e:
+        raise ManifestError(f"classes : {str(e)}")
+
+def validate_manifest(manifest) -> dict:
+    """
+    Vérifie la structure du manifeste et fusionne les paramètres par défaut dans chaque entrée.
+
+    Une entrée (ou la section defaults) peut désigner un profil de la table de classification
+    par « class » : un nom de profil, ou « auto » pour le choisir d'après chaque disque.
+    Les paramètres sont alors fusionnés dans l'ordre : defaults, profil de classe, entrée.
+    """
+    if not isinstance(manifest, dict):
+        raise ManifestError("Le manifeste doit être un objet")
+    defaults = dict(DEFAULT_SETTINGS)
+    defaults.update(manifest.get("defaults") or {})
+    default_class = defaults.pop("class", None)
+    _validate_settings(defaults, "defaults")
+
+    entries = manifest.get("disks")
+    if not isinstance(entries, list) or not entries:
+        raise ManifestError("Le manifeste doit contenir une liste 'disks' non vide")
+    classes = None
+    if default_class is not None or any(isinstance(entry, dict) and "class" in entry for entry in entries):
+        classes = _load_manifest_classes(manifest.get("classes"))
+    disks = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ManifestError(f"disks[{index}] doit être un objet")
+        selectors = {key: str(entry[key]) for key in SELECTOR_KEYS if key in entry}
+        if not selectors:
+            raise ManifestError(f"disks[{index}] doit contenir au moins un sélecteur parmi : {', '.join(SELECTOR_KEYS)}")
+        overrides = {key: value for key, value in entry.items() if key in DEFAULT_SETTINGS}
+        disk_class = entry.get("class", default_class)
+        if disk_class is not None and disk_class != CLASS_AUTO and disk_class not in classes["profiles"]:
+            raise ManifestError(f"disks[{index}] : classe inconnue '{disk_class}' ({CLASS_AUTO}, {', '.join(classes['profiles'])})")
+        settings = dict(defaults)
+        if disk_class not in (None, CLASS_AUTO):
+            settings.update(classes["profiles"][disk_class])
+        settings.update(overrides)
+        disks.append({"selectors": selectors, "settings": _validate_settings(settings, f"disks[{index}]"),
+                      "class": disk_class, "overrides": overrides})
+
+    return {"disks": disks, "results": manifest.get("results"), "io": _validate_io(manifest.get("io") or {}),
+            "classes": classes}
+
+def entry_matches(selectors: dict[str, str], disk: dict) -> bool:
+    """
+    Un disque correspond à une entrée si chacun de ses sélecteurs correspond à l'une de ses valeurs.
+    """
+    for key, pattern in selectors.items():
+        values = [disk["device"]] if key == "device" else disk[key]
+        if not any(fnmatch(value, pattern) for value in values):
+            return False
+    return True
+
+def resolve_manifest(manifest: dict, inventory: list[dict], active_disks: set[str]) -> tuple[list[dict], list[dict]]:
+    """
+    Associe chaque entrée du manifeste aux disques de l'inventaire.
+
+    Returns:
+        tuple: (tâches à exécuter, résultats immédiats pour les entrées refusées ou introuvables)
+    """
+    jobs = []
+    results = []
+    assigned = set()
+    for entry in manifest["disks"]:
+        matched = [disk for disk in inventory if entry_matches(entry["selectors"], disk)]
+        if not matched:
+            results.append(_result(None, None, entry["settings"], DISK_NOT_FOUND, f"Aucun disque ne correspond à {entry['selectors']}", selectors=entry["selectors"]))
+            continue
+        for disk in matched:
+            if disk["device"] in assigned:
+                continue
+            assigned.add(disk["device"])
+            # Un effacement sélectif du disque actif est permis : la partition visée est contrôlée par process_disk
+            if disk["device"] in active_disks and entry["settings"]["target"] == TARGET_DISK:
+                results.append(_result(disk["device"], disk["id"], entry["settings"], DISK_ACTIVE_REFUSED, "Disque système actif : effacement refusé", selectors=entry["selectors"]))
+                continue
+            try:
+                settings, assignment = _class_settings(entry, disk["device"], manifest["classes"])
+            except ManifestError as e:
+                results.append(_result(disk["device"], disk["id"], entry["settings"], DISK_FAILED, str(e), selectors=entry["selectors"]))
+                continue
+            jobs.append({"device": disk["device"], "id": disk["id"], "settings": settings, "class": assignment})
+    return jobs, results
+
+def _class_settings(entry: dict, device: str, classes: dict | None) -> tuple[dict, dict | None]:
+    """
+    Paramètres d'un disque : ceux de l'entrée, ou pour « class: auto » ceux du profil
+    choisi par la table de classification, surchargés par les clés explicites de l'entrée.
+    """
+    if entry["class"] is None:
+        return entry["settings"], None
+    if entry["class"] == CLASS_AUTO:
+        assignment = classify_disk(device, classes)
+        if assignment is None:
+            raise ManifestError(f"Aucune règle de classification ne correspond à /dev/{device} et la table n'a pas de profil par défaut")
+        settings = dict(entry["settings"])
+        settings.update(assignment["settings"])
+        settings.update(entry["overrides"])
+        settings = _validate_settings(settings, f"/dev/{device} (classe {assignment['class']})")
+    else:
+        assignment = {"class": entry["class"], "settings": dict(classes["profiles"][entry["class"]]), "reason": "désignée par le manifeste"}
+        settings = dict(entry["settings"])
+    settings["class"] = assignment["class"]
+    return settings, assignment
+
+def _result(device, disk_id, settings: dict, exit_code: int, message: str, start: str | None = None, selectors: dict | None = None) -> dict:
+    result = {
+        "device": f"/dev/{device}" if device else None,
+        "id": disk_id,
+        "exit_code": exit_code,
+        "status": {DISK_OK: "ok", DISK_FAILED: "failed", DISK_ACTIVE_REFUSED: "refused_active", DISK_NOT_FOUND: "not_found", DISK_CANCELLED: "cancelled"}[exit_code],
+        "message": message,
+        "settings": settings,
+        "start": start,
+        "end": datetime.now().isoformat(timespec="seconds"),
+    }
+    if selectors:
+        result["selectors"] = selectors
+    return result
+
+def _method_description(settings: dict) -> str:
+    target = "" if settings["target"] == TARGET_DISK else f", cible {settings['target']}"
+    if settings.get("class"):
+        target += f", classe {settings['class']}"
+    if settings["profile"]:
+        return f"Profil {PROFILES[settings['profile']]['name']}{target}"
+    if settings["method"] == "crypto":
+        return f"Effacement cryptographique avec remplissage {settings['fill']}{target}"
+    return f"{settings['passes']} passes d'écrasement{target}"
+
+def write_results(path: str, exit_code: int | None, results: list[dict], projection: dict | None = None) -> None:
+    """
+    Écrit le fichier de résultats de manière atomique.
+    """
+    document = {
+        "exit_code": exit_code,
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "disks": results,
+    }
+    if projection is not None:
+        document["dry_run"] = True
+        document["projection"] = projection
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _io_policy(io: dict, base: IsolationPolicy) -> IsolationPolicy:
+    """Politique d'isolation du lot : options de la ligne de commande complétées par la section « io »."""
+    controller_limits = dict(base.controller_limits)
+    controller_limits.update({controller: int(rate * RATE_UNIT) for controller, rate in (io.get("controller_max_rate") or {}).items()})
+    try:
+        return IsolationPolicy(
+            nice=io.get("nice", base.nice),
+            ionice_level=io.get("ionice", base.ionice_level),
+            io_weight=io.get("weight", base.io_weight),
+            default_limit=base.default_limit,
+            disk_limits=base.disk_limits,
+            controller_limits=controller_limits,
+        )
+    except ValueError as e:
+        raise ManifestError(f"io : {str(e)}")
+
+def run_batch(manifest_path: str, results_path: str | None = None, dry_run: bool = False,
+              io_policy: IsolationPolicy | None = None) -> int:
+    """
+    Exécute sans interaction tous les effacements décrits par un manifeste.
+    En simulation (dry_run), les disques sont seulement lus et la durée du lot est projetée.
+
+    Returns:
+        int: Code de sortie global (EXIT_*)
+    """
+    try:
+        manifest = load_manifest(manifest_path)
+        io_policy = _io_policy(manifest["io"], io_policy or IsolationPolicy())
+    except ManifestError as e:
+        log_error(str(e))
+        print(str(e), file=sys.stderr)
+        return EXIT_MANIFEST_ERROR
+    results_path = results_path or manifest.get("results") or DEFAULT_RESULTS_PATH
+    log_info(f"Mode batch : manifeste {manifest_path}, résultats dans {results_path}")
+
+    # La protection du disque actif est obligatoire : sans elle, aucun disque n'est touché
+    active_disks = get_active_disk(graph=get_device_graph())
+    if not active_disks:
+        log_error("Mode batch : détection du disque système impossible, aucun effacement lancé")
+        write_results(results_path, EXIT_PROTECTION_UNAVAILABLE, [])
+        return EXIT_PROTECTION_UNAVAILABLE
+    log_info(f"Mode batch : disques système protégés : {', '.join(active_disks)}")
+
+    jobs, results = resolve_manifest(manifest, build_inventory(), set(active_disks))
+    for result in results:
+        log_error(f"Mode batch : {result['message']} ({result['device'] or result.get('selectors')})")
+    if not jobs:
+        log_error("Mode batch : aucun disque à effacer")
+        write_results(results_path, EXIT_NO_DISK, results)
+        return EXIT_NO_DISK
+
+    jobs_by_device = {job["device"]: job for job in jobs}
+    for job in jobs:
+        if job["class"]:
+            log_info(f"Mode batch : /dev/{job['device']} : {describe_assignment(dict(job['class'], settings=job['settings']))}")
+    if dry_run:
+        log_info(f"Mode batch : simulation sur {len(jobs)} disque(s), aucune écriture")
+        try:
+            projection = project_erasure(list(jobs_by_device), lambda device: jobs_by_device[device]["settings"])
+        except OSError as e:
+            log_error(f"Mode batch : simulation impossible : {str(e)}")
+            write_results(results_path, EXIT_DISK_FAILED, results)
+            return EXIT_DISK_FAILED
+        for line in format_projection(projection):
+            log_info(f"Simulation : {line}")
+        write_results(results_path, EXIT_OK, results, projection)
+        return EXIT_OK
+
+    # Tampons des motifs fixes calculés une fois pour tout le lot et partagés par tous les disques
+    for profile in {job["settings"]["profile"] for job in jobs if job["settings"]["profile"]}:
+        prepare_profile(profile)
+    start_times = {}
+    # Ctrl+C annule tous les jetons : les disques en cours sont arrêtés proprement et le fichier de résultats reste complet
+    tokens = {device: CancellationToken() for device in jobs_by_device}
+    # Plafonds de débit propres aux entrées (max_rate) ; un plafond de contrôleur est partagé entre les disques du lot
+    io_policy = io_policy.for_disks(list(jobs_by_device), {
+        device: int(job["settings"]["max_rate"] * RATE_UNIT)
+        for device, job in jobs_by_device.items() if job["settings"]["max_rate"]
+    })
+
+    def run_job(device: str) -> None:
+        job = jobs_by_device[device]
+        settings = job["settings"]
+        start_times[device] = datetime.now().isoformat(timespec="seconds")
+        log_erase_operation(job["id"], settings["filesystem"], _method_description(settings))
+        process_disk(
+            device, settings["filesystem"], settings["passes"],
+            use_crypto=settings["method"] == "crypto", crypto_fill=settings["fill"],
+            log_func=lambda message: log_info(f"[{device}] {message}"),
+            verify=settings["verify"],
+            token=tokens[device],
+            zero_skip=settings["zero_skip"],
+            profile=settings["profile"],
+            io_policy=io_policy,
+            crypto_profile=settings["crypto_profile"],
+            target=settings["target"],
+            unlock_hpa=settings["unlock_hpa"],
+            health_policy=settings["health_policy"]
+        )
+
+    def on_done(device: str, future) -> None:
+        job = jobs_by_device[device]
+        result = result_from_future(device, future)
+        exit_code = {DONE: DISK_OK, CANCELLED: DISK_CANCELLED}.get(result.status, DISK_FAILED)
+        results.append(_result(device, job["id"], job["settings"], exit_code, result.message, start_times.get(device)))
+        # Code global inconnu (null) tant que le lot est en cours
+        write_results(results_path, None, results)
+
+    log_info(f"Mode batch : démarrage de {len(jobs)} disque(s)")
+    run_adaptive([job["device"] for job in jobs], run_job, on_done=on_done, tokens=tokens)
+
+    failed = [result for result in results if result["exit_code"] != DISK_OK]
+    if any(token.cancelled for token in tokens.values()):
+        exit_code = EXIT_INTERRUPTED
+    else:
+        exit_code = EXIT_DISK_FAILED if failed else EXIT_OK
+    write_results(results_path, exit_code, results)
+    log_info(f"Mode batch terminé : {len(results) - len(failed)}/{len(results)} entrée(s) réussie(s), code de sortie {exit_code}")
+    return exit_code
+
+def run_batch_mode(args) -> None:
+    """
+    Point d'entrée du mode batch : exécute le manifeste puis quitte avec son code de sortie.
+    """
+    session_start()
+    try:
+        exit_code = run_batch(args.batch, args.results, getattr(args, 'dry_run', False), getattr(args, 'io_policy', None))
+    except KeyboardInterrupt:
+        log_error("Mode batch interrompu par l'utilisateur (Ctrl+C)")
+        exit_code = EXIT_INTERRUPTED
+    except OSError as e:
+        log_error(f"Erreur système en mode batch : {str(e)}")
+        exit_code = EXIT_DISK_FAILED
+    finally:
+        session_end()
+    sys.exit(exit_code)
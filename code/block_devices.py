@@ -0,0 +1,342 @@
+import os
+import re
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Racines par défaut, paramétrables pour tester contre une arborescence sysfs factice
+SYSFS_ROOT = "/sys"
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+# Points de montage dont les disques sous-jacents font partie du système actif
+SYSTEM_MOUNT_POINTS = ("/", "/boot", "/boot/efi", "/usr", "/var")
+
+# Préfixes des points de montage utilisés par les médias de démarrage live
+LIVE_MOUNT_PREFIXES = ("/run/live", "/lib/live", "/live", "/cdrom", "/run/initramfs")
+
+# En démarrage live (racine sans vrai périphérique : overlay, aufs, rootfs), les médias montés
+# sous ces préfixes (clé de démarrage, persistance, média monté par l'initramfs) sont protégés
+LIVE_MEDIA_PREFIXES = ("/media", "/mnt", "/run")
+
+# Adresse d'une fonction PCI dans un chemin sysfs (domaine:bus:périphérique.fonction)
+PCI_ADDRESS = re.compile(r"^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-7]$")
+
+def _unescape_mountinfo(field: str) -> str:
+    """
+    Décode les séquences octales (\\040 pour l'espace, etc.) de /proc/self/mountinfo.
+    """
+    if "\\" not in field:
+        return field
+    result = []
+    i = 0
+    while i < len(field):
+        chunk = field[i:i + 4]
+        if len(chunk) == 4 and chunk[0] == "\\" and chunk[1:].isdigit():
+            result.append(chr(int(chunk[1:], 8)))
+            i += 4
+        else:
+            result.append(field[i])
+            i += 1
+    return "".join(result)
+
+def parse_mountinfo(mountinfo_path: str = MOUNTINFO_PATH) -> list[dict]:
+    """
+    Lit /proc/self/mountinfo et retourne la liste des montages dans l'ordre du noyau.
+
+    Chaque entrée contient les clés 'devnum' (majeur:mineur), 'mount_point',
+    'fstype', 'source' et 'super_options'.
+    """
+    mounts = []
+    with open(mountinfo_path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 7 or "-" not in parts[6:]:
+                continue
+            separator = parts.index("-", 6)
+            tail = parts[separator + 1:]
+            mounts.append({
+                "devnum": parts[2],
+                "mount_point": _unescape_mountinfo(parts[4]),
+                "fstype": tail[0] if len(tail) > 0 else "",
+                "source": _unescape_mountinfo(tail[1]) if len(tail) > 1 else "",
+                "super_options": tail[2] if len(tail) > 2 else "",
+            })
+    return mounts
+
+def _list_dir(path: str) -> list[str]:
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+def _read_sysfs(path: str) -> str:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def device_dir(name: str, sysfs_root: str = SYSFS_ROOT) -> str:
+    """
+    Retourne le répertoire sysfs réel d'un périphérique bloc (ex: .../block/sda/sda1).
+    """
+    return os.path.realpath(os.path.join(sysfs_root, "class", "block", name))
+
+def devnum_to_name(devnum: str, sysfs_root: str = SYSFS_ROOT) -> str | None:
+    """
+    Résout un numéro majeur:mineur en nom de périphérique via /sys/dev/block/M:m.
+    """
+    path = os.path.join(sysfs_root, "dev", "block", devnum)
+    if not os.path.exists(path):
+        return None
+    return os.path.basename(os.path.realpath(path))
+
+def source_to_name(source: str, sysfs_root: str = SYSFS_ROOT) -> str | None:
+    """
+    Résout une source de montage de type /dev/... (ex: btrfs, dont le majeur est anonyme).
+    """
+    if not source.startswith("/dev/"):
+        return None
+    for candidate in (os.path.basename(os.path.realpath(source)), os.path.basename(source)):
+        if os.path.exists(os.path.join(sysfs_root, "class", "block", candidate)):
+            return candidate
+    return None
+
+def get_parent_disk(name: str, sysfs_root: str = SYSFS_ROOT) -> str:
+    """
+    Retourne le disque contenant une partition, ou le nom lui-même s'il s'agit d'un disque.
+    """
+    path = device_dir(name, sysfs_root)
+    if os.path.exists(os.path.join(path, "partition")):
+        return os.path.basename(os.path.dirname(path))
+    return name
+
+def find_mount_for_path(path: str, mounts: list[dict]) -> dict | None:
+    """
+    Retourne le montage visible le plus spécifique contenant le chemin donné.
+    """
+    best = None
+    best_len = -1
+    for mount in mounts:
+        mount_point = mount["mount_point"]
+        prefix = mount_point.rstrip("/") + "/"
+        if path == mount_point or path.startswith(prefix):
+            # À longueur égale, le dernier montage masque les précédents
+            if len(mount_point) >= best_len:
+                best = mount
+                best_len = len(mount_point)
+    return best
+
+def _overlay_layers(super_options: str) -> list[str]:
+    """
+    Extrait les répertoires lowerdir/upperdir des options d'un montage overlay.
+    """
+    layers = []
+    for option in super_options.split(","):
+        key, _, value = option.partition("=")
+        if key in ("lowerdir", "upperdir") and value:
+            layers.extend(_unescape_mountinfo(layer) for layer in value.split(":") if layer)
+    return layers
+
+class BlockDeviceGraph:
+    """
+    Graphe en mémoire des dépendances entre périphériques bloc, construit une seule fois depuis sysfs.
+
+    Les ancêtres d'un périphérique sont ceux sur lesquels il repose (disque parent d'une partition,
+    slaves d'un volume dm/md, fichier de support d'un loop) ; ses descendants sont ceux qui reposent
+    sur lui (partitions, holders). Les fermetures sont précalculées : chaque requête est une lecture
+    de dictionnaire.
+    """
+    def __init__(self, lower: dict[str, set[str]]) -> None:
+        self._lower = {name: frozenset(deps) for name, deps in lower.items()}
+        upper: dict[str, set[str]] = {name: set() for name in self._lower}
+        for name, deps in self._lower.items():
+            for dep in deps:
+                upper.setdefault(dep, set()).add(name)
+                self._lower.setdefault(dep, frozenset())
+        self._upper = {name: frozenset(deps) for name, deps in upper.items()}
+        self._ancestors = self._closure(self._lower)
+        self._descendants = self._closure(self._upper)
+        self._physical = {
+            name: frozenset(dev for dev in self._ancestors[name] | {name} if not self._lower[dev])
+            for name in self._lower
+        }
+
+    @staticmethod
+    def _closure(edges: dict[str, frozenset]) -> dict[str, frozenset]:
+        closure: dict[str, frozenset] = {}
+        for start in edges:
+            reached = set()
+            stack = list(edges[start])
+            while stack:
+                dev = stack.pop()
+                if dev in reached or dev == start:
+                    continue
+                reached.add(dev)
+                if dev in closure:
+                    reached |= closure[dev]
+                else:
+                    stack.extend(edges.get(dev, ()))
+            closure[start] = frozenset(reached)
+        return closure
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._lower
+
+    def devices(self) -> list[str]:
+        """Retourne tous les périphériques connus du graphe."""
+        return sorted(self._lower)
+
+    def ancestors(self, name: str) -> frozenset:
+        """Retourne les périphériques sur lesquels repose le périphérique donné."""
+        return self._ancestors.get(name, frozenset())
+
+    def descendants(self, name: str) -> frozenset:
+        """Retourne les périphériques (partitions, volumes dm/md/loop) qui reposent sur le périphérique donné."""
+        return self._descendants.get(name, frozenset())
+
+    def physical_disks(self, name: str) -> frozenset:
+        """Retourne les disques physiques portant le périphérique donné."""
+        return self._physical.get(name, frozenset({name}))
+
+def build_device_graph(sysfs_root: str = SYSFS_ROOT, mounts: list[dict] | None = None) -> BlockDeviceGraph:
+    """
+    Construit le graphe de dépendances de tous les périphériques de /sys/class/block.
+
+    Si la liste des montages est fournie, les périphériques loop sont reliés au
+    périphérique qui porte leur fichier de support.
+    """
+    lower: dict[str, set[str]] = {}
+    for name in _list_dir(os.path.join(sysfs_root, "class", "block")):
+        deps = lower.setdefault(name, set())
+        parent = get_parent_disk(name, sysfs_root)
+        if parent != name:
+            deps.add(parent)
+        path = device_dir(name, sysfs_root)
+        deps.update(_list_dir(os.path.join(path, "slaves")))
+        for holder in _list_dir(os.path.join(path, "holders")):
+            lower.setdefault(holder, set()).add(name)
+        backing_file = _read_sysfs(os.path.join(path, "loop", "backing_file"))
+        if backing_file and mounts:
+            mount = find_mount_for_path(backing_file, mounts)
+            if mount:
+                backing_dev = devnum_to_name(mount["devnum"], sysfs_root) or source_to_name(mount["source"], sysfs_root)
+                if backing_dev and backing_dev != name:
+                    deps.add(backing_dev)
+    return BlockDeviceGraph(lower)
+
+def resolve_mount_to_devices(mount: dict, mounts: list[dict], graph: BlockDeviceGraph, sysfs_root: str = SYSFS_ROOT, _seen: set | None = None) -> set[str]:
+    """
+    Retourne tous les périphériques portant un montage donné : le sien et ceux sur lesquels
+    il repose (volumes dm/md, partitions, disques physiques).
+    """
+    seen = _seen if _seen is not None else set()
+    name = devnum_to_name(mount["devnum"], sysfs_root) or source_to_name(mount["source"], sysfs_root)
+    if name:
+        return set(graph.ancestors(name)) | {name}
+
+    # Systèmes de fichiers virtuels empilés (overlay/aufs du démarrage live)
+    marker = (mount["mount_point"], mount["devnum"])
+    if marker in seen:
+        return set()
+    seen.add(marker)
+    devices = set()
+    for layer in _overlay_layers(mount["super_options"]):
+        layer_mount = find_mount_for_path(layer, mounts)
+        if layer_mount is not None:
+            devices |= resolve_mount_to_devices(layer_mount, mounts, graph, sysfs_root, seen)
+    return devices
+
+def resolve_mount_to_disks(mount: dict, mounts: list[dict], graph: BlockDeviceGraph, sysfs_root: str = SYSFS_ROOT, _seen: set | None = None) -> set[str]:
+    """
+    Retourne les disques physiques portant un montage donné.
+    """
+    return {disk for name in resolve_mount_to_devices(mount, mounts, graph, sysfs_root, _seen)
+            for disk in graph.physical_disks(name)}
+
+def resolve_path_to_disks(path: str, mounts: list[dict], graph: BlockDeviceGraph, sysfs_root: str = SYSFS_ROOT, _seen: set | None = None) -> set[str]:
+    """
+    Retourne les disques physiques portant le système de fichiers qui contient un chemin.
+    """
+    mount = find_mount_for_path(path, mounts)
+    if mount is None:
+        return set()
+    return resolve_mount_to_disks(mount, mounts, graph, sysfs_root, _seen)
+
+def device_name_from_path(device: str, sysfs_root: str = SYSFS_ROOT) -> str:
+    """
+    Convertit un chemin de périphérique (/dev/sda1, /dev/mapper/vg-root, dm-0) en nom sysfs.
+    """
+    return source_to_name(device, sysfs_root) or device.replace("/dev/mapper/", "").replace("/dev/", "")
+
+def is_live_boot(mounts: list[dict], sysfs_root: str = SYSFS_ROOT) -> bool:
+    """
+    Indique si la racine ne repose sur aucun périphérique bloc (démarrage live en mémoire).
+    """
+    root = find_mount_for_path("/", mounts)
+    if root is None:
+        return False
+    return not (devnum_to_name(root["devnum"], sysfs_root) or source_to_name(root["source"], sysfs_root))
+
+def is_system_mount(mount_point: str, live: bool = False) -> bool:
+    """
+    Indique si un point de montage fait partie du système actif ou du média live ; en démarrage
+    live (live=True), tout montage sous LIVE_MEDIA_PREFIXES est aussi protégé.
+    """
+    if mount_point in SYSTEM_MOUNT_POINTS:
+        return True
+    prefixes = LIVE_MOUNT_PREFIXES + (LIVE_MEDIA_PREFIXES if live else ())
+    return any(mount_point == prefix or mount_point.startswith(prefix + "/") for prefix in prefixes)
+
+def find_active_disks(mountinfo_path: str = MOUNTINFO_PATH, sysfs_root: str = SYSFS_ROOT, graph: BlockDeviceGraph | None = None) -> set[str]:
+    """
+    Détermine en un seul parcours en mémoire les disques physiques portant le système actif.
+
+    Aucun sous-processus n'est lancé : seuls mountinfo et sysfs sont lus. Un graphe
+    déjà construit peut être fourni pour éviter de relire sysfs.
+    """
+    mounts = parse_mountinfo(mountinfo_path)
+    if graph is None:
+        graph = build_device_graph(sysfs_root, mounts)
+    live = is_live_boot(mounts, sysfs_root)
+    disks = set()
+    for mount in mounts:
+        if is_system_mount(mount["mount_point"], live):
+            found = resolve_mount_to_disks(mount, mounts, graph, sysfs_root)
+            if found:
+                logging.debug(f"Montage système {mount['mount_point']} porté par : {sorted(found)}")
+            disks |= found
+    return disks
+
+def find_active_devices(mountinfo_path: str = MOUNTINFO_PATH, sysfs_root: str = SYSFS_ROOT, graph: BlockDeviceGraph | None = None) -> set[str]:
+    """
+    Comme find_active_disks, mais retourne tous les périphériques portant le système actif
+    (partitions et volumes compris) : une partition absente de cet ensemble peut être effacée
+    même si son disque porte le système.
+    """
+    mounts = parse_mountinfo(mountinfo_path)
+    if graph is None:
+        graph = build_device_graph(sysfs_root, mounts)
+    live = is_live_boot(mounts, sysfs_root)
+    devices = set()
+    for mount in mounts:
+        if is_system_mount(mount["mount_point"], live):
+            devices |= resolve_mount_to_devices(mount, mounts, graph, sysfs_root)
+    return devices
+
+def disk_size(device: str, sysfs_root: str = SYSFS_ROOT) -> int:
+    """Taille du disque en octets lue dans sysfs (secteurs de 512 octets)."""
+    with open(os.path.join(sysfs_root, "class", "block", device, "size"), "r") as f:
+        return int(f.read().strip()) * 512
+
+def controller_of(device: str, sysfs_root: str = SYSFS_ROOT) -> str:
+    """
+    Identifie le contrôleur d'un disque : fonction PCI la plus profonde de son chemin sysfs
+    (HBA SATA/SAS, contrôleur USB, NVMe), ou « virtual » pour les périphériques virtuels.
+    """
+    path = os.path.realpath(os.path.join(sysfs_root, "class", "block", device))
+    controller = "virtual"
+    for part in path.split(os.sep):
+        if PCI_ADDRESS.match(part):
+            controller = part
+    return controller
@@ -0,0 +1,244 @@
+import re
+import sys
+import time
+import shutil
+import logging
+import threading
+from collections import deque
+from parallel_runner import ThroughputSampler
+from log_handler import log_info
+
+# Période de rafraîchissement du tableau de bord sur un terminal (secondes)
+REFRESH_INTERVAL = 1.0
+
+# Période des résumés en texte brut lorsque la sortie n'est pas un terminal (secondes)
+SUMMARY_INTERVAL = 30.0
+
+# Nombre de lignes du panneau d'événements
+EVENT_LINES = 8
+
+# États d'un disque sur le tableau de bord
+PENDING = "attente"
+RUNNING = "en cours"
+FINISHED_LABELS = {"done": "terminé", "failed": "échec", "cancelled": "annulé"}
+
+# Progression des moteurs natifs (region_erase.RegionProgress) : « /dev/sda : passe 1/3, 1024 / 9540 Mo »
+_REGION_PROGRESS = re.compile(r"^(?:\S+ : )?(?P<phase>.+?), (?P<done>\d+) / (?P<total>\d+) Mo")
+# Progression de shred -v : « shred: /dev/sda: pass 1/3 (random)...1.0GiB/9.4GiB 10% »
+_SHRED_PROGRESS = re.compile(r"pass (?P<number>\d+)/(?P<count>\d+) \((?P<pattern>[^)]*)\)\.\.\..*?(?P<percent>\d+)%")
+# Numéro de passe dans une phase : « passe 2/7 »
+_PASS = re.compile(r"passe (\d+)/(\d+)")
+
+_ESC = "\x1b["
+
+def _format_duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60:02d}:{rest % 60:02d}"
+
+class _DiskState:
+    def __init__(self) -> None:
+        self.status = PENDING
+        self.phase = ""
+        self.fraction = None
+        self.progress_start = None
+        self.rate = 0.0
+        self.message = ""
+
+    def eta(self, now: float) -> float | None:
+        """Durée restante estimée d'après l'avancement global depuis le premier message de progression."""
+        if self.status != RUNNING or not self.fraction or self.progress_start is None:
+            return None
+        return (now - self.progress_start) * (1 - self.fraction) / self.fraction
+
+class _EventHandler(logging.Handler):
+    """Affiche les avertissements et erreurs journalisés dans le panneau d'événements."""
+    def __init__(self, dashboard: "Dashboard") -> None:
+        super().__init__(logging.WARNING)
+        self.dashboard = dashboard
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.dashboard.event(record.getMessage())
+
+class Dashboard:
+    """
+    Tableau de bord du CLI pendant les effacements : une ligne par disque (état, phase,
+    avancement, Mo/s, temps restant), une ligne de total et un panneau des derniers événements.
+
+    Sur un terminal, l'affichage est redessiné en place (séquences ANSI) toutes les
+    REFRESH_INTERVAL secondes, quel que soit le volume de messages des disques ; sinon, un
+    résumé en texte brut est écrit toutes les SUMMARY_INTERVAL secondes et les événements au
+    fil de l'eau. Les messages de progression ne sont jamais écrits sur la sortie : le détail
+    complet de chaque disque va dans le fichier de log. Les gestionnaires console du module
+    logging sont suspendus pendant l'affichage ; avertissements et erreurs passent par le
+    panneau d'événements.
+    """
+    def __init__(self, disks: list[str], stream=None, interval: float | None = None,
+                 sampler: ThroughputSampler | None = None) -> None:
+        self.stream = stream or sys.stdout
+        self.tty = self.stream.isatty()
+        self.interval = interval or (REFRESH_INTERVAL if self.tty else SUMMARY_INTERVAL)
+        self.sampler = sampler or ThroughputSampler()
+        self.disks = {disk: _DiskState() for disk in disks}
+        self.events: deque[str] = deque(maxlen=EVENT_LINES)
+        self.started = time.monotonic()
+        # Réentrant : un avertissement journalisé pendant un rafraîchissement revient par event()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._paused = False
+        self._drawn = 0
+        self._thread = None
+        self._console_handlers = []
+        self._event_handler = _EventHandler(self)
+
+    def start(self) -> "Dashboard":
+        root = logging.getLogger()
+        self._console_handlers = [
+            (handler, handler.level) for handler in root.handlers
+            if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler)
+            and getattr(handler, "stream", None) in (sys.stdout, sys.stderr)
+        ]
+        for handler, _ in self._console_handlers:
+            handler.setLevel(logging.CRITICAL + 1)
+        root.addHandler(self._event_handler)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Arrête le rafraîchissement après un dernier affichage et rétablit la journalisation console."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        logging.getLogger().removeHandler(self._event_handler)
+        for handler, level in self._console_handlers:
+            handler.setLevel(level)
+        self.render()
+
+    def pause(self) -> None:
+        """Suspend l'affichage (saisie au clavier, par exemple l'arrêt d'un disque sur Ctrl+C)."""
+        with self._lock:
+            self._paused = True
+            self._drawn = 0
+
+    def resume(self) -> None:
+        with self._lock:
+            self._paused = False
+
+    def set_status(self, disk: str, status: str, message: str = "") -> None:
+        """Passe un disque à RUNNING ou à son issue (clé de FINISHED_LABELS)."""
+        with self._lock:
+            state = self.disks.setdefault(disk, _DiskState())
+            state.status = status
+            if status in FINISHED_LABELS:
+                state.rate = 0.0
+                state.fraction = 1.0 if status == "done" else state.fraction
+            state.message = message
+        # Échecs et annulations sont déjà signalés par les erreurs journalisées
+        if status == "done":
+            self.event(f"/dev/{disk} : {FINISHED_LABELS[status]}")
+
+    def event(self, message: str) -> None:
+        with self._lock:
+            self.events.append(f"{time.strftime('%H:%M:%S')} {message}")
+            plain = not self.tty and not self._paused
+        if plain:
+            self.stream.write(f"{message}\n")
+            self.stream.flush()
+
+    def log_func(self, disk: str):
+        """Fonction de journalisation d'un disque pour process_disk : met à jour sa ligne et le fichier de log."""
+        def log(message: str) -> None:
+            log_info(f"[{disk}] {message}")
+            if message.startswith("ATTENTION"):
+                self.event(f"/dev/{disk} : {message}")
+            elif not self._progress(disk, message):
+                with self._lock:
+                    self.disks[disk].phase = message
+        return log
+
+    def _progress(self, disk: str, message: str) -> bool:
+        match = _REGION_PROGRESS.match(message)
+        if match:
+            phase = match.group("phase")
+            fraction = int(match.group("done")) / max(1, int(match.group("total")))
+        else:
+            match = _SHRED_PROGRESS.search(message)
+            if not match:
+                return False
+            phase = f"shred passe {match.group('number')}/{match.group('count')} ({match.group('pattern')})"
+            fraction = int(match.group("percent")) / 100
+        passes = _PASS.search(phase)
+        if passes:
+            # Avancement global : passes terminées plus la fraction de la passe en cours
+            number, count = int(passes.group(1)), int(passes.group(2))
+            fraction = (number - 1 + fraction) / max(1, count)
+        with self._lock:
+            state = self.disks[disk]
+            state.phase = phase
+            state.fraction = min(1.0, fraction)
+            if state.progress_start is None:
+                state.progress_start = time.monotonic()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.render()
+
+    def _table(self, height: int | None) -> tuple[str, list[str], str, list[str]]:
+        """(en-tête, lignes des disques, ligne de total, événements)"""
+        now = time.monotonic()
+        with self._lock:
+            running = [disk for disk, state in self.disks.items() if state.status == RUNNING]
+            rates = self.sampler.sample([disk.replace("/dev/", "") for disk in running])[0] if running else {}
+            for disk in running:
+                self.disks[disk].rate = max(0.0, rates.get(disk.replace("/dev/", ""), 0.0))
+            rows = []
+            for disk, state in self.disks.items():
+                status = FINISHED_LABELS.get(state.status, state.status)
+                percent = f"{int(state.fraction * 100):3d} %" if state.fraction is not None else "  - %"
+                rate = f"{state.rate:7.1f}" if state.status == RUNNING else "      -"
+                phase = state.message if state.status in FINISHED_LABELS and state.message else state.phase
+                rows.append((state.status != RUNNING,
+                             f"{disk:<10} {status:<9} {percent} {rate} Mo/s  {_format_duration(state.eta(now)):>8}  {phase}"))
+            counts = {label: sum(1 for state in self.disks.values() if state.status == status)
+                      for status, label in list(FINISHED_LABELS.items()) + [(RUNNING, RUNNING), (PENDING, PENDING)]}
+            etas = [eta for eta in (state.eta(now) for state in self.disks.values()) if eta is not None]
+            events = list(self.events)
+        total = (f"{'TOTAL':<10} {len(running)} en cours, {counts[PENDING]} en attente, "
+                 f"{counts['terminé']} terminé(s), {counts['échec']} échec(s), {counts['annulé']} annulé(s) - "
+                 f"{sum(rates.values()):.1f} Mo/s - reste {_format_duration(max(etas) if etas else None)} - "
+                 f"écoulé {_format_duration(now - self.started)}")
+        header = f"{'Disque':<10} {'État':<9} {'Avanc.':>5} {'Débit':>12}  {'Reste':>8}  Phase"
+        # Disques en cours d'abord, les autres ensuite si la hauteur du terminal le permet
+        rows = [line for _, line in sorted(rows, key=lambda row: row[0])]
+        if height is not None:
+            room = max(1, height - len(events) - 5)
+            if len(rows) > room:
+                rows = rows[:room - 1] + [f"... {len(rows) - room + 1} autre(s) disque(s)"]
+        return header, rows, total, events
+
+    def render(self) -> None:
+        if self._paused:
+            return
+        if not self.tty:
+            # Résumé périodique : les événements ont déjà été écrits au fil de l'eau
+            _, rows, total, _ = self._table(None)
+            self.stream.write("".join(f"{line}\n" for line in rows + [total]))
+            self.stream.flush()
+            return
+        size = shutil.get_terminal_size()
+        width = size.columns - 1
+        header, rows, total, events = self._table(size.lines - 1)
+        lines = [line[:width] for line in [header] + rows + [total, "-" * min(width, 80)] + events]
+        output = []
+        if self._drawn:
+            # Retour au début du tableau précédent, puis réécriture ligne par ligne
+            output.append(f"{_ESC}{self._drawn}F")
+        output.extend(f"{_ESC}2K{line}\n" for line in lines)
+        output.append(f"{_ESC}J")
+        self.stream.write("".join(output))
+        self.stream.flush()
+        self._drawn = len(lines)
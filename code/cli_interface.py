@@ -1,203 +1,176 @@
 import sys
 import os
-import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from subprocess import CalledProcessError, SubprocessError
 from disk_erase import get_disk_serial, is_ssd
-from disk_operations import get_active_disk, process_disk
-from utils import get_disk_list, choose_filesystem, get_base_disk
+from media_type import is_flash_media, describe_media
+from disk_operations import get_active_disk, get_device_graph, process_disk
+from block_devices import find_active_devices
+from partition_table import read_partition_table, resolve_target, describe_table, TARGET_DISK
+from parallel_runner import run_adaptive
+from io_isolation import IsolationPolicy
+from erase_jobs import CancellationToken, EraseCancelled, result_from_future, CANCELLED
+from erase_patterns import get_profile, prepare_profile
+from dry_run import project_erasure, format_projection
+from daemon_client import DaemonClient, DaemonError
+from erase_daemon import DEFAULT_SOCKET_PATH
+from cli_dashboard import Dashboard, RUNNING
+from disk_classes import load_classes, classify, describe_assignment, describe_class_settings, describe_facts, ClassificationError
+from disk_inventory import build_inventory, parse_selection, select_from_inventory, SelectionError
+from utils import choose_filesystem
 from log_handler import (log_info, log_error, log_erase_operation, 
                         generate_session_pdf, generate_log_file_pdf, 
                         session_start, session_end, get_current_session_logs)
 
-def print_disk_details(disk):
-    """Affiche les informations détaillées d'un disque."""
+def take_inventory() -> dict[str, dict]:
+    """
+    Relevé unique des disques (disk_inventory.build_inventory) avec leur statut système actif.
+    Affichage, sélection, classification et confirmation le réutilisent au lieu d'interroger
+    de nouveau chaque disque.
+
+    Returns:
+        dict: {nom du disque: entrée de l'inventaire}
+    """
+    # Graphe des périphériques construit une seule fois pour toute la liste
+    device_graph = get_device_graph()
+
+    # Obtenir les disques actifs - retourne directement les noms de disques de base
     try:
-        disk_id = get_disk_serial(disk)
-        is_disk_ssd = is_ssd(disk)
-        
-        # Obtenir les disques actifs - retourne maintenant directement les noms de disques de base
-        try:
-            active_base_disks = get_active_disk()  # Retourne une liste de noms de disques de base comme ['nvme0n1', 'sda']
-        except (CalledProcessError, SubprocessError) as e:
-            print(f"Erreur lors de la détection du disque actif : {str(e)}")
-            log_error(f"Erreur lors de la détection du disque actif : {str(e)}")
-            active_base_disks = None
-        except FileNotFoundError as e:
-            print(f"Commande requise introuvable pour la détection du disque actif : {str(e)}")
-            log_error(f"Commande requise introuvable pour la détection du disque actif : {str(e)}")
-            active_base_disks = None
-        except (IOError, OSError) as e:
-            print(f"Erreur système lors de la détection du disque actif : {str(e)}")
-            log_error(f"Erreur système lors de la détection du disque actif : {str(e)}")
-            active_base_disks = None
-        
-        # Convertir en ensemble pour une recherche plus facile
-        active_physical_drives = set(active_base_disks) if active_base_disks else set()
-        
-        # Obtenir les informations du disque depuis get_disk_list incluant le label
-        disk_size = "Inconnu"
-        disk_model = "Inconnu"
-        disk_label = "Pas d'étiquette"
-        available_disks = get_disk_list()
-        for available_disk in available_disks:
-            if available_disk["device"] == f"/dev/{disk}":
-                disk_size = available_disk["size"]
-                disk_model = available_disk.get("model", "Inconnu")
-                disk_label = available_disk.get("label", "Pas d'étiquette")
-                break
-        
-        # Déterminer si c'est le disque actif - maintenant beaucoup plus simple
-        try:
-            base_device_name = get_base_disk(disk)
-            is_active = base_device_name in active_physical_drives
-        except (ValueError, TypeError) as e:
-            is_active = False
-            print(f"Erreur lors de la détermination du périphérique de base pour {disk} : {str(e)}")
-            log_error(f"Erreur lors de la détermination du périphérique de base pour {disk} : {str(e)}")
-        
+        active_base_disks = get_active_disk(graph=device_graph)
+    except (CalledProcessError, SubprocessError) as e:
+        print(f"Erreur lors de la détection du disque actif : {str(e)}")
+        log_error(f"Erreur lors de la détection du disque actif : {str(e)}")
+        active_base_disks = None
+    except FileNotFoundError as e:
+        print(f"Commande requise introuvable pour la détection du disque actif : {str(e)}")
+        log_error(f"Commande requise introuvable pour la détection du disque actif : {str(e)}")
+        active_base_disks = None
+    except (IOError, OSError) as e:
+        print(f"Erreur système lors de la détection du disque actif : {str(e)}")
+        log_error(f"Erreur système lors de la détection du disque actif : {str(e)}")
+        active_base_disks = None
+
+    inventory = build_inventory(set(active_base_disks) if active_base_disks else set(), device_graph)
+    return {disk["device"]: disk for disk in inventory}
+
+def print_disk_details(disk, inventory):
+    """Affiche les informations détaillées d'un disque d'après l'inventaire (voir take_inventory)."""
+    entry = inventory.get(disk)
+    if entry is None:
         print(f"Disque : /dev/{disk}")
-        print(f"  Numéro de série/ID : {disk_id}")
-        print(f"  Taille : {disk_size}")
-        print(f"  Modèle : {disk_model}")
-        print(f"  Étiquette : {disk_label}")
-        print(f"  Type : {'État_solide' if is_disk_ssd else 'Mécanique'}")
-        print(f"  Statut : {'DISQUE SYSTÈME ACTIF - DANGER !' if is_active else 'Sûr à effacer'}")
-        
-        if is_disk_ssd:
-            print("  ATTENTION : Ceci est un périphérique SSD. L'effacement sécurisé multi-passes :")
-            print("    • Peut endommager le SSD en causant une usure excessive")
-            print("    • Peut ne pas effacer toutes les données de manière sécurisée à cause du nivellement d'usure SSD")
-            print("    • Peut ne pas réécrire tous les secteurs à cause du sur-provisionnement")
-            print("    • Pour les SSD, l'effacement cryptographique est recommandé")
-        
-        if is_active:
-            print("  DANGER : Ceci est le DISQUE SYSTÈME ACTIF ! L'effacer rendra votre système inutilisable.")
-            print("          Le système plantera si vous procédez à l'effacement de ce disque.")
-            
-        return disk_id, is_disk_ssd, is_active
-    except (SubprocessError, FileNotFoundError) as e:
-        print(f"Erreur lors de l'obtention des détails du disque : {str(e)}")
-        log_error(f"Erreur lors de l'obtention des détails du disque pour {disk} : {str(e)}")
-        return f"inconnu_{disk}", False, False
-    except (OSError, IOError) as e:
-        print(f"Erreur système lors de l'obtention des détails du disque : {str(e)}")
-        log_error(f"Erreur système lors de l'obtention des détails du disque pour {disk} : {str(e)}")
-        return f"inconnu_{disk}", False, False
-    except (AttributeError, KeyError, IndexError) as e:
-        print(f"Erreur de structure de données lors de l'obtention des détails du disque : {str(e)}")
-        log_error(f"Erreur de structure de données lors de l'obtention des détails du disque pour {disk} : {str(e)}")
-        return f"inconnu_{disk}", False, False
-    except (TypeError, ValueError) as e:
-        print(f"Erreur de type de données lors de l'obtention des détails du disque : {str(e)}")
-        log_error(f"Erreur de type de données lors de l'obtention des détails du disque pour {disk} : {str(e)}")
+        print("  Absent de l'inventaire des disques")
+        log_error(f"Disque /dev/{disk} absent de l'inventaire des disques")
         return f"inconnu_{disk}", False, False
+    is_disk_ssd = is_flash_media(entry)
+    is_active = entry["active"]
+    model = " ".join(part for part in (entry["vendor"], entry["model"]) if part) or "Inconnu"
+
+    print(f"Disque : /dev/{disk}")
+    print(f"  Numéro de série/ID : {entry['id']}")
+    print(f"  Taille : {entry['size_label']}")
+    print(f"  Modèle : {model}")
+    print(f"  Étiquette : {entry['label']}")
+    print(f"  Bus : {entry['transport']}{' - ' + entry['by_path'][0] if entry['by_path'] else ''}")
+    print(f"  Type : {describe_media(entry)}{' - ' + ', '.join(entry['reasons']) if entry['reasons'] else ''}")
+    print(f"  Statut : {'DISQUE SYSTÈME ACTIF - DANGER !' if is_active else 'Sûr à effacer'}")
+    if entry["stacked"]:
+        print(f"  Volumes : {', '.join(entry['stacked'])}")
+
+    if is_disk_ssd:
+        print("  ATTENTION : Ceci est un périphérique SSD. L'effacement sécurisé multi-passes :")
+        print("    • Peut endommager le SSD en causant une usure excessive")
+        print("    • Peut ne pas effacer toutes les données de manière sécurisée à cause du nivellement d'usure SSD")
+        print("    • Peut ne pas réécrire tous les secteurs à cause du sur-provisionnement")
+        print("    • Pour les SSD, l'effacement cryptographique est recommandé")
+
+    if is_active:
+        print("  DANGER : Ceci est le DISQUE SYSTÈME ACTIF ! L'effacer rendra votre système inutilisable.")
+        print("          Le système plantera si vous procédez à l'effacement de ce disque.")
+
+    return entry["id"], is_disk_ssd, is_active
 
-def select_disks() -> list[str]:
+def print_inventory_table(disks: list[str], inventory: dict[str, dict], title: str) -> None:
+    """Tableau récapitulatif d'une liste de disques, une ligne par disque."""
+    print("\n" + "=" * 92)
+    print(title.center(92).rstrip())
+    print("=" * 92)
+    print(f"{'Périph.':<10} {'Série/ID':<22} {'Taille':<8} {'Bus':<6} {'Modèle':<20} {'Type':<10} {'Statut'}")
+    print("-" * 92)
+    for disk in disks:
+        entry = inventory[disk]
+        model = " ".join(part for part in (entry["vendor"], entry["model"]) if part) or "Inconnu"
+        # Tronquer les valeurs longues pour l'affichage du tableau
+        model_display = (model[:18] + "..") if len(model) > 20 else model
+        id_display = (entry["id"][:20] + "..") if len(entry["id"]) > 22 else entry["id"]
+        disk_type = f"{entry['media'].upper()} {int(entry['confidence'] * 100)}%"
+        status = "ACTIF !" if entry["active"] else "Sûr"
+        print(f"{disk:<10} {id_display:<22} {entry['size_label']:<8} {entry['transport']:<6} {model_display:<20} {disk_type:<10} {status}")
+    print("-" * 92)
+
+def select_by_pattern(expression: str, inventory: dict[str, dict]) -> list[str]:
     """
-    Permet à l'utilisateur de sélectionner les disques à effacer depuis la ligne de commande, avec des informations détaillées.
+    Sélectionne les disques de l'inventaire qui correspondent à une expression de critères
+    (disk_inventory.parse_selection). Le disque système actif n'est jamais retenu par un
+    motif : il doit être désigné par son nom.
     """
     try:
-        available_disks = get_disk_list()
-        disk_names = [disk["device"].replace("/dev/", "") for disk in available_disks]
+        criteria = parse_selection(expression)
+    except SelectionError as e:
+        print(str(e))
+        log_error(str(e))
+        return []
+    matched = select_from_inventory(criteria, list(inventory.values()))
+    active = [disk["device"] for disk in matched if disk["active"]]
+    if active:
+        print(f"Disque(s) système actif(s) exclu(s) de la sélection : {', '.join(active)} (à désigner par son nom pour l'effacer)")
+    selected = [disk["device"] for disk in matched if not disk["active"]]
+    message = f"Sélection « {expression} » : {len(selected)} disque(s){' : ' + ', '.join(selected) if selected else ''}"
+    print(message)
+    log_info(message)
+    return selected
 
-        # Obtenir les disques actifs - retourne maintenant directement les noms de disques de base
-        try:
-            active_base_disks = get_active_disk()
-        except (CalledProcessError, SubprocessError) as e:
-            print(f"Erreur lors de la détection du disque actif : {str(e)}")
-            log_error(f"Erreur lors de la détection du disque actif : {str(e)}")
-            active_base_disks = None
-        except FileNotFoundError as e:
-            print(f"Commande requise introuvable pour la détection du disque actif : {str(e)}")
-            log_error(f"Commande requise introuvable pour la détection du disque actif : {str(e)}")
-            active_base_disks = None
-        except (IOError, OSError) as e:
-            print(f"Erreur système lors de la détection du disque actif : {str(e)}")
-            log_error(f"Erreur système lors de la détection du disque actif : {str(e)}")
-            active_base_disks = None
-        
-        # Convertir en ensemble pour une recherche plus facile
-        active_physical_drives = set(active_base_disks) if active_base_disks else set()
+def select_disks(inventory: dict[str, dict], pattern: str | None = None) -> list[str]:
+    """
+    Permet à l'utilisateur de sélectionner les disques à effacer depuis la ligne de commande,
+    par leurs noms ou par critères (bus, modèle, taille, chemin by-path). Avec pattern
+    (option --select), la sélection se fait sans saisie ni vue détaillée.
+    """
+    try:
+        disk_names = list(inventory)
 
         # Afficher d'abord le tableau récapitulatif
-        print("\n" + "=" * 80)
-        print("                        RÉSUMÉ DES DISQUES DISPONIBLES")
-        print("=" * 80)
-        print(f"{'Périph.':<12} {'Taille':<8} {'Modèle':<20} {'Étiquette':<15} {'Type':<12} {'Statut'}")
-        print("-" * 80)
-        
-        for disk in disk_names:
-            try:
-                disk_id = get_disk_serial(disk)
-                is_disk_ssd = is_ssd(disk)
-                
-                # Obtenir les informations du disque incluant l'étiquette
-                disk_size = "Inconnu"
-                disk_model = "Inconnu"
-                disk_label = "Pas d'étiquette"
-                for available_disk in available_disks:
-                    if available_disk["device"] == f"/dev/{disk}":
-                        disk_size = available_disk["size"]
-                        disk_model = available_disk.get("model", "Inconnu")
-                        disk_label = available_disk.get("label", "Pas d'étiquette")
-                        break
-                
-                # Déterminer si c'est le disque actif - maintenant beaucoup plus simple
-                try:
-                    base_device_name = get_base_disk(disk)
-                    is_active = base_device_name in active_physical_drives
-                except (ValueError, TypeError) as e:
-                    is_active = False
-                    print(f"Erreur lors de la détermination du périphérique de base pour {disk} : {str(e)}")
-                    log_error(f"Erreur lors de la détermination du périphérique de base pour {disk} : {str(e)}")
-                
-                # Tronquer les noms longs pour l'affichage du tableau
-                model_display = (disk_model[:18] + "..") if len(disk_model) > 20 else disk_model
-                label_display = (disk_label[:13] + "..") if len(disk_label) > 15 else disk_label
-                
-                disk_type = "SSD" if is_disk_ssd else "HDD"
-                status = "ACTIF !" if is_active else "Sûr"
-                
-                print(f"{disk:<12} {disk_size:<8} {model_display:<20} {label_display:<15} {disk_type:<12} {status}")
-                
-            except (SubprocessError, OSError, IOError) as e:
-                print(f"{disk:<12} Erreur système lors de la récupération des informations du disque : {str(e)}")
-            except (FileNotFoundError, PermissionError) as e:
-                print(f"{disk:<12} Erreur d'accès lors de la récupération des informations du disque : {str(e)}")
-            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
-                print(f"{disk:<12} Erreur de données lors de la récupération des informations du disque : {str(e)}")
-        
-        print("-" * 80)
+        print_inventory_table(disk_names, inventory, "RÉSUMÉ DES DISQUES DISPONIBLES")
+
+        if pattern is not None:
+            return select_by_pattern(pattern, inventory)
 
-        # Puis itérer sur disk_names pour la vue détaillée
+        # Puis la vue détaillée, tirée du même inventaire
         print("\n" + "=" * 60)
         print("                  INFORMATIONS DÉTAILLÉES DES DISQUES")
         print("=" * 60)
         
         for disk in disk_names:
             print("\n" + "-" * 50)
-            print_disk_details(disk)
+            print_disk_details(disk, inventory)
             
         print("\n" + "-" * 50)
         print("\nATTENTION : Cet outil va COMPLÈTEMENT EFFACER les disques sélectionnés. TOUTES LES DONNÉES SERONT PERDUES !")
         print("ATTENTION : Si certains de ces disques sont des SSD, utiliser plusieurs passes peut endommager le SSD.")
         print("Pour les SSD, l'effacement cryptographique est recommandé.\n")
+        print("Sélection par noms (ex: sda,sdb) ou par critères, ex: transport=usb,sata model='^ST4000' size=100G-2T path='pci-0000:03:00.0-*'")
         
-        selected_disks = input("Entrez les disques à effacer (séparés par des virgules, ex: sda,sdb) : ").strip()
-        disk_names = [disk.strip() for disk in selected_disks.split(",") if disk.strip()]
+        selected_disks = input("Entrez les disques à effacer : ").strip()
+        if "=" in selected_disks:
+            return select_by_pattern(selected_disks, inventory)
+        disk_names = [disk.strip().replace("/dev/", "") for disk in selected_disks.split(",") if disk.strip()]
         
         valid_disks = []
         for disk in disk_names:
-            if re.match(r'^[a-zA-Z]+[0-9]*$', disk):
-                disk_path = f"/dev/{disk}"
-                if os.path.exists(disk_path):
-                    valid_disks.append(disk)
-                else:
-                    print(f"Disque {disk_path} introuvable. Ignoré.")
+            # Seuls les disques de l'inventaire sont acceptés : nom mal saisi, partition ou périphérique inconnu sont écartés
+            if disk in inventory:
+                valid_disks.append(disk)
             else:
-                print(f"Format de nom de disque invalide : {disk}. Ignoré.")
+                print(f"Disque /dev/{disk} introuvable parmi les disques listés. Ignoré.")
         
         return valid_disks
         
@@ -285,14 +258,48 @@ def get_passes():
             print("Opération annulée.")
             sys.exit(1)
 
-def confirm_erasure(disk: str, fs_choice: str, method_description: str) -> bool:
+def confirm_target(disk: str, target: str) -> dict | None:
+    """
+    Affiche la table de partitions et la cible d'un effacement sélectif, puis évalue la protection
+    du système actif sur la partition visée et non sur le disque.
+
+    Returns:
+        dict: La cible résolue, ou None si elle est invalide ou porte le système actif
+    """
+    try:
+        table = read_partition_table(disk)
+        selection = resolve_target(disk, target)
+        active = find_active_devices()
+    except (OSError, ValueError) as e:
+        print(f"\nCible {target} impossible sur /dev/{disk} : {str(e)}")
+        log_error(f"Cible {target} impossible sur /dev/{disk} : {str(e)}")
+        return None
+    print(f"Table de partitions ({table['scheme'].upper()}) :")
+    for line in describe_table(table):
+        print(f"  {line}")
+    if selection["partition"] and selection["partition"] in active:
+        print(f"\nREFUSÉ : /dev/{selection['partition']} porte le système actif.")
+        log_error(f"Effacement de /dev/{selection['partition']} refusé : partition du système actif")
+        return None
+    if disk in active:
+        print("\nCe disque porte le système actif : seule la cible ci-dessous sera effacée, le système est conservé.")
+    return selection
+
+def confirm_erasure(disk: str, fs_choice: str, method_description: str, target: str, inventory: dict[str, dict]) -> bool:
     """
     Obtient la confirmation pour effacer un disque spécifique avec des avertissements détaillés.
     """
     while True:
         try:
             print("\n" + "-" * 50)
-            disk_id, is_disk_ssd, is_active = print_disk_details(disk)
+            disk_id, is_disk_ssd, is_active = print_disk_details(disk, inventory)
+            selection = None
+            if target != TARGET_DISK:
+                selection = confirm_target(disk, target)
+                if selection is None:
+                    return False
+                # La protection porte sur la partition, déjà vérifiée
+                is_active = False
             print("-" * 50)
             
             if is_disk_ssd and "réécriture" in method_description.lower():
@@ -303,8 +310,12 @@ def confirm_erasure(disk: str, fs_choice: str, method_description: str) -> bool:
                 print("\nDANGER : Ceci est le DISQUE SYSTÈME ACTIF ! L'effacer rendra votre système inutilisable.")
                 print("        Le système va PLANTER si vous procédez à l'effacement de ce disque.")
                 
-            print(f"\nVous êtes sur le point d'EFFACER DÉFINITIVEMENT le disque {disk_id} (/dev/{disk}).")
-            print(f"Système de fichiers : {fs_choice}")
+            if selection:
+                print(f"\nVous êtes sur le point d'EFFACER DÉFINITIVEMENT : {selection['description']} "
+                      f"({selection['size'] // (1024 * 1024)} Mo) du disque {disk_id} (/dev/{disk}).")
+            else:
+                print(f"\nVous êtes sur le point d'EFFACER DÉFINITIVEMENT le disque {disk_id} (/dev/{disk}).")
+            print(f"Système de fichiers : {fs_choice if not selection or selection['partition'] else 'aucun (espace non alloué)'}")
             print(f"Méthode : {method_description}")
             print("Cette opération NE PEUT PAS être annulée et TOUTES LES DONNÉES SERONT PERDUES !")
             
@@ -325,15 +336,115 @@ def confirm_erasure(disk: str, fs_choice: str, method_description: str) -> bool:
             log_error(f"Erreur de saisie lors de la confirmation d'effacement : {str(e)}")
             return False
 
-def get_disk_confirmations(disks: list[str], fs_choice: str, passes: int, use_crypto: bool, crypto_fill: str) -> list[str]:
-    """Obtient la confirmation pour chaque disque avec les détails de l'opération."""
-    if use_crypto:
-        fill_method = "zéros" if crypto_fill == "zero" else "données aléatoires"
-        method_description = f"effacement cryptographique (remplissage avec {fill_method})"
+def confirm_batch(disks: list[str], fs_choice: str, methods: dict[str, str], inventory: dict[str, dict]) -> list[str]:
+    """
+    Confirmation unique d'un lot : tableau récapitulatif des disques, méthodes et avertissements,
+    puis saisie d'un jeton (« EFFACER <nombre de disques> ») qui vaut pour tout le lot. Un disque
+    système actif demande en plus 'DETRUIRE', faute de quoi il est retiré du lot.
+
+    Returns:
+        list: Les disques confirmés (vide si le jeton est incorrect)
+    """
+    try:
+        print_inventory_table(disks, inventory, f"EFFACEMENT DE {len(disks)} DISQUE(S)")
+        by_method: dict[str, list[str]] = {}
+        for disk in disks:
+            by_method.setdefault(methods[disk], []).append(disk)
+        for method, method_disks in by_method.items():
+            print(f"Méthode : {method} - {', '.join(method_disks)}")
+        print(f"Système de fichiers : {fs_choice}")
+
+        flash_overwrite = [disk for disk in disks if is_flash_media(inventory[disk]) and "réécriture" in methods[disk].lower()]
+        if flash_overwrite:
+            print(f"\nATTENTION : SSD/flash effacé(s) par réécriture, peut-être de façon incomplète : {', '.join(flash_overwrite)}")
+            print("         Considérez plutôt utiliser l'effacement cryptographique.")
+        active = [disk for disk in disks if inventory[disk]["active"]]
+        if active:
+            print(f"\nDANGER : DISQUE SYSTÈME ACTIF dans le lot : {', '.join(active)} ! L'effacer rendra votre système inutilisable.")
+
+        token = f"EFFACER {len(disks)}"
+        print("\nCette opération NE PEUT PAS être annulée et TOUTES LES DONNÉES SERONT PERDUES !")
+        confirmation = input(f"Tapez « {token} » pour effacer ces {len(disks)} disque(s) (toute autre saisie annule) : ").strip()
+        if confirmation != token:
+            print("Confirmation incorrecte : aucun disque ne sera effacé.")
+            log_info(f"Effacement de {len(disks)} disque(s) non confirmé")
+            return []
+        confirmed = list(disks)
+        if active:
+            second_confirm = input("AVERTISSEMENT FINAL : Le lot contient le DISQUE SYSTÈME ACTIF. Tapez 'DETRUIRE' pour l'effacer aussi : ").strip()
+            if second_confirm != "DETRUIRE":
+                confirmed = [disk for disk in disks if disk not in active]
+                print(f"Disque(s) système actif(s) retiré(s) du lot : {', '.join(active)}")
+        log_info(f"Effacement confirmé en une fois pour {len(confirmed)} disque(s) : {', '.join(confirmed)}")
+        return confirmed
+    except KeyboardInterrupt:
+        log_error("Confirmation d'effacement interrompue par l'utilisateur (Ctrl+C)")
+        sys.exit(130)
+    except (EOFError, IOError) as e:
+        log_error(f"Erreur de saisie lors de la confirmation d'effacement : {str(e)}")
+        return []
+
+def classify_disks(disks: list[str], classes_path: str | None, base_settings: dict, inventory: dict[str, dict]) -> dict[str, dict]:
+    """
+    Choisit les réglages de chaque disque d'après la table de classification : réglages de la
+    session (base_settings) remplacés par ceux du profil de classe. Les disques qu'aucune règle
+    ne classe sont écartés. Les caractéristiques des disques viennent de l'inventaire.
+
+    Returns:
+        dict: {disque: réglages (method, passes, fill, verify, zero_skip, profile, crypto_profile,
+               health_policy, unlock_hpa, class, description)}
+    """
+    try:
+        classes = load_classes(classes_path)
+    except ClassificationError as e:
+        print(str(e))
+        log_error(str(e))
+        return {}
+    disk_settings = {}
+    print("\nClassification des disques :")
+    for disk in disks:
+        assignment = classify(inventory[disk], classes)
+        if assignment is None:
+            message = f"/dev/{disk} : aucune règle de classification ne correspond, disque écarté"
+            print(f"  {message}")
+            log_error(message)
+            continue
+        settings = dict(base_settings)
+        settings.update(assignment["settings"])
+        settings["class"] = assignment["class"]
+        settings["description"] = describe_assignment(dict(assignment, settings=settings))
+        if settings["profile"]:
+            # Tampons des motifs fixes calculés une fois et partagés par les disques de la classe
+            prepare_profile(settings["profile"])
+        disk_settings[disk] = settings
+        message = f"/dev/{disk} ({describe_facts(inventory[disk])}) : {settings['description']}"
+        print(f"  {message}")
+        log_info(f"Classification : {message}")
+    return disk_settings
+
+def get_disk_confirmations(disks: list[str], fs_choice: str, passes: int, use_crypto: bool, crypto_fill: str, profile: str | None,
+                           target: str, disk_settings: dict[str, dict] | None, inventory: dict[str, dict]) -> list[str]:
+    """
+    Obtient la confirmation des disques avec les détails de l'opération (la méthode propre à
+    chaque disque avec disk_settings, voir classify_disks) : une seule confirmation pour tout le
+    lot (confirm_batch), ou disque par disque pour un effacement sélectif dont la table de
+    partitions doit être examinée.
+    """
+    if disk_settings is not None:
+        methods = {disk: f"classe {disk_settings[disk]['class']}, {describe_class_settings(disk_settings[disk])}" for disk in disks}
     else:
-        method_description = f"réécriture standard {passes}-passes"
+        if profile and not use_crypto:
+            method_description = f"réécriture selon le profil {get_profile(profile)['name']}"
+        elif use_crypto:
+            fill_method = "zéros" if crypto_fill == "zero" else "données aléatoires"
+            method_description = f"effacement cryptographique (remplissage avec {fill_method})"
+        else:
+            method_description = f"réécriture standard {passes}-passes"
+        methods = {disk: method_description for disk in disks}
     
-    return [disk for disk in disks if confirm_erasure(disk, fs_choice, method_description)]
+    if target == TARGET_DISK:
+        return confirm_batch(disks, fs_choice, methods, inventory)
+    return [disk for disk in disks if confirm_erasure(disk, fs_choice, methods[disk], target, inventory)]
 
 def print_log_menu() -> None:
     """Affiche et gère les options d'impression des journaux"""
@@ -376,7 +487,7 @@ def print_session_log_cli() -> None:
         print("Génération du PDF du journal de session...")
         pdf_path = generate_session_pdf()
         
-        print(f"PDF du journal de session généré avec succès !")
+        print("PDF du journal de session généré avec succès !")
         print(f"Sauvegardé dans : {pdf_path}")
         log_info(f"PDF du journal de session sauvegardé dans : {pdf_path}")
         
@@ -403,7 +514,7 @@ def print_complete_log_cli() -> None:
         print("Génération du PDF du journal complet...")
         pdf_path = generate_log_file_pdf()
         
-        print(f"PDF du journal complet généré avec succès !")
+        print("PDF du journal complet généré avec succès !")
         print(f"Sauvegardé dans : {pdf_path}")
         log_info(f"PDF du journal complet sauvegardé dans : {pdf_path}")
         
@@ -424,74 +535,182 @@ def print_complete_log_cli() -> None:
         print(error_msg)
         log_error(error_msg)
 
-def cli_process_disk(disk, fs_choice, passes, use_crypto=False, crypto_fill="random"):
+def cli_process_disk(disk, fs_choice, passes, use_crypto=False, crypto_fill="random", token=None, profile=None, io_policy=None, crypto_profile=None,
+                     target=None, unlock_hpa=False, health_policy=None, verify=False, zero_skip=False, dashboard=None,
+                     disk_info=None):
     """
     Traite un seul disque pour l'interface CLI avec affichage du statut.
     
     Cette fonction enveloppe la fonction process_disk de disk_operations.py
     pour fournir une journalisation et une gestion d'erreurs spécifiques au CLI.
+    Avec dashboard (cli_dashboard.Dashboard), rien n'est écrit directement sur la sortie :
+    la ligne du disque est mise à jour et le détail va dans le fichier de log. disk_info,
+    l'entrée du disque dans l'inventaire (voir take_inventory), évite de l'interroger à nouveau.
     """
+    # Les erreurs journalisées parviennent au tableau de bord par son panneau d'événements
+    echo = print if dashboard is None else (lambda message: None)
     try:
         # Obtenir l'identifiant du disque pour une meilleure journalisation
-        disk_id = get_disk_serial(disk)
+        disk_id = disk_info["id"] if disk_info else get_disk_serial(disk)
         process_msg = f"Traitement du disque {disk_id} (/dev/{disk})"
-        print(f"\n{process_msg}...")
+        echo(f"\n{process_msg}...")
         log_info(process_msg)
         
         # Définir une fonction de journalisation pour le CLI
-        def log_progress(message):
-            print(f"  {message}")
+        if dashboard is not None:
+            dashboard.set_status(disk, RUNNING)
+            log_progress = dashboard.log_func(disk)
+        else:
+            def log_progress(message):
+                print(f"  {message}")
         
         # Indiquer si le disque est un SSD et n'utilise pas crypto
-        if is_ssd(disk) and not use_crypto:
+        if (is_flash_media(disk_info) if disk_info else is_ssd(disk)) and not use_crypto:
             warning_msg = f"ATTENTION : {disk_id} est un SSD - l'effacement multi-passes peut ne pas être efficace"
-            print(f"  {warning_msg}")
             log_info(warning_msg)
+            if dashboard is not None:
+                dashboard.event(f"/dev/{disk} : {warning_msg}")
+            else:
+                print(f"  {warning_msg}")
         
         # Traiter le disque en utilisant la fonction importée avec le flag crypto et la méthode de remplissage
-        process_disk(disk, fs_choice, passes, use_crypto, crypto_fill, log_func=log_progress)
+        process_disk(disk, fs_choice, passes, use_crypto, crypto_fill, log_func=log_progress, token=token, profile=profile, io_policy=io_policy,
+                     crypto_profile=crypto_profile, target=target, unlock_hpa=unlock_hpa,
+                     health_policy=health_policy, verify=verify, zero_skip=zero_skip)
         
         success_msg = f"Toutes les opérations sur le disque {disk_id} terminées avec succès"
-        print(success_msg)
+        echo(success_msg)
         log_info(success_msg)
         return True
+    except EraseCancelled:
+        cancel_msg = f"Traitement du disque /dev/{disk} arrêté à la demande de l'utilisateur"
+        echo(cancel_msg)
+        log_error(cancel_msg)
+        raise
     except (CalledProcessError, SubprocessError) as e:
         error_msg = f"Erreur d'exécution de commande lors du traitement du disque /dev/{disk} : {str(e)}"
-        print(error_msg)
+        echo(error_msg)
         log_error(error_msg)
         return False
     except (IOError, OSError) as e:
         error_msg = f"Erreur système lors du traitement du disque /dev/{disk} : {str(e)}"
-        print(error_msg)
+        echo(error_msg)
         log_error(error_msg)
         return False
     except (FileNotFoundError, PermissionError) as e:
         error_msg = f"Erreur d'accès lors du traitement du disque /dev/{disk} : {str(e)}"
-        print(error_msg)
+        echo(error_msg)
         log_error(error_msg)
         return False
     except (ValueError, TypeError) as e:
         error_msg = f"Erreur de validation de données lors du traitement du disque /dev/{disk} : {str(e)}"
-        print(error_msg)
+        echo(error_msg)
         log_error(error_msg)
         return False
     except (ImportError, AttributeError) as e:
         error_msg = f"Erreur de module/dépendance lors du traitement du disque /dev/{disk} : {str(e)}"
-        print(error_msg)
+        echo(error_msg)
         log_error(error_msg)
         return False
     except KeyboardInterrupt:
         error_msg = f"Traitement du disque interrompu pour /dev/{disk}"
-        print(error_msg)
+        echo(error_msg)
         log_error(error_msg)
         return False
 
+def run_dry_run(disks, passes, use_crypto, crypto_fill, profile=None, disk_settings=None):
+    """Affiche la durée projetée de l'effacement des disques sans rien écrire."""
+    print("\nSimulation (aucune écriture) : mesure de lecture des disques sélectionnés...")
+    settings = {"method": "crypto" if use_crypto else "overwrite", "passes": passes,
+                "fill": crypto_fill, "profile": profile}
+    try:
+        report = project_erasure(disks, lambda disk: disk_settings[disk] if disk_settings else settings,
+                                 log_func=lambda message: print(f"  {message}"))
+    except OSError as e:
+        error_msg = f"Simulation impossible : {str(e)}"
+        print(error_msg)
+        log_error(error_msg)
+        return
+    print()
+    for line in format_projection(report):
+        print(line)
+        log_info(f"Simulation : {line}")
+
+def prompt_cancel(running, tokens):
+    """
+    Appelée sur Ctrl+C pendant les effacements : demande quel disque arrêter.
+    Les autres disques continuent ; un second Ctrl+C arrête tous les disques.
+    """
+    print(f"\n\nDisques en cours : {', '.join(running)}")
+    try:
+        choice = input("Disque à arrêter (nom, 'tous', ou Entrée pour continuer) : ").strip().replace('/dev/', '')
+    except (KeyboardInterrupt, EOFError):
+        choice = "tous"
+    if not choice:
+        print("Reprise des opérations.")
+        return
+    if choice == "tous":
+        targets = list(tokens)
+    elif choice in tokens:
+        targets = [choice]
+    else:
+        print(f"Disque inconnu : {choice}. Reprise des opérations.")
+        return
+    for disk in targets:
+        if not tokens[disk].cancelled:
+            log_info(f"Arrêt demandé par l'utilisateur pour /dev/{disk}")
+            tokens[disk].cancel()
+    print(f"Arrêt demandé pour : {', '.join(targets)}")
+
+def run_with_daemon(client, disks, fs_choice, passes, use_crypto, crypto_fill, profile=None, crypto_profile=None, target=None,
+                    unlock_hpa=False, health_policy=None, disk_settings=None):
+    """
+    Soumet les disques au service d'effacement et affiche leur progression jusqu'à la fin.
+    Avec disk_settings (voir classify_disks), chaque disque est soumis avec ses propres réglages.
+    """
+    job_ids = []
+    settings = {"passes": passes, "method": "crypto" if use_crypto else "overwrite", "fill": crypto_fill, "profile": profile,
+                "crypto_profile": crypto_profile, "unlock_hpa": unlock_hpa, "health_policy": health_policy}
+    for disk in disks:
+        if disk_settings:
+            settings = {key: value for key, value in disk_settings[disk].items() if key not in ("class", "description")}
+        try:
+            job = client.submit(disk, filesystem=fs_choice, target=target, **settings)
+            job_ids.append(job["id"])
+            print(f"Travail {job['id']} soumis au service pour /dev/{disk}")
+        except DaemonError as e:
+            error_msg = f"Soumission refusée pour /dev/{disk} : {str(e)}"
+            print(error_msg)
+            log_error(error_msg)
+    if not job_ids:
+        return
+    
+    def print_event(event):
+        if event["type"] == "log":
+            print(f"  [{event['device']}] {event['message']}")
+        elif event["type"] == "status":
+            print(f"[{event['device']}] {event['status']} {event.get('message', '')}".rstrip())
+    
+    try:
+        final = client.follow(job_ids, print_event)
+        completed = sum(1 for status in final.values() if status == "done")
+        completion_msg = f"Opérations terminées sur {completed}/{len(job_ids)} disques."
+        print(f"\n{completion_msg}")
+        log_info(completion_msg)
+    except KeyboardInterrupt:
+        print("\nSuivi interrompu : les effacements continuent dans le service.")
+    except DaemonError as e:
+        print(f"{str(e)} - les effacements continuent dans le service.")
+        log_error(str(e))
+
 def run_disk_erasure_operation(args=None):
     """Exécute le flux de travail de l'opération d'effacement de disque"""
     try:
         # D'abord, lister les disques et sélectionner les disques à effacer
         print("Liste des disques disponibles : ")
-        disks = select_disks()
+        # Un seul relevé des disques, réutilisé de la sélection jusqu'au lancement des effacements
+        inventory = take_inventory()
+        disks = select_disks(inventory, getattr(args, 'select', None) if args else None)
         if not disks:
             print("Aucun disque sélectionné. Retour au menu principal.")
             return
@@ -503,7 +722,20 @@ def run_disk_erasure_operation(args=None):
             fs_choice = choose_filesystem()
             
         # Obtenir la méthode d'effacement
-        if args and hasattr(args, 'crypto') and args.crypto:
+        profile = getattr(args, 'profile', None) if args else None
+        classes_path = getattr(args, 'classes', None) if args else None
+        if classes_path is not None:
+            # Méthode choisie disque par disque par la table de classification (voir classify_disks)
+            use_crypto = False
+            crypto_fill = "random"
+            passes = args.passes or 3
+        elif profile:
+            # Le profil normalisé fixe la séquence de passes ; ses tampons de motifs sont préparés une seule fois
+            prepare_profile(profile)
+            use_crypto = bool(get_profile(profile).get("crypto"))
+            crypto_fill = "random"
+            passes = 1
+        elif args and hasattr(args, 'crypto') and args.crypto:
             use_crypto = True
             crypto_fill = "zero" if (hasattr(args, 'zero') and args.zero) else "random"
             passes = 1  # Non utilisé pour crypto
@@ -520,7 +752,15 @@ def run_disk_erasure_operation(args=None):
         print(f"Système de fichiers sélectionné : {fs_choice}")
         log_info(f"Système de fichiers sélectionné : {fs_choice}")
         
-        if use_crypto:
+        if classes_path is not None:
+            method_msg = f"Méthode d'effacement : selon la table de classification {classes_path or '(emplacement par défaut)'}"
+            print(method_msg)
+            log_info(method_msg)
+        elif profile:
+            method_msg = f"Méthode d'effacement : Profil {get_profile(profile)['name']}"
+            print(method_msg)
+            log_info(method_msg)
+        elif use_crypto:
             fill_method = "zéros" if crypto_fill == "zero" else "données aléatoires"
             method_msg = f"Méthode d'effacement : Effacement cryptographique (remplissage avec {fill_method})"
             print(method_msg)
@@ -530,8 +770,28 @@ def run_disk_erasure_operation(args=None):
             print(method_msg)
             log_info(method_msg)
         
-        # Ensuite, obtenir la confirmation pour chaque disque avec les informations détaillées de l'opération
-        confirmed_disks = get_disk_confirmations(disks, fs_choice, passes, use_crypto, crypto_fill)
+        crypto_profile = getattr(args, 'crypto_profile', None) if args else None
+        target = getattr(args, 'target', None) or TARGET_DISK
+        unlock_hpa = bool(getattr(args, 'unlock_hpa', False))
+        health_policy = getattr(args, 'health_policy', None) if args else None
+        disk_settings = None
+        if classes_path is not None:
+            disk_settings = classify_disks(disks, classes_path or None, {
+                "method": "overwrite", "passes": passes, "fill": "random", "verify": False, "zero_skip": False,
+                "profile": None, "crypto_profile": crypto_profile, "health_policy": health_policy, "unlock_hpa": unlock_hpa,
+            }, inventory)
+            disks = [disk for disk in disks if disk in disk_settings]
+            if not disks:
+                print("Aucun disque classé. Retour au menu principal.")
+                return
+        
+        # Simulation : aucune confirmation nécessaire puisque rien n'est écrit
+        if args and getattr(args, 'dry_run', False):
+            run_dry_run(disks, passes, use_crypto, crypto_fill, profile, disk_settings)
+            return
+        
+        # Ensuite, obtenir la confirmation du lot avec les informations détaillées de l'opération
+        confirmed_disks = get_disk_confirmations(disks, fs_choice, passes, use_crypto, crypto_fill, profile, target, disk_settings, inventory)
         if not confirmed_disks:
             print("Aucun disque confirmé pour l'effacement. Retour au menu principal.")
             return
@@ -540,24 +800,69 @@ def run_disk_erasure_operation(args=None):
         operation_start_msg = f"Démarrage des opérations d'effacement de disque sur {len(confirmed_disks)} disque(s)"
         log_info(operation_start_msg)
         
-        with ThreadPoolExecutor() as executor:
-            # Utiliser notre fonction cli_process_disk avec le flag crypto et l'option crypto_fill
-            futures = [executor.submit(cli_process_disk, disk, fs_choice, passes, use_crypto, crypto_fill) for disk in confirmed_disks]
-            
-            completed = 0
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    if result:
-                        completed += 1
-                except (RuntimeError, ValueError, TypeError) as e:
-                    error_msg = f"Erreur d'exécution de thread lors du traitement du disque : {str(e)}"
-                    log_error(error_msg)
-                except (TimeoutError, InterruptedError) as e:
-                    error_msg = f"Erreur de timeout/interruption de thread lors du traitement du disque : {str(e)}"
-                    log_error(error_msg)
+        # Si le service d'effacement tourne, lui confier les travaux : ils survivent à la fermeture du CLI
+        client = DaemonClient(args.socket if args and getattr(args, 'socket', None) else DEFAULT_SOCKET_PATH)
+        if client.is_available():
+            run_with_daemon(client, confirmed_disks, fs_choice, passes, use_crypto, crypto_fill, profile, crypto_profile, target, unlock_hpa,
+                            health_policy, disk_settings)
+            return
         
+        # Un jeton d'annulation par disque : Ctrl+C permet d'arrêter un disque sans interrompre les autres
+        tokens = {disk: CancellationToken() for disk in confirmed_disks}
+        # Priorités et plafonds de débit des options ; un plafond de contrôleur est partagé entre ses disques
+        io_policy = getattr(args, 'io_policy', None) or IsolationPolicy()
+        io_policy = io_policy.for_disks(confirmed_disks)
+        results = {}
+        # Une ligne par disque redessinée en place ; le détail de chaque disque va dans le fichier de log
+        dashboard = Dashboard(confirmed_disks)
+        def on_disk_done(disk, future):
+            result = result_from_future(disk, future)
+            results[disk] = result
+            dashboard.set_status(disk, result.status, result.message)
+            if not result.ok:
+                log_error(f"Disque /dev/{disk} : {result.status} (code {result.exit_code}) {result.message}".rstrip())
+        
+        def on_interrupt(running):
+            # Le tableau de bord ne doit pas redessiner par-dessus la question posée à l'utilisateur
+            dashboard.pause()
+            try:
+                prompt_cancel(running, tokens)
+            finally:
+                dashboard.resume()
+        
+        def run_disk(disk):
+            if disk_settings is None:
+                return cli_process_disk(disk, fs_choice, passes, use_crypto, crypto_fill, token=tokens[disk], profile=profile,
+                                        io_policy=io_policy, crypto_profile=crypto_profile, target=target,
+                                        unlock_hpa=unlock_hpa, health_policy=health_policy, dashboard=dashboard,
+                                        disk_info=inventory.get(disk))
+            settings = disk_settings[disk]
+            disk_profile = settings["profile"]
+            disk_crypto = bool(get_profile(disk_profile).get("crypto")) if disk_profile else settings["method"] == "crypto"
+            return cli_process_disk(disk, fs_choice, settings["passes"], disk_crypto, settings["fill"], token=tokens[disk],
+                                    profile=disk_profile, io_policy=io_policy, crypto_profile=settings["crypto_profile"],
+                                    target=target, unlock_hpa=settings["unlock_hpa"], health_policy=settings["health_policy"],
+                                    verify=settings["verify"], zero_skip=settings["zero_skip"], dashboard=dashboard,
+                                    disk_info=inventory.get(disk))
+        
+        # Le parallélisme s'adapte au débit mesuré au lieu d'un nombre fixe de workers
+        dashboard.start()
+        try:
+            run_adaptive(
+                confirmed_disks,
+                run_disk,
+                on_done=on_disk_done,
+                tokens=tokens,
+                on_interrupt=on_interrupt
+            )
+        finally:
+            dashboard.stop()
+        
+        completed = sum(1 for result in results.values() if result.ok)
+        cancelled = [disk for disk, result in results.items() if result.status == CANCELLED]
         completion_msg = f"Opérations terminées sur {completed}/{len(confirmed_disks)} disques."
+        if cancelled:
+            completion_msg += f" Disque(s) arrêté(s) : {', '.join(cancelled)}."
         print(f"\n{completion_msg}")
         log_info(completion_msg)
         
@@ -0,0 +1,139 @@
+import os
+import logging
+import subprocess
+from functools import lru_cache
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Profils dm-crypt de l'effacement cryptographique. La clé est aléatoire puis détruite :
+# un PBKDF coûteux (Argon2, plusieurs secondes et jusqu'à 1 Go de RAM par disque) n'apporte rien
+CRYPTO_PROFILES = {
+    "fast": {
+        "name": "Rapide (PBKDF2 minimal, secteurs 4K, AES-XTS, sans files de travail dm-crypt)",
+        "pbkdf": "pbkdf2",
+        "pbkdf_iterations": 1000,
+        "cipher": "aes-xts-plain64",
+        "sector_size": 4096,
+        "no_workqueue": True,
+    },
+    "default": {
+        "name": "Réglages par défaut de cryptsetup",
+    },
+    # dm-crypt « plain » : ni en-tête LUKS, ni PBKDF, ni fichier clé ; la clé n'existe qu'en mémoire
+    "ephemeral": {
+        "name": "Éphémère (dm-crypt plain, clé en mémoire transmise par tube)",
+        "plain": True,
+        "cipher": "aes-xts-plain64",
+        "sector_size": 4096,
+        "no_workqueue": True,
+    },
+}
+
+DEFAULT_CRYPTO_PROFILE = "fast"
+
+# Options des files de travail dm-crypt (cryptsetup >= 2.3.4, noyau >= 5.9)
+WORKQUEUE_OPTIONS = ["--perf-no_read_workqueue", "--perf-no_write_workqueue"]
+
+def get_crypto_profile(key: str) -> dict:
+    profile = CRYPTO_PROFILES.get(key)
+    if profile is None:
+        raise ValueError(f"Profil cryptographique inconnu : {key} (disponibles : {', '.join(CRYPTO_PROFILES)})")
+    return profile
+
+@lru_cache(maxsize=None)
+def has_aes_acceleration(cpuinfo_path: str = "/proc/cpuinfo") -> bool:
+    """Vrai si le processeur dispose d'instructions AES (AES-NI sur x86, extension AES sur ARM)."""
+    try:
+        with open(cpuinfo_path, "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features") and "aes" in value.split():
+                    return True
+    except OSError as e:
+        logging.warning(f"Lecture de {cpuinfo_path} impossible : {str(e)}")
+    return False
+
+@lru_cache(maxsize=None)
+def cryptsetup_supports(option: str) -> bool:
+    """Vrai si la version installée de cryptsetup connaît l'option donnée."""
+    try:
+        result = subprocess.run(["cryptsetup", "--help"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return option in result.stdout
+
+def _logical_block_size(device: str, sysfs_root: str = "/sys") -> int:
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", device, "queue", "logical_block_size"), "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 512
+
+def _size_bytes(device: str, sysfs_root: str = "/sys") -> int:
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", device, "size"), "r") as f:
+            return int(f.read().strip()) * 512
+    except (OSError, ValueError):
+        return 0
+
+def supports_sector_size(device: str, sector_size: int, sysfs_root: str = "/sys") -> bool:
+    """Vrai si dm-crypt peut utiliser ces secteurs sur le disque (taille multiple, secteurs logiques au plus aussi grands)."""
+    return _logical_block_size(device, sysfs_root) <= sector_size and _size_bytes(device, sysfs_root) % sector_size == 0
+
+def format_options(key: str, device: str, sysfs_root: str = "/sys") -> list[str]:
+    """
+    Options de cryptsetup luksFormat du profil pour ce disque.
+
+    AES-256-XTS (clé de 512 bits) avec accélération AES, sinon AES-128-XTS pour limiter le coût
+    processeur. Les secteurs de 4K ne sont demandés que si le disque les permet (taille multiple
+    de 4096 et secteurs logiques de 4096 octets au plus).
+    """
+    profile = get_crypto_profile(key)
+    options = []
+    if profile.get("pbkdf"):
+        options += ["--pbkdf", profile["pbkdf"]]
+        if profile.get("pbkdf_iterations"):
+            options += ["--pbkdf-force-iterations", str(profile["pbkdf_iterations"])]
+    if profile.get("cipher"):
+        options += ["--cipher", profile["cipher"], "--key-size", str(key_size())]
+    sector_size = profile.get("sector_size")
+    if sector_size:
+        if supports_sector_size(device, sector_size, sysfs_root):
+            options += ["--sector-size", str(sector_size)]
+        else:
+            logging.warning(f"Secteurs de {sector_size} octets impossibles sur {device} : taille de secteur par défaut")
+    return options
+
+def key_size() -> int:
+    """Taille de clé en bits du profil (AES-256-XTS avec accélération AES, sinon AES-128-XTS)."""
+    return 512 if has_aes_acceleration() else 256
+
+def plain_options(key: str, device: str, sysfs_root: str = "/sys") -> list[str]:
+    """
+    Options de cryptsetup open --type plain : la clé brute est lue sur l'entrée standard.
+    """
+    profile = get_crypto_profile(key)
+    bits = key_size()
+    options = ["--type", "plain", "--cipher", profile.get("cipher", "aes-xts-plain64"), "--key-size", str(bits),
+               "--key-file", "-", "--keyfile-size", str(bits // 8)]
+    sector_size = profile.get("sector_size")
+    if sector_size and supports_sector_size(device, sector_size, sysfs_root):
+        if cryptsetup_supports("--sector-size"):
+            options += ["--sector-size", str(sector_size)]
+    return options + open_options(key)
+
+def open_options(key: str) -> list[str]:
+    """Options de cryptsetup open du profil (contournement des files de travail si disponible)."""
+    profile = get_crypto_profile(key)
+    if profile.get("no_workqueue"):
+        if cryptsetup_supports(WORKQUEUE_OPTIONS[0]):
+            return list(WORKQUEUE_OPTIONS)
+        logging.warning("cryptsetup ne prend pas en charge --perf-no_*_workqueue : files de travail dm-crypt conservées")
+    return []
+
+def describe_crypto_profile(key: str) -> str:
+    profile = get_crypto_profile(key)
+    if profile.get("cipher"):
+        acceleration = "avec" if has_aes_acceleration() else "sans"
+        return f"{profile['name']}, {acceleration} accélération AES"
+    return profile["name"]
@@ -0,0 +1,104 @@
+import os
+import json
+import socket
+import http.client
+from erase_daemon import DEFAULT_SOCKET_PATH, FINISHED_STATES
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float | None = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class DaemonError(Exception):
+    """Levée lorsque le service d'effacement refuse une requête ou est injoignable."""
+
+class DaemonClient:
+    """
+    Client léger de l'API de contrôle du service d'effacement.
+    """
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 10.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: dict | None = None):
+        connection = _UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = json.loads(response.read().decode("utf-8") or "null")
+        except (OSError, http.client.HTTPException, json.JSONDecodeError) as e:
+            raise DaemonError(f"Service d'effacement injoignable sur {self.socket_path} : {str(e)}")
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise DaemonError(data.get("error", f"Erreur HTTP {response.status}") if isinstance(data, dict) else f"Erreur HTTP {response.status}")
+        return data
+
+    def is_available(self) -> bool:
+        if not os.path.exists(self.socket_path):
+            return False
+        try:
+            self.list_jobs()
+            return True
+        except DaemonError:
+            return False
+
+    def submit(self, device: str, **settings) -> dict:
+        payload = {"device": device, "operator": os.environ.get("SUDO_USER") or os.environ.get("USER", "")}
+        payload.update(settings)
+        return self._request("POST", "/jobs", payload)
+
+    def list_jobs(self) -> list[dict]:
+        return self._request("GET", "/jobs")
+
+    def get_job(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id: str) -> dict:
+        return self._request("POST", f"/jobs/{job_id}/cancel")
+
+    def events(self, since: int = 0):
+        """
+        Générateur des événements de progression diffusés par le service.
+        """
+        connection = _UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            connection.request("GET", f"/events?since={since}")
+            response = connection.getresponse()
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                yield json.loads(line.decode("utf-8"))
+        except (OSError, http.client.HTTPException) as e:
+            raise DaemonError(f"Flux de progression interrompu : {str(e)}")
+        finally:
+            connection.close()
+
+    def follow(self, job_ids: list[str], on_event) -> dict[str, str]:
+        """
+        Transmet les événements des travaux donnés à on_event jusqu'à ce qu'ils soient tous terminés.
+
+        Returns:
+            dict: {identifiant du travail: statut final}
+        """
+        final = {job["id"]: job["status"] for job in self.list_jobs() if job["id"] in job_ids and job["status"] in FINISHED_STATES}
+        if len(final) == len(job_ids):
+            return final
+        for event in self.events():
+            if event.get("job") not in job_ids:
+                continue
+            on_event(event)
+            if event["type"] == "status" and event["status"] in FINISHED_STATES:
+                final[event["job"]] = event["status"]
+                if len(final) == len(job_ids):
+                    break
+        return final
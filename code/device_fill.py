@@ -0,0 +1,124 @@
+import os
+import mmap
+import errno
+import logging
+from erase_jobs import CancellationToken
+from io_isolation import throttle
+from region_erase import write_granularity, region_count, split_regions, ranges_size, describe_regions, RegionProgress, run_regions
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Taille d'une requête d'écriture, multiple de la taille de page et des secteurs 4K
+FILL_CHUNK_SIZE = 8 * 1024 * 1024
+
+def open_direct(path: str, flags: int = os.O_WRONLY) -> tuple[int, bool]:
+    """
+    Ouvre la cible en écriture directe (O_DIRECT) si le noyau l'accepte, sinon en écriture
+    synchrone (O_DSYNC). Dans les deux cas, pwrite ne rend la main qu'une fois les données
+    sur le disque : une erreur d'écriture ou un blocage est attribué au bloc écrit, et non
+    découvert au fsync final. Avec O_DIRECT, les tampons, positions et longueurs doivent être
+    alignés sur les secteurs logiques (tampons mmap).
+
+    Returns:
+        tuple: (descripteur, True si O_DIRECT est actif)
+    """
+    direct = getattr(os, "O_DIRECT", 0)
+    if direct:
+        try:
+            return os.open(path, flags | direct), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+    return os.open(path, flags | os.O_DSYNC), False
+
+def _read_random(source: int, buffer: mmap.mmap, length: int) -> None:
+    """Remplit le tampon depuis /dev/urandom, directement dans sa mémoire."""
+    view = memoryview(buffer)
+    done = 0
+    try:
+        while done < length:
+            done += os.readv(source, [view[done:length]])
+    finally:
+        view.release()
+
+def fill_device(path: str, source: str = "zero", writers: int | None = None, chunk_size: int = FILL_CHUNK_SIZE,
+                log_func=None, token: CancellationToken | None = None, device: str | None = None,
+                ranges: list[tuple[int, int]] | None = None) -> int:
+    """
+    Remplit un périphérique (typiquement un mapper dm-crypt) sans processus dd.
+
+    Le périphérique est découpé en régions contiguës (voir region_erase), chacune écrite par
+    son propre thread. Chaque écrivain possède un tampon aligné sur la page (mmap), rempli une
+    seule fois de zéros, ou rechargé depuis /dev/urandom pour chaque bloc en remplissage
+    aléatoire, et l'écrit par pwritev sans copie intermédiaire. Les écritures sont directes
+    (O_DIRECT) lorsque le périphérique l'accepte, sinon synchrones (O_DSYNC), voir open_direct.
+
+    Args:
+        path: Chemin du périphérique à remplir
+        source: "zero" ou "random"
+        writers: Nombre de threads écrivains (défaut : déduit de la file du disque device)
+        chunk_size: Taille de chaque requête (multiple de la taille de page)
+        device: Disque physique sous-jacent, dont la file détermine le nombre d'écrivains (défaut : path)
+        ranges: Plages d'octets à remplir (défaut : tout le périphérique)
+
+    Returns:
+        int: Nombre d'octets écrits
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        OSError: En cas d'erreur d'écriture
+    """
+    if source not in ("zero", "random"):
+        raise ValueError(f"Source de remplissage invalide : {source} (zero ou random)")
+    if chunk_size % mmap.PAGESIZE:
+        raise ValueError(f"La taille de bloc doit être un multiple de {mmap.PAGESIZE} octets")
+
+    def log(message: str) -> None:
+        logging.info(message)
+        if log_func:
+            log_func(message)
+
+    fd, direct = open_direct(path)
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        total = size if ranges is None else ranges_size(ranges)
+        if writers is None:
+            writers = region_count(device or path, total)
+        parts = split_regions(size, writers, chunk_size, ranges)
+        log(f"Remplissage de {path} ({'aléatoire' if source == 'random' else 'zéros'}, {describe_regions(parts, writers)}, "
+            f"blocs de {chunk_size // (1024 * 1024)} Mo{', O_DIRECT' if direct else ''})...")
+        progress = RegionProgress(f"{path} : remplissage", total, log)
+
+        def write_region(start: int, end: int, stop) -> None:
+            buffer = mmap.mmap(-1, chunk_size)
+            random_fd = os.open("/dev/urandom", os.O_RDONLY) if source == "random" else None
+            try:
+                offset = start
+                while offset < end and not stop.is_set():
+                    if token is not None:
+                        token.check()
+                    length = min(chunk_size, end - offset)
+                    if random_fd is not None:
+                        _read_random(random_fd, buffer, length)
+                    throttle(token, length)
+                    if length == chunk_size:
+                        written = os.pwritev(fd, [buffer], offset)
+                    else:
+                        with memoryview(buffer) as view:
+                            written = os.pwritev(fd, [view[:length]], offset)
+                    if written != length:
+                        raise OSError(f"Écriture incomplète sur {path} à l'octet {offset}")
+                    offset += length
+                    progress.add(length)
+            finally:
+                if random_fd is not None:
+                    os.close(random_fd)
+                buffer.close()
+
+        run_regions(parts, write_region, token, writers, sector_size=write_granularity(path))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    log(f"Remplissage de {path} terminé : {progress.done // (1024 * 1024)} Mo écrits")
+    return progress.done
@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import logging
+from block_devices import SYSFS_ROOT
+from erase_patterns import PROFILES
+from crypto_profiles import CRYPTO_PROFILES
+from drive_health import HEALTH_POLICIES
+from media_type import detect_media, MEDIA_TYPES, MEDIA_HDD, MEDIA_LABELS
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Table de classification modifiable par l'utilisateur (JSON, ou YAML avec PyYAML)
+DEFAULT_CLASSES_PATH = "/etc/disk_eraser/classes.json"
+
+# Réglages qu'un profil de classe peut fixer ; les autres (système de fichiers, cible, débit)
+# restent ceux de la session ou de l'entrée du manifeste
+CLASS_SETTINGS = ("method", "passes", "fill", "verify", "zero_skip", "profile", "crypto_profile",
+                  "health_policy", "unlock_hpa")
+
+# Critères d'une règle ; une règle s'applique si tous ses critères correspondent au disque
+RULE_KEYS = ("media", "transport", "rotational", "removable", "vendor", "model", "min_size_gb", "max_size_gb")
+
+TRANSPORTS = ("nvme", "sata", "sas", "scsi", "usb", "mmc", "virtio")
+
+# Table utilisée sans fichier : la première règle qui correspond choisit le profil
+DEFAULT_CLASSES = {
+    "profiles": {
+        "hdd": {"method": "overwrite", "passes": 3},
+        "ssd": {"method": "crypto", "fill": "zero"},
+        "nvme": {"method": "crypto", "fill": "zero"},
+        # Une seule passe vérifiée : les passes supplémentaires usent la mémoire flash sans rien effacer de plus
+        "usb-flash": {"method": "overwrite", "passes": 1, "verify": True},
+    },
+    "rules": [
+        {"profile": "nvme", "media": "nvme"},
+        {"profile": "usb-flash", "media": "flash"},
+        {"profile": "ssd", "media": "ssd"},
+        {"profile": "hdd", "media": "hdd"},
+    ],
+    "default": "hdd",
+}
+
+class ClassificationError(ValueError):
+    """Levée lorsque la table de classification est illisible ou invalide."""
+
+def _validate_profile(name: str, settings) -> dict:
+    context = f"profil de classe '{name}'"
+    if not isinstance(settings, dict):
+        raise ClassificationError(f"{context} : doit être un objet")
+    unknown = [key for key in settings if key not in CLASS_SETTINGS]
+    if unknown:
+        raise ClassificationError(f"{context} : réglage(s) inconnu(s) {', '.join(unknown)} ({', '.join(CLASS_SETTINGS)})")
+    if settings.get("method", "overwrite") not in ("overwrite", "crypto"):
+        raise ClassificationError(f"{context} : méthode invalide '{settings['method']}' (overwrite ou crypto)")
+    if settings.get("fill", "random") not in ("random", "zero"):
+        raise ClassificationError(f"{context} : remplissage invalide '{settings['fill']}' (random ou zero)")
+    for key in ("verify", "zero_skip", "unlock_hpa"):
+        if key in settings and not isinstance(settings[key], bool):
+            raise ClassificationError(f"{context} : '{key}' doit être un booléen")
+    min_passes = 0 if settings.get("zero_skip") else 1
+    passes = settings.get("passes", min_passes)
+    if not isinstance(passes, int) or isinstance(passes, bool) or passes < min_passes:
+        raise ClassificationError(f"{context} : le nombre de passes doit être un entier >= {min_passes}")
+    if settings.get("profile") is not None and settings["profile"] not in PROFILES:
+        raise ClassificationError(f"{context} : profil inconnu '{settings['profile']}' ({', '.join(PROFILES)})")
+    if "crypto_profile" in settings and settings["crypto_profile"] not in CRYPTO_PROFILES:
+        raise ClassificationError(f"{context} : profil cryptographique inconnu '{settings['crypto_profile']}'")
+    if "health_policy" in settings and settings["health_policy"] not in HEALTH_POLICIES:
+        raise ClassificationError(f"{context} : politique de santé inconnue '{settings['health_policy']}'")
+    return settings
+
+def _validate_rule(index: int, rule, profiles: dict) -> dict:
+    context = f"rules[{index}]"
+    if not isinstance(rule, dict):
+        raise ClassificationError(f"{context} : doit être un objet")
+    if rule.get("profile") not in profiles:
+        raise ClassificationError(f"{context} : profil de classe inconnu '{rule.get('profile')}' ({', '.join(profiles)})")
+    unknown = [key for key in rule if key != "profile" and key not in RULE_KEYS]
+    if unknown:
+        raise ClassificationError(f"{context} : critère(s) inconnu(s) {', '.join(unknown)} ({', '.join(RULE_KEYS)})")
+    for key, allowed in (("media", MEDIA_TYPES), ("transport", TRANSPORTS)):
+        if key in rule:
+            values = rule[key] if isinstance(rule[key], list) else [rule[key]]
+            if not values or any(value not in allowed for value in values):
+                raise ClassificationError(f"{context} : '{key}' invalide {rule[key]} ({', '.join(allowed)})")
+    for key in ("rotational", "removable"):
+        if key in rule and not isinstance(rule[key], bool):
+            raise ClassificationError(f"{context} : '{key}' doit être un booléen")
+    for key in ("vendor", "model"):
+        if key in rule:
+            try:
+                re.compile(str(rule[key]))
+            except re.error as e:
+                raise ClassificationError(f"{context} : expression régulière '{key}' invalide : {str(e)}")
+    for key in ("min_size_gb", "max_size_gb"):
+        if key in rule and (not isinstance(rule[key], (int, float)) or isinstance(rule[key], bool) or rule[key] < 0):
+            raise ClassificationError(f"{context} : '{key}' doit être une capacité positive en Go")
+    return rule
+
+def validate_classes(classes) -> dict:
+    """
+    Vérifie une table de classification : {"profiles": {nom: réglages}, "rules": [...], "default": nom}.
+    """
+    if not isinstance(classes, dict):
+        raise ClassificationError("La table de classification doit être un objet")
+    profiles = classes.get("profiles")
+    if not isinstance(profiles, dict) or not profiles:
+        raise ClassificationError("La table de classification doit contenir un objet 'profiles' non vide")
+    for name, settings in profiles.items():
+        _validate_profile(name, settings)
+    rules = classes.get("rules") or []
+    if not isinstance(rules, list):
+        raise ClassificationError("'rules' doit être une liste")
+    for index, rule in enumerate(rules):
+        _validate_rule(index, rule, profiles)
+    default = classes.get("default")
+    if default is not None and default not in profiles:
+        raise ClassificationError(f"Profil de classe par défaut inconnu '{default}' ({', '.join(profiles)})")
+    return {"profiles": profiles, "rules": rules, "default": default}
+
+def load_classes(path: str | None = None) -> dict:
+    """
+    Charge la table de classification (JSON, ou YAML avec le module PyYAML).
+    Sans fichier à l'emplacement par défaut, la table intégrée DEFAULT_CLASSES est utilisée.
+
+    Raises:
+        ClassificationError: Si le fichier est illisible ou invalide
+    """
+    if path is None:
+        path = DEFAULT_CLASSES_PATH
+        if not os.path.exists(path):
+            return validate_classes(DEFAULT_CLASSES)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except OSError as e:
+        raise ClassificationError(f"Impossible de lire la table de classification {path} : {str(e)}")
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ClassificationError("Le module PyYAML est requis pour les tables YAML (paquet python3-yaml)")
+        try:
+            classes = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise ClassificationError(f"Table de classification YAML invalide : {str(e)}")
+    else:
+        try:
+            classes = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ClassificationError(f"Table de classification JSON invalide : {str(e)}")
+    return validate_classes(classes)
+
+def disk_facts(disk: str, sysfs_root: str = SYSFS_ROOT) -> dict:
+    """
+    Caractéristiques d'un disque lues dans sysfs, utilisées par les règles de classification.
+    media, confidence et rotational viennent de media_type.detect_media : rotational est vrai
+    pour un support mécanique reconnu, et non la valeur brute de queue/rotational.
+
+    Returns:
+        dict: {"device", "media", "confidence", "transport", "rotational", "removable", "vendor", "model", "size", "reasons"}
+    """
+    disk = disk.replace("/dev/", "")
+    media = detect_media(disk, sysfs_root)
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", disk, "size"), "r") as f:
+            size = int(f.read().strip()) * 512
+    except (OSError, ValueError):
+        size = 0
+    return {
+        "device": disk,
+        "media": media["media"],
+        "confidence": media["confidence"],
+        "transport": media["transport"],
+        "rotational": media["media"] == MEDIA_HDD,
+        "removable": media["removable"],
+        "vendor": media["vendor"],
+        "model": media["model"],
+        "size": size,
+        "reasons": media["reasons"],
+    }
+
+def rule_matches(rule: dict, facts: dict) -> bool:
+    """Une règle correspond si chacun de ses critères correspond au disque (vendor et model : regex, sans casse)."""
+    for key in ("media", "transport"):
+        if key in rule:
+            values = rule[key] if isinstance(rule[key], list) else [rule[key]]
+            if facts[key] not in values:
+                return False
+    for key in ("rotational", "removable"):
+        if key in rule and facts[key] != rule[key]:
+            return False
+    for key in ("vendor", "model"):
+        if key in rule and not re.search(str(rule[key]), facts[key], re.IGNORECASE):
+            return False
+    size_gb = facts["size"] / 1000 ** 3
+    if "min_size_gb" in rule and size_gb < rule["min_size_gb"]:
+        return False
+    if "max_size_gb" in rule and size_gb > rule["max_size_gb"]:
+        return False
+    return True
+
+def _describe_rule(rule: dict) -> str:
+    criteria = []
+    for key in RULE_KEYS:
+        if key in rule:
+            value = rule[key]
+            if isinstance(value, bool):
+                value = "oui" if value else "non"
+            elif isinstance(value, list):
+                value = "|".join(value)
+            criteria.append(f"{key}={value}")
+    return ", ".join(criteria) or "sans critère"
+
+def classify(facts: dict, classes: dict) -> dict | None:
+    """
+    Associe un disque à un profil de classe : la première règle qui correspond l'emporte,
+    sinon le profil par défaut de la table.
+
+    Returns:
+        dict: {"class", "settings", "reason"}, ou None si aucune règle ne correspond
+              et que la table n'a pas de profil par défaut
+    """
+    for index, rule in enumerate(classes["rules"]):
+        if rule_matches(rule, facts):
+            return {"class": rule["profile"], "settings": dict(classes["profiles"][rule["profile"]]),
+                    "reason": f"règle {index + 1} : {_describe_rule(rule)}"}
+    if classes["default"] is None:
+        return None
+    return {"class": classes["default"], "settings": dict(classes["profiles"][classes["default"]]),
+            "reason": "profil par défaut"}
+
+def classify_disk(disk: str, classes: dict, sysfs_root: str = SYSFS_ROOT) -> dict | None:
+    """classify appliqué aux caractéristiques sysfs du disque ; le résultat porte aussi "facts"."""
+    facts = disk_facts(disk, sysfs_root)
+    assignment = classify(facts, classes)
+    if assignment is not None:
+        assignment["facts"] = facts
+    return assignment
+
+def describe_facts(facts: dict) -> str:
+    media = f"{MEDIA_LABELS[facts['media']]} (confiance {int(facts['confidence'] * 100)} %)"
+    removable = ", amovible" if facts["removable"] else ""
+    model = " ".join(part for part in (facts["vendor"], facts["model"]) if part) or "modèle inconnu"
+    return f"{facts['transport']}, {media}{removable}, {facts['size'] // 1000 ** 3} Go, {model}"
+
+def describe_class_settings(settings: dict) -> str:
+    """Méthode d'un profil de classe, telle qu'affichée avant la confirmation."""
+    if settings.get("profile"):
+        description = f"profil {PROFILES[settings['profile']]['name']}"
+    elif settings.get("method") == "crypto":
+        fill = "zéros" if settings.get("fill") == "zero" else "données aléatoires"
+        description = f"effacement cryptographique (remplissage avec {fill})"
+    elif settings.get("zero_skip") and not settings.get("passes"):
+        description = "passe à zéro « lire-comparer-ignorer »"
+    else:
+        description = f"réécriture standard {settings.get('passes', 1)}-passes"
+    if settings.get("verify"):
+        description += ", vérifiée"
+    return description
+
+def describe_assignment(assignment: dict) -> str:
+    return (f"classe {assignment['class']} ({assignment['reason']}) : "
+            f"{describe_class_settings(assignment['settings'])}")
@@ -5,6 +5,16 @@ import logging
 import sys
 import re
 from pathlib import Path
+from utils import run_command
+from erase_jobs import CancellationToken, EraseCancelled, run_process
+from zero_fill import zero_fill
+from device_fill import fill_device
+from region_erase import region_count
+from media_type import detect_media, is_flash_media
+from crypto_profiles import (DEFAULT_CRYPTO_PROFILE, get_crypto_profile, format_options, open_options, plain_options,
+                             key_size, describe_crypto_profile)
+from erase_patterns import run_profile_passes, run_passes, get_profile, FIXED, RANDOM
+from pattern_stream import PatternStream, new_seed, describe_stream, stream_sector_size, pattern_streams_available
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -48,24 +58,37 @@ def get_disk_serial(device: str) -> str:
     return f"INCONNU_{device}"
 
 def is_ssd(device: str) -> bool:
-    try:
-        output = subprocess.run(
-            ["cat", f"/sys/block/{device}/queue/rotational"],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        return output.stdout.decode().strip() == "0"
-    except (FileNotFoundError, subprocess.SubprocessError) as e:
-        logging.warning(f"Vérification SSD échouée pour {device} : {e}")
-        # Ne pas quitter, juste retourner False par défaut
-        return False
-    except KeyboardInterrupt:
-        logging.error("Vérification SSD interrompue par l'utilisateur (Ctrl+C)")
-        print("\nVérification SSD interrompue par l'utilisateur (Ctrl+C)")
-        sys.exit(130)
+    """
+    Vrai si le disque n'a pas de plateaux (SSD, NVMe, clé ou carte flash), d'après le
+    classement de media_type.detect_media lu dans sysfs : les clés USB que leur pont déclare
+    rotatives sont reconnues. Un support de type inconnu est traité comme mécanique.
+    """
+    return is_flash_media(detect_media(device))
+
+def erase_disk_hdd(device: str, passes: int, log_func=None, zero_pass: bool = False, token: CancellationToken | None = None,
+                   skip_zero: bool = False, ranges: list[tuple[int, int]] | None = None) -> str:
+    """
+    Effacer un disque par passes multiples d'écrasement.
 
-def erase_disk_hdd(device: str, passes: int, log_func=None) -> str:
+    Les erreurs sont levées (jamais de sys.exit) afin qu'un disque défaillant ou annulé
+    n'interrompe pas les autres disques du lot.
+    Avec skip_zero, la passe à zéro finale lit chaque bloc et ne réécrit que ceux qui ne sont
+    pas déjà à zéro (voir zero_fill) ; passes peut alors valoir 0 pour une simple passe à zéro.
+    Les passes aléatoires sont écrites par le moteur natif de erase_patterns, en flux de motifs
+    rejouables (voir pattern_stream) : la graine journalisée suffit pour régénérer et vérifier
+    n'importe quel bloc. Sans cryptsetup ni device-mapper, shred les écrit en un flux
+    séquentiel non rejouable, sauf lorsque le moteur natif est requis (il écrit alors des
+    données os.urandom, non rejouables elles aussi) : régions parallèles sur
+    un disque non rotatif (voir region_erase), ranges (effacement sélectif d'une partition ou
+    de l'espace non alloué : seules ces plages d'octets sont écrites et la table de partitions
+    est conservée) ou politique de santé map (token.health, voir drive_health : une erreur
+    d'écriture n'arrête plus le disque, les secteurs défaillants sont isolés, consignés et sautés).
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        CalledProcessError, FileNotFoundError: Si une commande échoue ou est introuvable
+        OSError: En cas d'erreur d'écriture du moteur natif
+    """
     try:
         # Conversion de type pour s'assurer des types corrects
         device = str(device)
@@ -78,42 +101,42 @@ def erase_disk_hdd(device: str, passes: int, log_func=None) -> str:
             logging.warning(f"Attention : {device} semble être un SSD. Plusieurs passes peuvent ne pas être efficaces.")
             # Continuer avec l'effacement au lieu de retourner
 
-        logging.info(f"Effacement de {device} en utilisant shred avec {passes} passes...")
-        # Enregistrer aussi dans l'interface graphique si log_func est fourni
-        if log_func:
-            log_func(f"Effacement de {device} en utilisant shred avec {passes} passes...")
+        zero_msg = " suivies d'une passe à zéro" if zero_pass else ""
+        tolerant = bool(getattr(getattr(token, "health", None), "bisect", False))
+        if passes > 0 and (pattern_streams_available() or ranges is not None or tolerant or region_count(device) > 1):
+            overwrite = [(RANDOM,)] * passes + ([(FIXED, b"\x00")] if zero_pass and not skip_zero else [])
+            run_passes(device, overwrite, f"{passes} passes aléatoires{zero_msg}", log_func=log_func, token=token,
+                       ranges=ranges)
+        elif passes > 0:
+            logging.warning(f"cryptsetup ou device-mapper indisponible : passes aléatoires de {device} non rejouables (shred)")
+            logging.info(f"Effacement de {device} en utilisant shred avec {passes} passes{zero_msg}...")
+            # Enregistrer aussi dans l'interface graphique si log_func est fourni
+            if log_func:
+                log_func(f"Effacement de {device} en utilisant shred avec {passes} passes{zero_msg}...")
+            
+            # Exécuter shred en relayant sa sortie en temps réel
+            shred_command = ["shred", "-n", f"{passes}", "-v"]
+            if zero_pass and not skip_zero:
+                shred_command.append("-z")
+            run_process(shred_command + [f"/dev/{device}"], token, log_func)
         
-        # Créer un sous-processus avec stdout redirigé pour capturer la sortie de shred
-        shred_process = subprocess.Popen(
-            ["shred", "-n", f"{passes}", "-v", f"/dev/{device}"], 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            universal_newlines=True
-        )
+        if zero_pass and (skip_zero or (ranges is not None and passes == 0)):
+            zero_fill(device, skip_zero=skip_zero, log_func=log_func, token=token, ranges=ranges)
 
-        # Lire la sortie en temps réel
-        while True:
-            try:
-                output = shred_process.stdout.readline()
-                if output == '' and shred_process.poll() is not None:
-                    break
-                if output:
-                    # Si une fonction de log est fournie (comme dans l'interface graphique), l'utiliser
-                    # Sinon, afficher sur stdout
-                    if log_func:
-                        log_func(output.strip())
-                    else:
-                        print(output.strip())
-            except KeyboardInterrupt:
-                # Terminer le processus shred si l'utilisateur interrompt
-                shred_process.terminate()
-                logging.error("Effacement du disque interrompu par l'utilisateur (Ctrl+C)")
-                print("\nEffacement du disque interrompu par l'utilisateur (Ctrl+C)")
-                sys.exit(130)
+        if tolerant and ranges is None:
+            # La table de partitions a déjà été écrasée par le moteur natif, secteurs défaillants exceptés
+            success_message = f"Disque {device} effacé (secteurs défaillants exceptés)."
+            logging.info(success_message)
+            if log_func:
+                log_func(success_message)
+            return disk_serial
 
-        # Vérifier le code de retour
-        if shred_process.returncode != 0:
-            raise subprocess.CalledProcessError(shred_process.returncode, "shred")
+        if ranges is not None:
+            success_message = f"Plages sélectionnées de {device} effacées avec succès."
+            logging.info(success_message)
+            if log_func:
+                log_func(success_message)
+            return disk_serial
 
         # Enregistrer l'effacement de la table de partitions dans le fichier de log et l'interface graphique
         wipe_message = f"Effacement de la table de partitions de {device} avec dd..."
@@ -122,7 +145,7 @@ def erase_disk_hdd(device: str, passes: int, log_func=None) -> str:
             log_func(wipe_message)
             
         # Exécuter la commande dd
-        subprocess.run(["dd", "if=/dev/zero", f"of=/dev/{device}", "bs=1M", "count=10"], check=True)
+        run_command(["dd", "if=/dev/zero", f"of=/dev/{device}", "bs=1M", "count=10"], token)
 
         # Enregistrer le message de succès dans le fichier de log et l'interface graphique
         success_message = f"Disque {device} effacé avec succès."
@@ -131,27 +154,89 @@ def erase_disk_hdd(device: str, passes: int, log_func=None) -> str:
             log_func(success_message)
             
         return disk_serial
+    except EraseCancelled:
+        error_message = f"Effacement de {device} annulé."
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        raise
     except FileNotFoundError:
         error_message = "Erreur : Commande requise introuvable."
         logging.error(error_message)
         if log_func:
             log_func(error_message)
-        sys.exit(2)
+        raise
     except subprocess.CalledProcessError as e:
         error_message = f"Erreur : Échec de l'effacement de {device} : {e}"
         logging.error(error_message)
         if log_func:
             log_func(error_message)
-        sys.exit(1)
+        raise
+    except OSError as e:
+        error_message = f"Erreur : Échec de l'effacement de {device} : {e}"
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        raise
     except KeyboardInterrupt:
         error_message = "Effacement du disque interrompu par l'utilisateur (Ctrl+C)"
         logging.error(error_message)
         if log_func:
             log_func(error_message)
         print(f"\n{error_message}")
-        sys.exit(130)
+        raise
+
+def erase_disk_profile(device: str, profile: str, log_func=None, token: CancellationToken | None = None,
+                       verify: bool | None = None, ranges: list[tuple[int, int]] | None = None) -> str:
+    """
+    Effacer un disque selon un profil normalisé (DoD 5220.22-M, Gutmann, NIST 800-88 Clear)
+    à l'aide de l'ordonnanceur de passes de erase_patterns.
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        VerificationError: Si la passe de vérification échoue
+        OSError: En cas d'erreur d'écriture ou de lecture
+    """
+    try:
+        device = str(device)
+        disk_serial = get_disk_serial(device)
+        run_profile_passes(device, profile, log_func=log_func, token=token, verify=verify, ranges=ranges)
+        success_message = f"Disque {device} effacé avec succès selon le profil {get_profile(profile)['name']}."
+        logging.info(success_message)
+        if log_func:
+            log_func(success_message)
+        return disk_serial
+    except EraseCancelled:
+        error_message = f"Effacement de {device} annulé."
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        raise
+    except OSError as e:
+        error_message = f"Erreur : Échec de l'effacement de {device} : {e}"
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        raise
+    except KeyboardInterrupt:
+        error_message = "Effacement du disque interrompu par l'utilisateur (Ctrl+C)"
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        print(f"\n{error_message}")
+        raise
 
-def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None) -> str:
+def _mapper_offset(mapper_name: str, token: CancellationToken | None = None) -> int:
+    """Décalage en octets des données d'un mapper dm-crypt sur son périphérique (dmsetup table)."""
+    # Cible crypt : début longueur crypt chiffrement clé iv_offset périphérique décalage [options]
+    fields = run_command(["dmsetup", "table", mapper_name], token).split()
+    if len(fields) < 8 or fields[2] != "crypt":
+        return 0
+    return int(fields[7]) * 512
+
+def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None, token: CancellationToken | None = None,
+                      native_fill: bool = True, fill_writers: int | None = None,
+                      crypto_profile: str = DEFAULT_CRYPTO_PROFILE) -> str:
     """
     Effacer de manière sécurisée un disque en utilisant l'effacement cryptographique :
     chiffrer tout le disque avec une clé aléatoire, puis supprimer la clé rendant
@@ -161,19 +246,36 @@ def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None
         device (str): Nom du périphérique (sans préfixe /dev/, ex: 'sda')
         filling_method (str): Méthode de remplissage - "random" ou "zero"
         log_func (callable, optional): Fonction pour enregistrer la sortie en temps réel (ex: pour interface graphique)
+        token (CancellationToken, optional): Jeton permettant d'arrêter ce disque individuellement
+        native_fill (bool): Remplir le volume chiffré dans le processus (pwritev, tampons alignés réutilisés)
+                            au lieu de dd, qui recopie chaque bloc dans son propre tampon
+        fill_writers (int): Nombre de threads écrivains du remplissage natif (défaut : déduit de la file du disque)
+        crypto_profile (str): Profil dm-crypt (clé de crypto_profiles.CRYPTO_PROFILES) : PBKDF,
+                              chiffrement, taille de secteur et files de travail
         
     Returns:
         str: Numéro de série du disque ou identifiant
         
     Raises:
-        Diverses exceptions si le processus d'effacement échoue
+        EraseCancelled: Si le jeton d'annulation a été déclenché (le mapper temporaire est refermé)
+        CalledProcessError, FileNotFoundError: Si une commande échoue ou est introuvable
+        OSError: Si le remplissage natif échoue
     """
-    # Créer un fichier clé temporaire unique pour ce périphérique pour éviter les conflits
-    keyfile_fd, keyfile_path = tempfile.mkstemp(prefix=f"keyfile_{device}_", suffix=".key")
+    # Profil éphémère : dm-crypt plain, sans en-tête LUKS ni fichier clé
+    plain = bool(get_crypto_profile(crypto_profile).get("plain"))
+    keyfile_path = None
+    if not plain:
+        # Créer un fichier clé temporaire unique pour ce périphérique pour éviter les conflits
+        keyfile_fd, keyfile_path = tempfile.mkstemp(prefix=f"keyfile_{device}_", suffix=".key")
+    
+    # Créer un nom de mapper unique pour ce périphérique pour éviter les conflits
+    mapper_name = f"temp_{device}_{os.getpid()}"
+    pattern = None
     
     try:
         # Fermer le descripteur de fichier puisque nous utiliserons le chemin avec dd
-        os.close(keyfile_fd)
+        if not plain:
+            os.close(keyfile_fd)
         
         # Obtenir l'identifiant stable du disque avant l'effacement
         disk_serial = get_disk_serial(device)
@@ -184,121 +286,83 @@ def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None
         if log_func:
             log_func(start_message)
         
-        # Étape 1 : Créer une clé de chiffrement aléatoire et la stocker temporairement
-        key_creation_msg = "Génération d'une clé de chiffrement aléatoire..."
-        logging.info(key_creation_msg)
-        if log_func:
-            log_func(key_creation_msg)
+        if plain:
+            # Étapes 1 et 2 : clé aléatoire en mémoire uniquement, transmise à cryptsetup par un tube
+            plain_msg = f"Ouverture de {device} en dm-crypt plain avec une clé éphémère en mémoire (profil {describe_crypto_profile(crypto_profile)})..."
+            logging.info(plain_msg)
+            if log_func:
+                log_func(plain_msg)
+            key = bytearray(key_size() // 8)
+            with open("/dev/urandom", "rb", buffering=0) as source:
+                source.readinto(key)
+            try:
+                run_command(["cryptsetup", "open", *plain_options(crypto_profile, device), f"/dev/{device}", mapper_name],
+                            token, input_data=key)
+            finally:
+                key[:] = bytes(len(key))
+        else:
+            # Étape 1 : Créer une clé de chiffrement aléatoire et la stocker temporairement
+            key_creation_msg = "Génération d'une clé de chiffrement aléatoire..."
+            logging.info(key_creation_msg)
+            if log_func:
+                log_func(key_creation_msg)
             
-        # Créer un fichier clé temporaire avec des données aléatoires en utilisant un chemin unique
-        subprocess.run(
-            ["dd", "if=/dev/urandom", f"of={keyfile_path}", "bs=512", "count=8"],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+            # Créer un fichier clé temporaire avec des données aléatoires en utilisant un chemin unique
+            run_command(["dd", "if=/dev/urandom", f"of={keyfile_path}", "bs=512", "count=8"], token)
         
-        # Étape 2 : Utiliser cryptsetup pour chiffrer tout le disque avec LUKS
-        encrypt_msg = f"Chiffrement de {device} avec LUKS en utilisant une clé aléatoire..."
-        logging.info(encrypt_msg)
-        if log_func:
-            log_func(encrypt_msg)
+            # Étape 2 : Utiliser cryptsetup pour chiffrer tout le disque avec LUKS
+            encrypt_msg = f"Chiffrement de {device} avec LUKS en utilisant une clé aléatoire (profil {describe_crypto_profile(crypto_profile)})..."
+            logging.info(encrypt_msg)
+            if log_func:
+                log_func(encrypt_msg)
             
-        # Créer un conteneur LUKS (cela détruira toutes les données sur le périphérique)
-        cryptsetup_process = subprocess.Popen(
-            ["cryptsetup", "-q", "--batch-mode", "luksFormat", 
-             f"/dev/{device}", keyfile_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True
-        )
-        
-        # Lire la sortie en temps réel
-        while True:
-            try:
-                output = cryptsetup_process.stdout.readline()
-                if output == '' and cryptsetup_process.poll() is not None:
-                    break
-                if output:
-                    if log_func:
-                        log_func(output.strip())
-                    else:
-                        print(output.strip())
-            except KeyboardInterrupt:
-                cryptsetup_process.terminate()
-                logging.error("Chiffrement interrompu par l'utilisateur (Ctrl+C)")
-                print("\nChiffrement interrompu par l'utilisateur (Ctrl+C)")
-                sys.exit(130)
+            # Créer un conteneur LUKS (cela détruira toutes les données sur le périphérique)
+            run_process(["cryptsetup", "-q", "--batch-mode", "luksFormat", *format_options(crypto_profile, device),
+                         f"/dev/{device}", keyfile_path], token, log_func)
         
-        # Vérifier le code de retour
-        if cryptsetup_process.returncode != 0:
-            raise subprocess.CalledProcessError(cryptsetup_process.returncode, "cryptsetup")
+            # Étape 3 : Remplir le volume chiffré avec des zéros ou des données aléatoires pour plus de sécurité
+            fill_msg = "Ouverture du périphérique chiffré pour le remplir avec des données..."
+            logging.info(fill_msg)
+            if log_func:
+                log_func(fill_msg)
         
-        # Étape 3 : Remplir le volume chiffré avec des zéros ou des données aléatoires pour plus de sécurité
-        fill_msg = "Ouverture du périphérique chiffré pour le remplir avec des données..."
-        logging.info(fill_msg)
-        if log_func:
-            log_func(fill_msg)
-            
-        # Créer un nom de mapper unique pour ce périphérique pour éviter les conflits
-        mapper_name = f"temp_{device}_{os.getpid()}"
+            # Ouvrir le périphérique chiffré
+            run_command(["cryptsetup", "open", *open_options(crypto_profile), "--key-file", keyfile_path, f"/dev/{device}", mapper_name], token)
         
-        # Ouvrir le périphérique chiffré
-        subprocess.run(
-            ["cryptsetup", "open", "--key-file", keyfile_path, 
-             f"/dev/{device}", mapper_name],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # CORRIGÉ : Gérer correctement la sélection de la méthode de remplissage
+        # Remplissage aléatoire : des zéros écrits à travers un flux de motif rejouable ouvert sur le volume chiffré
+        fill_path = f"/dev/mapper/{mapper_name}"
         if filling_method == "random":
-            fill_data_msg = "Remplissage du périphérique chiffré avec des données aléatoires (cela peut prendre du temps)..."
-            logging.info(fill_data_msg)
-            if log_func:
-                log_func(fill_data_msg)
-                
-            fill_process = subprocess.Popen(
-                ["dd", "if=/dev/urandom", f"of=/dev/mapper/{mapper_name}", 
-                "bs=4M", "status=progress"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
-            )
+            seed = new_seed()
+            pattern = PatternStream(fill_path, seed, 1, token).open()
+            fill_path = pattern.path
+            fill_data_msg = (f"Remplissage du périphérique chiffré avec des données aléatoires rejouables, "
+                             f"{describe_stream(seed, stream_sector_size(f'/dev/mapper/{mapper_name}'))} (cela peut prendre du temps)...")
         else:  # méthode de remplissage "zero"
             fill_data_msg = "Remplissage du périphérique chiffré avec des zéros (cela peut prendre du temps)..."
-            logging.info(fill_data_msg)
-            if log_func:
-                log_func(fill_data_msg)
-                
-            fill_process = subprocess.Popen(
-                ["dd", "if=/dev/zero", f"of=/dev/mapper/{mapper_name}", 
-                "bs=4M", "status=progress"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
-            )
+        logging.info(fill_data_msg)
+        if log_func:
+            log_func(fill_data_msg)
             
-        # Lire la sortie en temps réel pour afficher la progression
-        while True:
+        if native_fill:
+            # Carte d'erreurs : les plages du mapper sont ramenées aux octets du disque
+            health = getattr(token, "health", None)
+            offset = _mapper_offset(mapper_name, token) if health is not None else 0
+            if health is not None:
+                health.map_offset += offset
             try:
-                output = fill_process.stdout.readline()
-                if output == '' and fill_process.poll() is not None:
-                    break
-                if output:
-                    if log_func:
-                        log_func(output.strip())
-                    else:
-                        print(output.strip())
-            except KeyboardInterrupt:
-                fill_process.terminate()
-                logging.error("Opération de remplissage interrompue par l'utilisateur (Ctrl+C)")
-                print("\nOpération de remplissage interrompue par l'utilisateur (Ctrl+C)")
-                # S'assurer de fermer le périphérique mapper avant de quitter
-                subprocess.run(["cryptsetup", "close", mapper_name], 
-                               check=False)
-                sys.exit(130)
+                fill_device(fill_path, "zero", writers=fill_writers, log_func=log_func, token=token, device=device)
+            finally:
+                if health is not None:
+                    health.map_offset -= offset
+        else:
+            # dd se termine en erreur « plus d'espace disponible » une fois le périphérique rempli
+            try:
+                run_process(["dd", "if=/dev/zero", f"of={fill_path}", "bs=4M", "status=progress"], token, log_func)
+            except subprocess.CalledProcessError:
+                pass
+        if pattern is not None:
+            pattern.close()
+            pattern = None
         
         # Étape 4 : Fermer le périphérique chiffré
         close_msg = "Fermeture du périphérique chiffré..."
@@ -306,38 +370,27 @@ def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None
         if log_func:
             log_func(close_msg)
             
-        subprocess.run(
-            ["cryptsetup", "close", mapper_name],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        run_command(["cryptsetup", "close", mapper_name], token)
         
-        # Étape 5 : Supprimer de manière sécurisée le fichier clé
-        key_delete_msg = "Effacement sécurisé de la clé de chiffrement..."
-        logging.info(key_delete_msg)
-        if log_func:
-            log_func(key_delete_msg)
-            
-        subprocess.run(
-            ["shred", "-u", "-z", "-n", "3", keyfile_path],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        # Étape 5 : Supprimer de manière sécurisée le fichier clé (la clé éphémère n'a jamais quitté la mémoire)
+        if keyfile_path:
+            key_delete_msg = "Effacement sécurisé de la clé de chiffrement..."
+            logging.info(key_delete_msg)
+            if log_func:
+                log_func(key_delete_msg)
+                
+            run_command(["shred", "-u", "-z", "-n", "3", keyfile_path], token)
         
         # Étape 6 : Optionnellement, écraser l'en-tête LUKS pour empêcher toute chance de récupération
-        header_msg = "Écrasement de l'en-tête LUKS pour empêcher toute possibilité de récupération de clé..."
+        if plain:
+            header_msg = "Écrasement du début du disque..."
+        else:
+            header_msg = "Écrasement de l'en-tête LUKS pour empêcher toute possibilité de récupération de clé..."
         logging.info(header_msg)
         if log_func:
             log_func(header_msg)
             
-        subprocess.run(
-            ["dd", "if=/dev/urandom", f"of=/dev/{device}", "bs=1M", "count=10"],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        run_command(["dd", "if=/dev/urandom", f"of=/dev/{device}", "bs=1M", "count=10"], token)
         
         # Enregistrer le message de succès avec la méthode de remplissage correcte
         fill_method_str = "données aléatoires" if filling_method == "random" else "données zéro"
@@ -348,31 +401,43 @@ def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None
             
         return disk_serial
         
+    except EraseCancelled:
+        error_message = f"Effacement cryptographique de {device} annulé."
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        raise
     except FileNotFoundError as e:
         error_message = f"Erreur : Commande requise introuvable : {e}"
         logging.error(error_message)
         if log_func:
             log_func(error_message)
-        sys.exit(2)
+        raise
     except subprocess.CalledProcessError as e:
         error_message = f"Erreur : Échec de l'effacement cryptographique de {device} : {e}"
         logging.error(error_message)
         if log_func:
             log_func(error_message)
-        sys.exit(1)
+        raise
+    except OSError as e:
+        error_message = f"Erreur : Échec du remplissage du volume chiffré de {device} : {e}"
+        logging.error(error_message)
+        if log_func:
+            log_func(error_message)
+        raise
     except KeyboardInterrupt:
         error_message = "Effacement cryptographique interrompu par l'utilisateur (Ctrl+C)"
         logging.error(error_message)
         if log_func:
             log_func(error_message)
         print(f"\n{error_message}")
-        sys.exit(130)
+        raise
     finally:
-        # Nettoyage en cas d'erreurs
+        # Nettoyage en cas d'erreurs ou d'annulation
         try:
-            # Créer le nom de mapper pour le nettoyage (le même que ci-dessus)
-            mapper_name = f"temp_{device}_{os.getpid()}"
-            
+            # Le flux de motif repose sur le volume chiffré : il est refermé le premier
+            if pattern is not None:
+                pattern.close()
             # Vérifier si le périphérique mapper existe et le fermer s'il existe
             result = subprocess.run(
                 ["dmsetup", "info", mapper_name],
@@ -383,7 +448,7 @@ def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None
                 subprocess.run(["cryptsetup", "close", mapper_name], check=False)
                 
             # Supprimer le fichier clé s'il existe encore
-            if Path(keyfile_path).exists():
+            if keyfile_path and Path(keyfile_path).exists():
                 subprocess.run(["shred", "-u", "-z", "-n", "3", keyfile_path], check=False)
         except subprocess.SubprocessError as e:
             logging.error(f"Erreur de sous-processus lors du nettoyage : {e}")
@@ -392,4 +457,4 @@ def erase_disk_crypto(device: str, filling_method: str = "random", log_func=None
         except PermissionError as e:
             logging.error(f"Erreur de permission lors du nettoyage : {e}")
         except OSError as e:
-            logging.error(f"Erreur OS lors du nettoyage : {e}")
\ No newline at end of file
+            logging.error(f"Erreur OS lors du nettoyage : {e}")
@@ -1,38 +1,46 @@
 import logging
 from utils import run_command
 from subprocess import CalledProcessError
-import sys
+from erase_jobs import CancellationToken
 import time
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def format_disk(disk: str, fs_choice: str) -> None:
+def format_disk(disk: str, fs_choice: str, token: CancellationToken | None = None) -> None:
     # S'assurer qu'on travaille avec le nom du périphérique sans /dev/
     disk_name = disk.replace('/dev/', '')
-    partition = f"/dev/{disk_name}1"
+    # Les disques dont le nom finit par un chiffre (nvme0n1, mmcblk0, loop0) utilisent le suffixe 'p1'
+    partition = f"/dev/{disk_name}p1" if disk_name[-1:].isdigit() else f"/dev/{disk_name}1"
     
     # Attendre brièvement que la partition soit reconnue par le système
     logging.info(f"Attente de la reconnaissance de la partition {partition}...")
-    time.sleep(2)
+    if token is not None:
+        token.wait(2)
+    else:
+        time.sleep(2)
     
+    format_partition(partition, fs_choice, token)
+
+def format_partition(partition: str, fs_choice: str, token: CancellationToken | None = None) -> None:
+    """Formate une partition existante (ex: /dev/sda2), par exemple après son effacement sélectif."""
     try:
         if fs_choice == "ntfs":
             logging.info(f"Formatage de {partition} en NTFS...")
-            run_command(["mkfs.ntfs", "-f", partition])
+            run_command(["mkfs.ntfs", "-f", partition], token)
         elif fs_choice == "ext4":
             logging.info(f"Formatage de {partition} en EXT4...")
-            run_command(["mkfs.ext4", "-F", partition])
+            run_command(["mkfs.ext4", "-F", partition], token)
         elif fs_choice == "vfat":
             logging.info(f"Formatage de {partition} en VFAT...")
-            run_command(["mkfs.vfat", "-F", "32", partition])
+            run_command(["mkfs.vfat", "-F", "32", partition], token)
         else:
             logging.error(f"Système de fichiers non supporté : {fs_choice}")
-            sys.exit(1)
+            raise ValueError(f"Système de fichiers non supporté : {fs_choice}")
 
         logging.info(f"Partition {partition} formatée avec succès.")
     except FileNotFoundError:
         logging.error(f"Erreur : Utilitaire de système de fichiers introuvable pour {fs_choice}. Assurez-vous que les outils nécessaires sont installés.")
-        sys.exit(2)
+        raise
     except CalledProcessError as e:
         logging.error(f"Erreur : Échec du formatage de {partition} : {e}")
-        sys.exit(1)
\ No newline at end of file
+        raise
\ No newline at end of file
@@ -0,0 +1,157 @@
+import os
+import re
+import shlex
+import subprocess
+from fnmatch import fnmatch
+from block_devices import SYSFS_ROOT
+from disk_classes import disk_facts, rule_matches, TRANSPORTS
+from media_type import MEDIA_TYPES
+from utils import get_disk_list
+from log_handler import log_error
+
+BY_PATH_DIR = "/dev/disk/by-path"
+BY_ID_DIR = "/dev/disk/by-id"
+
+# Critères de sélection des disques par motif (CLI) : « clé=valeur » séparés par des espaces
+SELECTION_KEYS = ("transport", "media", "vendor", "model", "size", "path")
+
+# Tolérance d'une taille unique (« size=1T ») : la capacité réelle s'écarte de la capacité nominale
+SIZE_TOLERANCE = 0.1
+
+_SIZE_UNITS = {"M": 0.001, "G": 1.0, "T": 1000.0}
+_SIZE = re.compile(r"^(\d+(?:[.,]\d+)?)([MGT])?[OB]?$", re.IGNORECASE)
+
+class SelectionError(ValueError):
+    """Levée lorsqu'une expression de sélection de disques est invalide."""
+
+def _links_by_target(directory: str) -> dict[str, list[str]]:
+    links: dict[str, list[str]] = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return links
+    for name in names:
+        target = os.path.basename(os.path.realpath(os.path.join(directory, name)))
+        links.setdefault(target, []).append(name)
+    return links
+
+def get_disk_identifiers(device: str) -> dict[str, str]:
+    """
+    Retourne le WWN et les numéros de série d'un disque via udevadm.
+    """
+    identifiers = {}
+    try:
+        output = subprocess.run(
+            ["udevadm", "info", "--query=property", f"--name=/dev/{device}"],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        ).stdout.decode()
+        for key, name in (("ID_WWN", "wwn"), ("ID_SERIAL_SHORT", "serial"), ("ID_SERIAL", "serial_long")):
+            match = re.search(rf'^{key}=(\S+)$', output, re.MULTILINE)
+            if match:
+                identifiers[name] = match.group(1)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        log_error(f"Erreur lors de la requête udevadm sur {device} : {str(e)}")
+    return identifiers
+
+def build_inventory(active_disks: set[str] | None = None, graph=None, sysfs_root: str = SYSFS_ROOT) -> list[dict]:
+    """
+    Construit en un seul passage l'inventaire des disques : identifiants utilisables par le
+    manifeste, caractéristiques de classification (disk_classes.disk_facts) et, si fournis,
+    statut système actif et volumes empilés. Chaque disque n'est interrogé qu'une fois ;
+    l'inventaire sert ensuite à l'affichage, à la sélection et à la confirmation.
+
+    Returns:
+        list: [{"device", "id", "serial", "wwn", "by_path", "by_id", "size_label", "label",
+                "active", "stacked", + clés de disk_facts}]
+    """
+    by_path = _links_by_target(BY_PATH_DIR)
+    by_id = _links_by_target(BY_ID_DIR)
+    inventory = []
+    for disk in get_disk_list():
+        name = disk["device"].replace("/dev/", "")
+        identifiers = get_disk_identifiers(name)
+        entry = disk_facts(name, sysfs_root)
+        entry.update({
+            "device": name,
+            "serial": [identifiers[key] for key in ("serial", "serial_long") if key in identifiers],
+            "wwn": [identifiers["wwn"]] if "wwn" in identifiers else [],
+            "by_path": by_path.get(name, []),
+            "by_id": by_id.get(name, []),
+            "id": identifiers.get("wwn") or identifiers.get("serial") or f"INCONNU_{name}",
+            "size_label": disk["size"],
+            "label": disk.get("label", "Pas d'étiquette"),
+            "active": name in (active_disks or ()),
+            "stacked": sorted(graph.descendants(name)) if graph else [],
+        })
+        inventory.append(entry)
+    return inventory
+
+def _parse_size(value: str) -> float:
+    """Taille en Go (décimaux, comme les règles de classification) : « 500G », « 2T », « 1,5To »."""
+    match = _SIZE.match(value.strip())
+    if not match:
+        raise SelectionError(f"Taille invalide : {value} (ex. 500G, 2T)")
+    return float(match.group(1).replace(",", ".")) * _SIZE_UNITS[(match.group(2) or "G").upper()]
+
+def parse_selection(text: str) -> dict:
+    """
+    Analyse une expression de sélection, ex. « transport=usb,sata model='^ST4000' size=100G-2T
+    path=pci-0000:03:00.0-sas-* ». transport et media acceptent une liste, vendor et model une
+    regex (sans casse), size un intervalle (« 100G-2T », « -500G », « 1T- ») ou une taille
+    nominale à SIZE_TOLERANCE près, path un motif fnmatch sur les liens /dev/disk/by-path.
+
+    Returns:
+        dict: critères, les tailles converties en min_size_gb / max_size_gb
+    """
+    try:
+        tokens = shlex.split(text)
+    except ValueError as e:
+        raise SelectionError(f"Expression de sélection invalide : {str(e)}")
+    if not tokens:
+        raise SelectionError("Expression de sélection vide")
+    criteria = {}
+    for token in tokens:
+        key, separator, value = token.partition("=")
+        key = key.strip().lower()
+        if not separator or not value:
+            raise SelectionError(f"Critère invalide : {token} (attendu clé=valeur)")
+        if key not in SELECTION_KEYS:
+            raise SelectionError(f"Critère inconnu : {key} (possibles : {', '.join(SELECTION_KEYS)})")
+        if key in ("transport", "media"):
+            values = [item.strip().lower() for item in value.split(",") if item.strip()]
+            allowed = TRANSPORTS if key == "transport" else MEDIA_TYPES
+            unknown = [item for item in values if item not in allowed]
+            if unknown:
+                raise SelectionError(f"{key} inconnu : {', '.join(unknown)} (possibles : {', '.join(allowed)})")
+            criteria[key] = values
+        elif key in ("vendor", "model"):
+            try:
+                re.compile(value)
+            except re.error as e:
+                raise SelectionError(f"Expression régulière {key} invalide : {str(e)}")
+            criteria[key] = value
+        elif key == "size":
+            low, dash, high = value.partition("-")
+            if dash:
+                if low.strip():
+                    criteria["min_size_gb"] = _parse_size(low)
+                if high.strip():
+                    criteria["max_size_gb"] = _parse_size(high)
+            else:
+                nominal = _parse_size(value)
+                criteria["min_size_gb"] = nominal * (1 - SIZE_TOLERANCE)
+                criteria["max_size_gb"] = nominal * (1 + SIZE_TOLERANCE)
+        else:
+            criteria["path"] = value.replace(BY_PATH_DIR + "/", "")
+    return criteria
+
+def selection_matches(criteria: dict, disk: dict) -> bool:
+    """Un disque de l'inventaire est sélectionné si tous les critères lui correspondent."""
+    if "path" in criteria and not any(fnmatch(link, criteria["path"]) for link in disk["by_path"]):
+        return False
+    return rule_matches({key: value for key, value in criteria.items() if key != "path"}, disk)
+
+def select_from_inventory(criteria: dict, inventory: list[dict]) -> list[dict]:
+    return [disk for disk in inventory if selection_matches(criteria, disk)]
@@ -1,13 +1,28 @@
+import sys
 import time
-from utils import run_command, get_physical_drives_for_logical_volumes, get_base_disk
 from subprocess import CalledProcessError
-import re
-from disk_erase import erase_disk_hdd, get_disk_serial, is_ssd, erase_disk_crypto
+from block_devices import BlockDeviceGraph, build_device_graph, find_active_disks, find_active_devices, parse_mountinfo, MOUNTINFO_PATH, SYSFS_ROOT
+from disk_erase import erase_disk_hdd, get_disk_serial, is_ssd, erase_disk_crypto, erase_disk_profile
+from erase_patterns import get_profile
+from crypto_profiles import DEFAULT_CRYPTO_PROFILE
+from dry_run import project_erasure, format_projection
 from disk_partition import partition_disk
-from disk_format import format_disk
+from disk_format import format_disk, format_partition
+from partition_table import resolve_target, TARGET_DISK, TARGET_FREE
+from hidden_areas import probe_hidden_areas, unlock_hpa as unlock_hidden_area, restore_hpa, describe_hidden_areas
+from drive_health import (probe_health, describe_health, decide, load_quarantine, quarantine_disk, describe_lbas,
+                          HealthMonitor, DriveHealthError, DEFAULT_HEALTH_POLICY, HEALTH_FAILING, MIN_RATE,
+                          DECISION_RETRIED, DECISION_MAPPED, DECISION_QUARANTINED, RETRY_BLOCK_SIZE)
+from disk_verify import verify_zero, verify_header_destroyed, VerificationError
+from erase_jobs import CancellationToken, EraseCancelled
+from io_isolation import DiskIsolation, IsolationPolicy
+from fleet_agent import publish_record
 from log_handler import log_info, log_error, log_erase_operation
 
-def process_disk(disk: str, fs_choice: str, passes: int, use_crypto: bool = False, crypto_fill: str = "random", log_func=None) -> None:
+def process_disk(disk: str, fs_choice: str, passes: int, use_crypto: bool = False, crypto_fill: str = "random", log_func=None, verify: bool = False, token: CancellationToken | None = None,
+                 zero_skip: bool = False, profile: str | None = None, dry_run: bool = False,
+                 io_policy: IsolationPolicy | None = None, crypto_profile: str | None = None,
+                 target: str | None = None, unlock_hpa: bool = False, health_policy: str | None = None) -> dict | None:
     """
     Traiter un seul disque : l'effacer, le partitionner et le formater.
     
@@ -18,62 +33,247 @@ def process_disk(disk: str, fs_choice: str, passes: int, use_crypto: bool = Fals
         use_crypto: Utiliser ou non la méthode d'effacement cryptographique
         crypto_fill: Méthode de remplissage pour l'effacement crypto ('random' ou 'zero')
         log_func: Fonction optionnelle pour l'enregistrement de la progression
+        verify: Relire le disque après l'effacement (passe à zéro finale puis relecture
+                complète en multi-passes, absence d'en-tête LUKS en cryptographique)
+        token: Jeton d'annulation optionnel ; l'annulation tue les commandes en cours
+               et lève EraseCancelled au lieu de terminer le processus
+        zero_skip: Passe à zéro finale « lire-comparer-ignorer » (multi-passes uniquement) :
+                   seuls les blocs non nuls sont réécrits ; passes peut alors valoir 0
+        profile: Profil normalisé (clé de erase_patterns.PROFILES) remplaçant passes et méthode ;
+                 son nom est inscrit dans le journal d'effacement (certificat)
+        dry_run: Simulation sans aucune écriture : mesure de lecture du disque et durée projetée
+                 de la méthode choisie, retournée au lieu d'effacer
+        io_policy: Politique d'isolation (nice/ionice, cgroup io.weight/io.max, plafond de débit) ;
+                   par défaut, priorités réduites sans plafond
+        crypto_profile: Profil dm-crypt de l'effacement cryptographique (clé de crypto_profiles.CRYPTO_PROFILES,
+                        par défaut DEFAULT_CRYPTO_PROFILE)
+        target: Cible de l'effacement (voir partition_table.parse_target) : "disk" (défaut), "free"
+                (espace non alloué, table et partitions conservées) ou "partition:N" (partition
+                effacée puis reformatée, les autres conservées). La protection du système actif
+                porte alors sur la partition et non sur le disque.
+        unlock_hpa: Retirer temporairement la HPA détectée (hdparm -N volatil) pour effacer la capacité
+                    native, puis la rétablir avant le partitionnement. Sans cette option, une HPA ou
+                    une DCO est seulement signalée dans le journal et l'enregistrement d'effacement.
+        health_policy: Politique face à un disque défaillant (clé de drive_health.HEALTH_POLICIES, par
+                       défaut DEFAULT_HEALTH_POLICY), au contrôle SMART préalable comme en cours
+                       d'effacement (blocage, débit effondré, erreur d'E/S d'une région) : ignorer le
+                       disque, le mettre en quarantaine, réécrire les régions en erreur par blocs réduits,
+                       poursuivre en consignant les secteurs défaillants (map : la liste des LBA non
+                       effacés figure au certificat) ou le déclarer à détruire physiquement. Chaque
+                       décision est inscrite dans l'enregistrement d'effacement.
     """
+    isolation = None
+    hidden = None
+    monitor = None
+    disk_id = disk
+    # Enregistrement transmis au coordinateur de flotte, quelle que soit l'issue
+    record = {"disk": disk, "disk_id": None, "filesystem": fs_choice, "method": None, "profile": profile, "status": "failed"}
     try:
+        if dry_run:
+            settings = {"method": "crypto" if use_crypto else "overwrite", "passes": passes, "fill": crypto_fill,
+                        "verify": verify, "zero_skip": zero_skip, "profile": profile}
+            report = project_erasure([disk], lambda _: settings, log_func=log_func)
+            for line in format_projection(report):
+                log_info(f"Simulation : {line}")
+            return report
+        
+        # Les commandes du disque rejoignent son cgroup via le jeton ; les moteurs natifs s'y cadencent
+        if token is None:
+            token = CancellationToken()
+        isolation = DiskIsolation(disk, io_policy, log_func=log_func).start()
+        token.isolation = isolation
+        
+        profile_info = get_profile(profile) if profile else None
+        if profile_info and profile_info.get("crypto"):
+            # Profil délégué à l'effacement cryptographique (NIST 800-88 Purge)
+            use_crypto = True
+            verify = verify or profile_info["verify"]
+        
         disk_id = get_disk_serial(disk)
+        record["disk_id"] = disk_id
         log_info(f"Traitement de l'identifiant de disque : {disk_id}")
         if log_func:
             log_func(f"Traitement de l'identifiant de disque : {disk_id}")
         
+        # Santé du disque : liste de quarantaine, puis contrôle SMART avant toute écriture
+        health_policy = health_policy or DEFAULT_HEALTH_POLICY
+        quarantined = load_quarantine().get(disk_id)
+        if quarantined:
+            record["health"] = {"verdict": None, "reasons": [], "events": [], "decision": DECISION_QUARANTINED}
+            raise DriveHealthError(f"{disk_id} est en quarantaine depuis le {quarantined.get('time')} : {quarantined.get('reason')}",
+                                   DECISION_QUARANTINED)
+        health = probe_health(disk, token)
+        record["health"] = {"verdict": health["verdict"], "reasons": health["reasons"], "events": [], "decision": None}
+        log_info(f"Santé de l'ID de disque {disk_id} : {describe_health(health)}")
+        if log_func:
+            log_func(f"Santé du disque : {describe_health(health)}")
+        if health["verdict"] == HEALTH_FAILING:
+            # Avec la politique retry, l'effacement est tenté : les incidents seront traités en cours de route
+            decision = decide(health_policy, retryable=True)
+            if decision not in (DECISION_RETRIED, DECISION_MAPPED):
+                raise DriveHealthError(f"{disk_id} : {describe_health(health)}", decision)
+            log_error(f"ATTENTION : {disk_id} : {describe_health(health)} ; effacement tenté (politique {health_policy})")
+        
+        # Effacement sélectif : plages d'octets lues dans la table de partitions du disque
+        selection = resolve_target(disk, target)
+        ranges = selection["ranges"]
+        if selection["target"] != TARGET_DISK:
+            check_target_inactive(disk, selection)
+            record["target"] = selection["description"]
+            log_info(f"Cible de l'effacement sur l'ID de disque {disk_id} : {selection['description']} "
+                     f"({selection['size'] // (1024 * 1024)} Mo)")
+            if log_func:
+                log_func(f"Cible de l'effacement : {selection['description']} ({selection['size'] // (1024 * 1024)} Mo)")
+            if use_crypto and selection["target"] == TARGET_FREE:
+                raise ValueError("L'effacement cryptographique ne peut pas cibler l'espace non alloué : choisir un écrasement")
+        else:
+            # Zones cachées (HPA/DCO) : l'étendue de l'effacement doit couvrir la capacité native
+            hidden = probe_hidden_areas(disk, token)
+            if hidden["hpa"] and unlock_hpa:
+                unlock_hidden_area(disk, hidden, token, log_func=log_func)
+            if (hidden["hpa"] and not hidden.get("unlocked")) or hidden["dco"]:
+                log_error(f"ATTENTION : {disk_id} : {describe_hidden_areas(hidden)}")
+                if log_func:
+                    log_func(f"ATTENTION : {describe_hidden_areas(hidden)}")
+            record["hidden_area"] = describe_hidden_areas(hidden)
+        
         # Vérifier si le disque est un SSD et enregistrer un avertissement
         if is_ssd(disk) and not use_crypto:
             log_info(f"ATTENTION : {disk_id} est un SSD. L'effacement multi-passes peut ne pas effacer de manière sécurisée toutes les données.")
             if log_func:
                 log_func(f"ATTENTION : {disk_id} est un SSD. L'effacement multi-passes peut ne pas effacer de manière sécurisée toutes les données.")
         
+        # Surveillance en cours d'effacement : blocage, débit effondré, erreurs d'E/S par région
+        monitor = HealthMonitor(disk, health_policy, token, log_func=log_func,
+                                min_rate=min(MIN_RATE, isolation.limit // 4) if isolation.limit else MIN_RATE)
+        token.health = monitor.start()
+        if use_crypto and selection["partition"]:
+            # Le conteneur dm-crypt d'une partition écrit en octets de la partition
+            monitor.map_offset = ranges[0][0]
+        
         # Effacer le disque en utilisant la méthode sélectionnée
-        if use_crypto:
-            method_str = f"Effacement cryptographique avec remplissage {crypto_fill}"
+        if profile_info and not use_crypto:
+            verified = verify or profile_info["verify"]
+            method_str = f"Profil {profile_info['name']}" + (", vérifié" if verified else "")
+            log_info(f"Utilisation du profil {profile_info['name']} pour l'ID de disque : {disk_id}")
+            if log_func:
+                log_func(f"Utilisation du profil {profile_info['name']} pour l'ID de disque : {disk_id}")
+            erase_result = erase_disk_profile(disk, profile, log_func=log_func, token=token, verify=verified, ranges=ranges)
+            # La passe de vérification du profil relit déjà la dernière passe écrite
+            verify = False
+        elif use_crypto:
+            crypto_profile = crypto_profile or DEFAULT_CRYPTO_PROFILE
+            method_str = f"Effacement cryptographique avec remplissage {crypto_fill} (profil dm-crypt {crypto_profile})"
             log_info(f"Utilisation de l'effacement cryptographique (remplissage {crypto_fill}) pour l'ID de disque : {disk_id}")
             if log_func:
                 log_func(f"Utilisation de l'effacement cryptographique (remplissage {crypto_fill}) pour l'ID de disque : {disk_id}")
-            erase_result = erase_disk_crypto(disk, filling_method=crypto_fill, log_func=log_func)
+            # Une partition est elle-même un périphérique bloc : elle reçoit son propre conteneur dm-crypt
+            erase_result = erase_disk_crypto(selection["partition"] or disk, filling_method=crypto_fill, log_func=log_func,
+                                             token=token, crypto_profile=crypto_profile)
         else:
             method_str = f"{passes} passes d'écrasement"
+            if zero_skip:
+                method_str += " + passe à zéro (blocs déjà nuls ignorés)"
             log_info(f"Utilisation de l'effacement standard multi-passes pour l'ID de disque : {disk_id}")
             if log_func:
                 log_func(f"Utilisation de l'effacement standard multi-passes pour l'ID de disque : {disk_id}")
-            erase_result = erase_disk_hdd(disk, passes, log_func=log_func)
+            erase_result = erase_disk_hdd(disk, passes, log_func=log_func, zero_pass=verify or zero_skip, token=token, skip_zero=zero_skip,
+                                          ranges=ranges)
+        
+        if token is not None:
+            token.check()
+        
+        if verify:
+            if use_crypto:
+                verify_header_destroyed(selection["partition"] or disk, log_func=log_func)
+                method_str += ", vérifié"
+            else:
+                verify_zero(disk, log_func=log_func, ranges=ranges, exclude=monitor.excluded())
+                method_str += ", vérifié" if zero_skip else " + passe à zéro, vérifié"
+        
+        monitor.stop()
+        token.health = None
+        if any(event["decision"] == DECISION_RETRIED for event in monitor.events):
+            method_str += f", régions en erreur réécrites par blocs de {RETRY_BLOCK_SIZE // 1024} Ko"
+        # Carte d'erreurs : secteurs non réinscriptibles, sautés pour terminer l'effacement
+        unsanitized = monitor.unsanitized_lbas()
+        if unsanitized:
+            record["error_map"] = {"sector_size": monitor.sector_size, "lbas": unsanitized}
+            record["health"]["decision"] = DECISION_MAPPED
+            count = sum(last - first + 1 for first, last in unsanitized)
+            method_str += f", {count} secteur(s) défaillant(s) non effacé(s)"
+            log_error(f"ATTENTION : {disk_id} : LBA non effacés : {describe_lbas(unsanitized)} ; destruction physique requise")
+            if log_func:
+                log_func(f"ATTENTION : LBA non effacés : {describe_lbas(unsanitized)} ; destruction physique requise")
         
         log_info(f"Effacement terminé sur l'ID de disque : {disk_id}")
         if log_func:
             log_func(f"Effacement terminé sur l'ID de disque : {disk_id}")
         
-        log_info(f"Création de partition sur l'ID de disque : {disk_id}")
-        if log_func:
-            log_func(f"Création de partition sur l'ID de disque : {disk_id}")
+        if hidden is not None:
+            # La HPA retrouve sa place avant le partitionnement, créé pour la taille visible d'origine
+            restore_hpa(disk, hidden, log_func=log_func)
+            if hidden["supported"]:
+                method_str += f", {describe_hidden_areas(hidden)}"
         
-        partition_disk(disk)
+        if selection["target"] != TARGET_DISK:
+            method_str += f", {selection['description']}"
+            if selection["partition"]:
+                log_info(f"Formatage de /dev/{selection['partition']} avec {fs_choice}")
+                if log_func:
+                    log_func(f"Formatage de /dev/{selection['partition']} avec {fs_choice}")
+                format_partition(f"/dev/{selection['partition']}", fs_choice, token)
+        else:
+            log_info(f"Création de partition sur l'ID de disque : {disk_id}")
+            if log_func:
+                log_func(f"Création de partition sur l'ID de disque : {disk_id}")
         
-        log_info("Attente de la reconnaissance de la partition...")
-        if log_func:
-            log_func("Attente de la reconnaissance de la partition...")
+            partition_disk(disk, token)
         
-        time.sleep(5)  # Attendre que le système reconnaisse la nouvelle partition
+            log_info("Attente de la reconnaissance de la partition...")
+            if log_func:
+                log_func("Attente de la reconnaissance de la partition...")
         
-        log_info(f"Formatage de l'ID de disque : {disk_id} avec {fs_choice}")
-        if log_func:
-            log_func(f"Formatage de l'ID de disque : {disk_id} avec {fs_choice}")
+            # Attendre que le système reconnaisse la nouvelle partition
+            if token is not None:
+                token.wait(5)
+            else:
+                time.sleep(5)
+        
+            log_info(f"Formatage de l'ID de disque : {disk_id} avec {fs_choice}")
+            if log_func:
+                log_func(f"Formatage de l'ID de disque : {disk_id} avec {fs_choice}")
         
-        format_disk(disk, fs_choice)
+            format_disk(disk, fs_choice, token)
         
-        log_erase_operation(disk_id, fs_choice, method_str)
+        log_erase_operation(disk_id, fs_choice, method_str, profile=profile_info["name"] if profile_info else None,
+                            unsanitized=describe_lbas(unsanitized) if unsanitized else None)
+        record.update(method=method_str, status="done")
         
         log_info(f"Opérations terminées sur l'ID de disque : {disk_id}")
         if log_func:
             log_func(f"Opérations terminées sur l'ID de disque : {disk_id}")
         
         
+    except EraseCancelled:
+        if monitor is not None and monitor.tripped:
+            # Annulation déclenchée par la surveillance : disque bloqué ou trop lent
+            error = DriveHealthError(f"Effacement de {disk_id} arrêté : {monitor.tripped['detail']}", monitor.tripped["decision"])
+            handle_health_failure(disk_id, error, record, log_func)
+            raise error from None
+        record["status"] = "cancelled"
+        log_error(f"Traitement du disque {disk} annulé")
+        if log_func:
+            log_func(f"Traitement du disque {disk} annulé")
+        raise
+    except DriveHealthError as e:
+        handle_health_failure(disk_id, e, record, log_func)
+        raise
+    except VerificationError as e:
+        log_error(f"Échec de la vérification pour le disque {disk} : {str(e)}")
+        if log_func:
+            log_func(f"Échec de la vérification pour le disque {disk} : {str(e)}")
+        raise
     except FileNotFoundError as e:
         log_error(f"Commande requise introuvable : {str(e)}")
         if log_func:
@@ -119,133 +319,75 @@ def process_disk(disk: str, fs_choice: str, passes: int, use_crypto: bool = Fals
         if log_func:
             log_func(f"Valeur d'argument invalide pour le disque {disk} : {str(e)}")
         raise
+    finally:
+        if monitor is not None:
+            monitor.stop()
+            token.health = None
+            record["health"]["events"] = monitor.events
+        if hidden is not None:
+            restore_hpa(disk, hidden, log_func=log_func)
+        if isolation is not None:
+            token.isolation = None
+            record["io"] = isolation.close()
+            error = sys.exc_info()[1]
+            if error is not None:
+                record["message"] = str(error)
+            publish_record(record)
 
-def get_active_disk():
+def handle_health_failure(disk_id: str, error: DriveHealthError, record: dict, log_func=None) -> None:
+    """
+    Applique la décision qui arrête le traitement d'un disque défaillant et l'inscrit dans
+    l'enregistrement d'effacement ; un disque mis en quarantaine rejoint la liste de quarantaine.
+    """
+    record.setdefault("health", {"verdict": None, "reasons": [], "events": [], "decision": None})["decision"] = error.decision
+    log_error(f"Disque {disk_id} défaillant : {str(error)}")
+    if log_func:
+        log_func(f"Disque {disk_id} défaillant : {str(error)}")
+    if error.decision == DECISION_QUARANTINED and record["health"]["verdict"] is not None:
+        try:
+            quarantine_disk(disk_id, str(error))
+        except OSError as e:
+            log_error(f"Inscription de {disk_id} en quarantaine impossible : {str(e)}")
+
+def check_target_inactive(disk: str, selection: dict, mountinfo_path: str = MOUNTINFO_PATH, sysfs_root: str = SYSFS_ROOT) -> None:
+    """
+    Protection du système actif pour un effacement sélectif : une partition portant un montage
+    système (directement ou via LVM, dm-crypt, md) est refusée, même après confirmation.
+    L'espace non alloué n'est porté par aucun montage et reste effaçable sur le disque actif.
+
+    Raises:
+        ValueError: Si la partition ciblée porte le système actif
+    """
+    active = find_active_devices(mountinfo_path, sysfs_root)
+    if selection["partition"] and selection["partition"] in active:
+        raise ValueError(f"La partition /dev/{selection['partition']} porte le système actif : effacement refusé")
+    if disk in active:
+        log_info(f"/dev/{disk} porte le système actif : seule la cible {selection['description']} sera effacée")
+
+def get_device_graph(mountinfo_path: str = MOUNTINFO_PATH, sysfs_root: str = SYSFS_ROOT) -> BlockDeviceGraph | None:
+    """
+    Construire une seule fois le graphe de dépendances des périphériques bloc pour une actualisation.
+    Retourne None si sysfs ou mountinfo ne sont pas lisibles.
+    """
+    try:
+        return build_device_graph(sysfs_root, parse_mountinfo(mountinfo_path))
+    except OSError as e:
+        log_error(f"Erreur OS lors de la construction du graphe des périphériques : {str(e)}")
+        return None
+
+def get_active_disk(mountinfo_path: str = MOUNTINFO_PATH, sysfs_root: str = SYSFS_ROOT, graph: BlockDeviceGraph | None = None):
     """
     Détecter le périphérique actif qui soutient le système de fichiers racine.
     Retourne toujours une liste de noms de disques de base (ex: ['nvme0n1', 'sda']) ou None pour la cohérence.
-    Utilise la logique LVM si le périphérique racine est un volume logique (/dev/mapper/),
-    sinon utilise la logique de détection de disque régulière incluant la détection des médias de démarrage live.
-    Tous les périphériques retournés sont résolus à leur disque de base.
+    Les montages système de /proc/self/mountinfo sont résolus par leur numéro majeur:mineur
+    via /sys/dev/block, puis le graphe slaves/ de sysfs est parcouru jusqu'aux disques physiques
+    (LVM, dm-crypt, md RAID, multipath, médias live montés en loop et overlay), sans sous-processus.
+    Un graphe déjà construit par get_device_graph peut être réutilisé.
     """
     try:
-        # Initialiser l'ensemble des périphériques pour collecter tous les périphériques actifs
-        devices = set()
-        live_boot_found = False
-        
-        # Étape 1 : Vérifier /proc/mounts pour tous les périphériques montés
-        with open('/proc/mounts', 'r') as f:
-            mounts_content = f.read()
-            
-            # Chercher le montage du système de fichiers racine
-            root_device = None
-            for line in mounts_content.split('\n'):
-                if line.strip() and ' / ' in line:
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        root_device = parts[0]
-                        break
-
-        # Étape 2 : Gérer les cas spéciaux de démarrage live où la racine n'est pas un vrai périphérique
-        if not root_device or root_device in ['rootfs', 'overlay', 'aufs', '/dev/root']:
-            
-            # En démarrage live, chercher le média de démarrage réel dans /proc/mounts
-            with open('/proc/mounts', 'r') as f:
-                for line in f:
-                    parts = line.split()
-                    if len(parts) >= 6:
-                        device = parts[0]
-                        mount_point = parts[1]
-                        
-                        # Chercher les points de montage communs du démarrage live
-                        if any(keyword in mount_point for keyword in ['/run/live', '/lib/live', '/live/', '/cdrom']):
-                            match = re.search(r'/dev/([a-zA-Z]+\d*[a-zA-Z]*\d*)', device)
-                            if match:
-                                device_name = match.group(1)
-                                base_device = get_base_disk(device_name)
-                                devices.add(base_device)
-                                live_boot_found = True
-                        
-                        # Vérifier aussi les périphériques USB/amovibles
-                        elif device.startswith('/dev/') and any(keyword in device for keyword in ['sd', 'nvme', 'mmc']):
-                            if '/media' in mount_point or '/mnt' in mount_point or '/run' in mount_point:
-                                match = re.search(r'/dev/([a-zA-Z]+\d*[a-zA-Z]*\d*)', device)
-                                if match:
-                                    device_name = match.group(1)
-                                    base_device = get_base_disk(device_name)
-                                    devices.add(base_device)
-            
-            # Si rien trouvé, fallback : utiliser df
-            if not devices:
-                try:
-                    output = run_command(["df", "-h"])
-                    lines = output.strip().split('\n')
-                    
-                    for line in lines[1:]:  # Ignorer l'en-tête
-                        parts = line.split()
-                        if len(parts) >= 6:
-                            device = parts[0]
-                            mount_point = parts[5]
-                            
-                            if device.startswith('/dev/') and any(keyword in device for keyword in ['sd', 'nvme', 'mmc']):
-                                match = re.search(r'/dev/([a-zA-Z]+\d*[a-zA-Z]*\d*)', device)
-                                if match:
-                                    device_name = match.group(1)
-                                    base_device = get_base_disk(device_name)
-                                    devices.add(base_device)
-                except (FileNotFoundError, CalledProcessError) as e:
-                    log_error(f"Erreur lors de l'exécution de la commande df : {str(e)}")
-        
-        else:
-            # Étape 3 : Périphérique racine normal
-            if '/dev/mapper/' in root_device or '/dev/dm-' in root_device:
-                # Résolution LVM - trouver les disques physiques
-                active_physical_drives = get_physical_drives_for_logical_volumes([root_device])
-                
-                for drive in active_physical_drives:
-                    base_device = get_base_disk(drive)
-                    devices.add(base_device)
-                    
-            else:
-                # Disque régulier - extraire le nom du périphérique avec regex
-                match = re.search(r'/dev/([a-zA-Z]+\d*[a-zA-Z]*\d*)', root_device)
-                if match:
-                    device_name = match.group(1)
-                    base_device = get_base_disk(device_name)
-                    devices.add(base_device)
-            
-            # Vérifier aussi les médias de démarrage live
-            try:
-                output = run_command(["df", "-h"])
-                lines = output.strip().split('\n')
-                
-                for line in lines[1:]:  # Ignorer l'en-tête
-                    parts = line.split()
-                    if len(parts) >= 6:
-                        device = parts[0]
-                        mount_point = parts[5]
-                        
-                        if "/run/live" in mount_point or "/lib/live" in mount_point:
-                            match = re.search(r'/dev/([a-zA-Z]+\d*[a-zA-Z]*\d*)', device)
-                            if match:
-                                device_name = match.group(1)
-                                base_device = get_base_disk(device_name)
-                                devices.add(base_device)
-                                live_boot_found = True
-            except (FileNotFoundError, CalledProcessError) as e:
-                log_info(f"Impossible de vérifier les périphériques de démarrage live : {str(e)}")
-
-        # Étape 4 : Logique de retour
+        devices = find_active_disks(mountinfo_path, sysfs_root, graph)
         if devices:
-            device_list = list(devices)
-            
-            # Si démarrage live trouvé, prioriser ces périphériques
-            if live_boot_found:
-                final_devices = [dev for dev in device_list if not dev.startswith('/dev/')]
-                if final_devices:
-                    return final_devices
-            
-            return device_list
+            return sorted(devices)
         else:
             log_error("Aucun périphérique actif trouvé")
             return None
@@ -259,14 +401,8 @@ def get_active_disk():
     except OSError as e:
         log_error(f"Erreur OS lors de l'accès aux informations système : {str(e)}")
         return None
-    except CalledProcessError as e:
-        log_error(f"Erreur lors de l'exécution de la commande : {str(e)}")
-        return None
     except (IndexError, ValueError) as e:
-        log_error(f"Erreur lors de l'analyse de la sortie de commande : {str(e)}")
-        return None
-    except re.error as e:
-        log_error(f"Erreur de motif regex : {str(e)}")
+        log_error(f"Erreur lors de l'analyse de /proc/self/mountinfo : {str(e)}")
         return None
     except KeyboardInterrupt:
         log_error("Opération interrompue par l'utilisateur")
@@ -1,11 +1,11 @@
 import logging
 from utils import run_command
-import sys
+from erase_jobs import CancellationToken
 from subprocess import CalledProcessError
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def partition_disk(disk: str) -> None:
+def partition_disk(disk: str, token: CancellationToken | None = None) -> None:
     print(f"Partitionnement du disque {disk}...")
 
     try:
@@ -13,15 +13,15 @@ def partition_disk(disk: str) -> None:
         disk_name = disk.replace('/dev/', '')
         
         # Créer une nouvelle table de partitions GPT
-        run_command(["parted", f"/dev/{disk_name}", "--script", "mklabel", "gpt"])
+        run_command(["parted", f"/dev/{disk_name}", "--script", "mklabel", "gpt"], token)
         
         # Créer une partition primaire utilisant 100% de l'espace disque
-        run_command(["parted", f"/dev/{disk_name}", "--script", "mkpart", "primary", "0%", "100%"])
+        run_command(["parted", f"/dev/{disk_name}", "--script", "mkpart", "primary", "0%", "100%"], token)
         
         print(f"Disque {disk_name} partitionné avec succès.")
     except FileNotFoundError:
         logging.error(f"Erreur : Commande `parted` introuvable. Assurez-vous qu'elle est installée.")
-        sys.exit(2)
+        raise
     except CalledProcessError as e:
         logging.error(f"Erreur : Échec du partitionnement de {disk} : {e}")
-        sys.exit(1)
\ No newline at end of file
+        raise
\ No newline at end of file
@@ -0,0 +1,82 @@
+import os
+import logging
+from region_erase import subtract_ranges
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Taille des lectures pendant la vérification
+VERIFY_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Signature d'un en-tête LUKS (version 1 et 2)
+LUKS_MAGIC = b"LUKS\xba\xbe"
+
+# Zone d'en-tête écrasée par les méthodes d'effacement (10 Mo)
+HEADER_REGION_SIZE = 10 * 1024 * 1024
+
+class VerificationError(Exception):
+    """Levée lorsque le contenu relu d'un disque ne correspond pas à l'effacement attendu."""
+
+def _device_path(device: str) -> str:
+    return device if device.startswith("/") else f"/dev/{device}"
+
+def verify_zero(device: str, chunk_size: int = VERIFY_CHUNK_SIZE, log_func=None,
+                ranges: list[tuple[int, int]] | None = None, exclude: list[tuple[int, int]] | None = None) -> int:
+    """
+    Relit l'intégralité du disque, ou les plages d'octets ranges, et vérifie qu'elles ne
+    contiennent que des zéros. Les plages exclude (triées, disjointes : secteurs défaillants
+    de la carte d'erreurs) ne sont pas relues.
+
+    Returns:
+        int: Nombre d'octets vérifiés
+
+    Raises:
+        VerificationError: Au premier bloc contenant un octet non nul
+    """
+    path = _device_path(device)
+    zero_chunk = bytes(chunk_size)
+    verified = 0
+    message = f"Vérification de l'effacement à zéro de {path}..."
+    logging.info(message)
+    if log_func:
+        log_func(message)
+    with open(path, "rb", buffering=0) as f:
+        # Relire le support et non le cache de pages rempli par l'effacement
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        except (OSError, AttributeError):
+            pass
+        if exclude:
+            ranges = subtract_ranges(ranges if ranges is not None else [(0, f.seek(0, os.SEEK_END))], exclude)
+        for start, end in ranges if ranges is not None else [(0, None)]:
+            position = f.seek(start)
+            while end is None or position < end:
+                data = f.read(chunk_size if end is None else min(chunk_size, end - position))
+                if not data:
+                    break
+                if data != zero_chunk[:len(data)]:
+                    offset = position + next(i for i, b in enumerate(data) if b)
+                    raise VerificationError(f"Données non nulles trouvées sur {path} à l'octet {offset}")
+                position += len(data)
+                verified += len(data)
+    message = f"Vérification terminée : {verified} octets à zéro sur {path}"
+    logging.info(message)
+    if log_func:
+        log_func(message)
+    return verified
+
+def verify_header_destroyed(device: str, log_func=None) -> None:
+    """
+    Vérifie qu'aucun en-tête LUKS ne subsiste dans la zone d'en-tête après un effacement cryptographique.
+
+    Raises:
+        VerificationError: Si une signature LUKS est encore présente
+    """
+    path = _device_path(device)
+    with open(path, "rb", buffering=0) as f:
+        header = f.read(HEADER_REGION_SIZE)
+    if LUKS_MAGIC in header:
+        raise VerificationError(f"Un en-tête LUKS subsiste sur {path}, la clé pourrait être récupérable")
+    message = f"Vérification terminée : aucun en-tête LUKS sur {path}"
+    logging.info(message)
+    if log_func:
+        log_func(message)
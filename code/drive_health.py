@@ -0,0 +1,373 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from subprocess import CalledProcessError
+from block_devices import SYSFS_ROOT
+from erase_jobs import CancellationToken
+from utils import run_command
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Politiques appliquées à un disque défaillant (contrôle préalable ou incident en cours d'effacement)
+HEALTH_SKIP = "skip"
+HEALTH_QUARANTINE = "quarantine"
+HEALTH_RETRY = "retry"
+HEALTH_DESTROY = "destroy"
+# Effacement tolérant : secteurs défaillants isolés par dichotomie et consignés dans la carte d'erreurs
+HEALTH_MAP = "map"
+HEALTH_POLICIES = (HEALTH_SKIP, HEALTH_QUARANTINE, HEALTH_RETRY, HEALTH_MAP, HEALTH_DESTROY)
+DEFAULT_HEALTH_POLICY = HEALTH_RETRY
+
+# Verdicts du contrôle préalable
+HEALTH_OK = "ok"
+HEALTH_DEGRADED = "degraded"
+HEALTH_FAILING = "failing"
+HEALTH_UNKNOWN = "unknown"
+
+# Décisions inscrites dans l'enregistrement d'effacement
+DECISION_SKIPPED = "skipped"
+DECISION_QUARANTINED = "quarantined"
+DECISION_RETRIED = "retried"
+DECISION_DESTROY = "destroy"
+DECISION_MAPPED = "mapped"
+DECISION_LABELS = {
+    DECISION_SKIPPED: "disque ignoré",
+    DECISION_QUARANTINED: "disque mis en quarantaine",
+    DECISION_RETRIED: "zone réécrite par blocs réduits",
+    DECISION_DESTROY: "destruction physique requise",
+    DECISION_MAPPED: "secteurs défaillants consignés, effacement poursuivi",
+}
+
+# Secteurs réalloués au-delà desquels le disque est jugé défaillant (en deçà : dégradé)
+MAX_REALLOCATED = 100
+
+# Attributs SMART ATA surveillés (identifiant : clé du résumé)
+ATA_ATTRIBUTES = {5: "reallocated", 197: "pending", 198: "uncorrectable"}
+
+# Aucune E/S sur le disque pendant ce délai : effacement bloqué (secondes)
+STALL_TIMEOUT = 120.0
+
+# Débit minimal attendu, mesuré sur SLOW_WINDOW secondes (octets/s) ; sert aussi au délai par région
+MIN_RATE = 1024 * 1024
+SLOW_WINDOW = 600.0
+
+# Période d'échantillonnage de /sys/class/block/<disque>/stat (secondes)
+SAMPLE_INTERVAL = 5.0
+
+# Taille des blocs de réécriture d'une région en erreur : multiple de 3 (motifs Gutmann) et de 4096
+RETRY_BLOCK_SIZE = 192 * 1024
+
+DEFAULT_QUARANTINE_PATH = "/var/lib/disk_eraser/quarantine.json"
+
+class DriveHealthError(Exception):
+    """Levée lorsque l'état du disque interrompt son traitement ; decision indique la suite donnée."""
+    def __init__(self, message: str, decision: str) -> None:
+        super().__init__(f"{message} ({DECISION_LABELS[decision]})")
+        self.decision = decision
+
+def parse_smart(data: dict) -> dict:
+    """
+    Résumé d'une sortie smartctl --json : autotest global, attributs ATA de réallocation
+    et journal de santé NVMe. Les valeurs absentes valent None.
+    """
+    summary = {"passed": (data.get("smart_status") or {}).get("passed"), "reallocated": None, "pending": None,
+               "uncorrectable": None, "media_errors": None, "critical_warning": None, "percentage_used": None}
+    for attribute in (data.get("ata_smart_attributes") or {}).get("table", []):
+        key = ATA_ATTRIBUTES.get(attribute.get("id"))
+        if key is not None:
+            summary[key] = (attribute.get("raw") or {}).get("value")
+    nvme = data.get("nvme_smart_health_information_log")
+    if nvme:
+        for key in ("media_errors", "critical_warning", "percentage_used"):
+            summary[key] = nvme.get(key)
+    return summary
+
+def assess_smart(summary: dict) -> tuple[str, list[str]]:
+    """
+    Verdict du contrôle préalable. Les secteurs en attente ou irrécupérables laissent le disque
+    « dégradé » : leur écrasement provoque souvent leur réallocation.
+
+    Returns:
+        tuple: (verdict, [raisons])
+    """
+    failing = []
+    degraded = []
+    if summary["passed"] is False:
+        failing.append("autotest SMART global en échec")
+    if summary["critical_warning"]:
+        failing.append(f"avertissement critique NVMe 0x{summary['critical_warning']:02x}")
+    reallocated = summary["reallocated"] or 0
+    if reallocated > MAX_REALLOCATED:
+        failing.append(f"{reallocated} secteurs réalloués")
+    elif reallocated:
+        degraded.append(f"{reallocated} secteurs réalloués")
+    if summary["pending"]:
+        degraded.append(f"{summary['pending']} secteurs en attente de réallocation")
+    if summary["uncorrectable"]:
+        degraded.append(f"{summary['uncorrectable']} secteurs irrécupérables")
+    if summary["media_errors"]:
+        degraded.append(f"{summary['media_errors']} erreurs de support NVMe")
+    if summary["percentage_used"] is not None and summary["percentage_used"] >= 100:
+        degraded.append(f"usure NVMe {summary['percentage_used']} %")
+    if failing:
+        return HEALTH_FAILING, failing + degraded
+    return (HEALTH_DEGRADED, degraded) if degraded else (HEALTH_OK, [])
+
+def probe_health(disk: str, token: CancellationToken | None = None, runner=run_command) -> dict:
+    """
+    Contrôle de santé préalable d'un disque par smartctl --json -a.
+
+    Returns:
+        dict: {"verdict", "reasons", "smart": résumé de parse_smart ou None, "error"}
+    """
+    disk = disk.replace("/dev/", "")
+    status = {"verdict": HEALTH_UNKNOWN, "reasons": [], "smart": None, "error": None}
+    try:
+        output = runner(["smartctl", "--json", "-a", f"/dev/{disk}"], token)
+    except CalledProcessError as e:
+        # Les bits 2 et suivants du code de sortie décrivent l'état du disque : la sortie JSON reste valide
+        output = e.output.decode("utf-8", "replace") if isinstance(e.output, bytes) else e.output
+        if e.returncode & 0x03 or not output:
+            status["error"] = f"smartctl a échoué (code {e.returncode})"
+            return status
+    except FileNotFoundError:
+        status["error"] = "smartctl introuvable"
+        return status
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError as e:
+        status["error"] = f"sortie de smartctl illisible : {str(e)}"
+        return status
+    if not isinstance(data, dict):
+        status["error"] = "sortie de smartctl illisible"
+        return status
+    status["smart"] = parse_smart(data)
+    status["verdict"], status["reasons"] = assess_smart(status["smart"])
+    return status
+
+def describe_health(status: dict) -> str:
+    if status["verdict"] == HEALTH_UNKNOWN:
+        return f"état SMART inconnu ({status['error']})"
+    if status["verdict"] == HEALTH_OK:
+        return "état SMART correct"
+    label = "défaillant" if status["verdict"] == HEALTH_FAILING else "dégradé"
+    return f"disque {label} : {', '.join(status['reasons'])}"
+
+def decide(policy: str, retryable: bool = False) -> str:
+    """Décision appliquée à un disque défaillant selon la politique ; retry sans reprise possible mène à la destruction."""
+    if policy == HEALTH_SKIP:
+        return DECISION_SKIPPED
+    if policy == HEALTH_QUARANTINE:
+        return DECISION_QUARANTINED
+    if policy == HEALTH_RETRY and retryable:
+        return DECISION_RETRIED
+    if policy == HEALTH_MAP and retryable:
+        return DECISION_MAPPED
+    return DECISION_DESTROY
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def describe_lbas(lbas: list[tuple[int, int]]) -> str:
+    """Liste lisible de plages de LBA : « 1000-1007, 5000 »."""
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in lbas)
+
+def load_quarantine(path: str = DEFAULT_QUARANTINE_PATH) -> dict:
+    """Disques en quarantaine, par identifiant : {"reason", "time"}."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Liste de quarantaine illisible ({path}) : {str(e)}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def quarantine_disk(disk_id: str, reason: str, path: str = DEFAULT_QUARANTINE_PATH) -> None:
+    """
+    Inscrit un disque dans la liste de quarantaine : il est refusé par les sessions suivantes
+    jusqu'à ce qu'il en soit retiré à la main.
+    """
+    entries = load_quarantine(path)
+    entries[disk_id] = {"reason": reason, "time": datetime.now().isoformat(timespec="seconds")}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+def _sector_size(disk: str, sysfs_root: str) -> int:
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", disk, "queue", "logical_block_size"), "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 512
+
+class HealthMonitor:
+    """
+    Surveillance d'un disque pendant son effacement, attachée au jeton (token.health).
+
+    Un thread échantillonne /sys/class/block/<disque>/stat : sans aucun secteur lu ou écrit
+    pendant STALL_TIMEOUT, ou sous MIN_RATE sur SLOW_WINDOW, l'effacement est arrêté (jeton
+    annulé) et la décision de la politique est retenue. Les erreurs d'E/S comptées par le
+    pilote (device/ioerr_cnt) sont consignées. Les moteurs par régions (voir region_erase)
+    interrogent aussi la surveillance : délai par région et réécriture par blocs réduits
+    d'une région en erreur, ou dichotomie jusqu'au secteur avec la politique map, dont les
+    secteurs défaillants forment la carte d'erreurs du certificat.
+    """
+    def __init__(self, disk: str, policy: str = DEFAULT_HEALTH_POLICY, token: CancellationToken | None = None,
+                 log_func=None, min_rate: int = MIN_RATE, sysfs_root: str = SYSFS_ROOT,
+                 stall_timeout: float = STALL_TIMEOUT, slow_window: float = SLOW_WINDOW,
+                 interval: float = SAMPLE_INTERVAL) -> None:
+        self.disk = disk.replace("/dev/", "")
+        self.policy = policy
+        self.token = token
+        self.log_func = log_func
+        self.min_rate = min_rate
+        self.sysfs_root = sysfs_root
+        self.stall_timeout = stall_timeout
+        self.slow_window = slow_window
+        self.interval = interval
+        self.retry_block = RETRY_BLOCK_SIZE
+        self.sector_size = _sector_size(self.disk, sysfs_root)
+        # Carte d'erreurs en octets du disque ; map_offset décale les plages d'un périphérique
+        # empilé (partition, mapper dm-crypt) vers le disque
+        self.bad_ranges: list[tuple[int, int]] = []
+        self.map_offset = 0
+        self.events: list[dict] = []
+        self.tripped = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _log(self, message: str) -> None:
+        logging.warning(message)
+        if self.log_func:
+            self.log_func(message)
+
+    def record(self, event: str, detail: str, decision: str | None = None) -> dict:
+        entry = {"time": datetime.now().isoformat(timespec="seconds"), "event": event, "detail": detail, "decision": decision}
+        with self._lock:
+            self.events.append(entry)
+        self._log(f"/dev/{self.disk} : {detail}" + (f" ({DECISION_LABELS[decision]})" if decision else ""))
+        return entry
+
+    def trip(self, event: str, detail: str) -> None:
+        """Arrête l'effacement : aucune reprise n'est possible pour un disque bloqué ou trop lent."""
+        if self.tripped is not None:
+            return
+        self.tripped = self.record(event, detail, decide(self.policy))
+        if self.token is not None:
+            self.token.cancel()
+
+    @property
+    def bisect(self) -> bool:
+        """Les régions en erreur sont réduites par dichotomie jusqu'au secteur (politique map)."""
+        return self.policy == HEALTH_MAP
+
+    def sector_failed(self, start: int, end: int, error: Exception) -> None:
+        """Consigne une plage de secteurs non réinscriptibles (octets du périphérique écrit)."""
+        with self._lock:
+            self.bad_ranges = merge_ranges(self.bad_ranges + [(start + self.map_offset, end + self.map_offset)])
+        first = (start + self.map_offset) // self.sector_size
+        last = (end + self.map_offset - 1) // self.sector_size
+        self._log(f"/dev/{self.disk} : LBA {describe_lbas([(first, last)])} non réinscriptible(s) ({str(error)}), ignoré(s)")
+
+    def excluded(self) -> list[tuple[int, int]]:
+        """Plages déjà consignées, en octets du périphérique écrit, que les passes suivantes sautent."""
+        with self._lock:
+            ranges = list(self.bad_ranges)
+        return [(max(0, start - self.map_offset), end - self.map_offset) for start, end in ranges if end > self.map_offset]
+
+    def unsanitized_lbas(self) -> list[tuple[int, int]]:
+        """Carte d'erreurs : plages (premier LBA, dernier LBA) du disque restées non effacées."""
+        with self._lock:
+            ranges = list(self.bad_ranges)
+        return [(start // self.sector_size, (end - 1) // self.sector_size) for start, end in ranges]
+
+    def region_timeout(self, size: int) -> float:
+        """Délai d'écriture de size octets, mesuré sur des écritures synchrones (progression du disque)."""
+        return self.stall_timeout + size / self.min_rate
+
+    def region_failed(self, start: int, end: int, error: Exception, retryable: bool = True) -> None:
+        """
+        Région en erreur ou hors délai : consignée, puis réécrite par blocs de retry_block ou
+        par dichotomie si la politique le permet (retour normal), sinon DriveHealthError.
+        """
+        decision = decide(self.policy, retryable)
+        self.record("region_error", f"erreur sur la région {start}-{end} : {str(error)}", decision)
+        if decision not in (DECISION_RETRIED, DECISION_MAPPED):
+            raise DriveHealthError(f"Erreur sur /dev/{self.disk} à l'octet {start} : {str(error)}", decision)
+
+    def retry_failed(self, start: int, end: int, error: Exception) -> None:
+        self.record("retry_error", f"échec de la réécriture de {start}-{end} : {str(error)}", DECISION_DESTROY)
+        raise DriveHealthError(f"Secteurs non réinscriptibles sur /dev/{self.disk} à l'octet {start} : {str(error)}",
+                               DECISION_DESTROY)
+
+    def _sample(self) -> tuple[int, int | None]:
+        base = os.path.join(self.sysfs_root, "class", "block", self.disk)
+        with open(os.path.join(base, "stat"), "r") as f:
+            fields = f.read().split()
+        sectors = int(fields[2]) + int(fields[6])
+        try:
+            with open(os.path.join(base, "device", "ioerr_cnt"), "r") as f:
+                errors = int(f.read().strip(), 16)
+        except (OSError, ValueError):
+            errors = None
+        return sectors, errors
+
+    def _run(self) -> None:
+        try:
+            sectors, errors = self._sample()
+        except (OSError, ValueError, IndexError) as e:
+            logging.error(f"Surveillance de /dev/{self.disk} impossible : {str(e)}")
+            return
+        last_change = time.monotonic()
+        history = deque([(last_change, sectors)])
+        while not self._stop.wait(self.interval):
+            try:
+                current, current_errors = self._sample()
+            except (OSError, ValueError, IndexError):
+                continue
+            now = time.monotonic()
+            if current != sectors:
+                sectors = current
+                last_change = now
+            elif now - last_change >= self.stall_timeout:
+                self.trip("stall", f"aucune E/S depuis {int(now - last_change)} s")
+                return
+            history.append((now, current))
+            while len(history) > 2 and now - history[1][0] >= self.slow_window:
+                history.popleft()
+            elapsed = now - history[0][0]
+            if elapsed >= self.slow_window:
+                rate = (current - history[0][1]) * 512 / elapsed
+                if rate < self.min_rate:
+                    self.trip("slow", f"débit de {rate / 1024:.0f} Ko/s sur {int(elapsed)} s")
+                    return
+            if current_errors is not None and errors is not None and current_errors > errors:
+                self.record("io_error", f"{current_errors - errors} erreur(s) d'E/S signalée(s) par le pilote")
+            errors = current_errors
+
+    def start(self) -> "HealthMonitor":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
@@ -0,0 +1,210 @@
+import os
+import errno
+import mmap
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from block_devices import SYSFS_ROOT, controller_of, disk_size
+from erase_patterns import get_profile, resolve_passes
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Échantillons de lecture : positions relatives sur le disque et volume lu à chaque position
+SAMPLE_OFFSETS = (0.0, 0.25, 0.5, 0.75, 0.99)
+SAMPLE_SIZE = 64 * 1024 * 1024
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Débit d'écriture supposé par rapport au débit de lecture mesuré (aucune écriture n'est faite)
+WRITE_READ_RATIO = 1.0
+
+def read_benchmark(device: str, offsets=SAMPLE_OFFSETS, sample_size: int = SAMPLE_SIZE,
+                   block_size: int = READ_BLOCK_SIZE) -> dict:
+    """
+    Lecture séquentielle non destructive à plusieurs positions du disque, en O_DIRECT
+    lorsque le noyau l'accepte (sinon après purge du cache de pages).
+
+    Returns:
+        dict: {"rate": octets/s moyen, "samples": [octets/s par position], "zero_ratio": part de blocs nuls lus}
+    """
+    path = device if device.startswith("/") else f"/dev/{device}"
+    flags = os.O_RDONLY | getattr(os, "O_DIRECT", 0)
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        fd = os.open(path, os.O_RDONLY)
+        flags = os.O_RDONLY
+    # Tampon aligné sur la page, requis par O_DIRECT
+    buffer = mmap.mmap(-1, block_size)
+    zero_block = bytes(block_size)
+    samples = []
+    zero_blocks = 0
+    total_blocks = 0
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        if not flags & getattr(os, "O_DIRECT", 0):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except (OSError, AttributeError):
+                pass
+        for fraction in offsets:
+            start = int(size * fraction) // block_size * block_size
+            length = min(sample_size, size - start) // block_size * block_size
+            if length <= 0:
+                continue
+            began = time.perf_counter()
+            done = 0
+            while done < length:
+                try:
+                    read = os.preadv(fd, [buffer], start + done)
+                except OSError as e:
+                    if e.errno != errno.EINVAL or not flags & getattr(os, "O_DIRECT", 0):
+                        raise
+                    # O_DIRECT refusé par ce périphérique : lectures classiques après purge du cache
+                    os.close(fd)
+                    fd = os.open(path, os.O_RDONLY)
+                    flags = os.O_RDONLY
+                    try:
+                        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                    except (OSError, AttributeError):
+                        pass
+                    continue
+                if read <= 0:
+                    break
+                total_blocks += 1
+                if buffer[:read] == zero_block[:read]:
+                    zero_blocks += 1
+                done += read
+            elapsed = time.perf_counter() - began
+            if done and elapsed > 0:
+                samples.append(done / elapsed)
+    finally:
+        buffer.close()
+        os.close(fd)
+    if not samples:
+        raise OSError(f"Aucune lecture possible sur {path}")
+    return {
+        "rate": sum(samples) / len(samples),
+        "samples": samples,
+        "zero_ratio": zero_blocks / total_blocks if total_blocks else 0.0,
+    }
+
+def schedule_for(settings: dict) -> dict:
+    """
+    Nombre de passes d'écriture et de lecture complètes qu'impliquent les paramètres d'un travail.
+    """
+    profile = settings.get("profile")
+    verify = settings.get("verify", False)
+    if profile:
+        info = get_profile(profile)
+        if info.get("crypto"):
+            return {"writes": 1, "reads": 0, "description": info["name"]}
+        verified = verify or info["verify"]
+        return {"writes": len(resolve_passes(info)), "reads": 1 if verified else 0, "description": info["name"]}
+    if settings.get("method") == "crypto":
+        # Remplissage du volume chiffré ; la vérification ne relit que l'en-tête
+        return {"writes": 1, "reads": 0, "description": f"Effacement cryptographique ({settings.get('fill', 'random')})"}
+    passes = settings.get("passes", 5)
+    zero_skip = settings.get("zero_skip", False)
+    writes = passes + (1 if verify and not zero_skip else 0)
+    return {
+        "writes": writes,
+        "reads": 1 if verify else 0,
+        "zero_skip": zero_skip,
+        "passes": passes,
+        "description": f"{passes} passes d'écrasement" + (" + passe à zéro" if verify or zero_skip else ""),
+    }
+
+def project_erasure(disks: list[str], settings_for, max_workers: int | None = None, log_func=None,
+                    sysfs_root: str = SYSFS_ROOT) -> dict:
+    """
+    Simulation sans écriture d'un lot d'effacements : mesure chaque disque seul, puis les disques
+    d'un même contrôleur ensemble, et projette la durée de chaque disque et du lot.
+
+    Args:
+        disks: Noms des disques (ex: 'sda')
+        settings_for: Fonction disque -> paramètres (method, passes, fill, verify, zero_skip, profile)
+        max_workers: Nombre maximal de disques traités simultanément (par défaut : tous)
+
+    Returns:
+        dict: {"disks": {disque: projection}, "controllers": {contrôleur: [disques]}, "total_seconds": durée du lot}
+    """
+    def log(message: str) -> None:
+        logging.info(message)
+        if log_func:
+            log_func(message)
+
+    disks = [disk.replace("/dev/", "") for disk in disks]
+    controllers = {}
+    for disk in disks:
+        controllers.setdefault(controller_of(disk, sysfs_root), []).append(disk)
+
+    solo = {}
+    zero_ratio = {}
+    for disk in disks:
+        log(f"Simulation : lecture de référence de /dev/{disk}...")
+        bench = read_benchmark(disk)
+        solo[disk] = bench["rate"]
+        zero_ratio[disk] = bench["zero_ratio"]
+
+    # Disques partageant un contrôleur : débit agrégé mesuré en lectures simultanées
+    shared = dict(solo)
+    for controller, members in controllers.items():
+        if len(members) < 2:
+            continue
+        log(f"Simulation : contrôleur {controller} partagé par {', '.join(members)}, mesure simultanée...")
+        with ThreadPoolExecutor(max_workers=len(members)) as executor:
+            rates = dict(zip(members, executor.map(lambda disk: read_benchmark(disk)["rate"], members)))
+        for disk in members:
+            shared[disk] = min(solo[disk], rates[disk])
+
+    projections = {}
+    for disk in disks:
+        schedule = schedule_for(settings_for(disk))
+        size = disk_size(disk, sysfs_root)
+        rate = shared[disk]
+        write_bytes = size * schedule["writes"]
+        read_bytes = size * schedule["reads"]
+        if schedule.get("zero_skip"):
+            # Passe à zéro rapide : tout est relu, seuls les blocs non nuls sont réécrits ; la part nulle
+            # échantillonnée ne compte que sans passe aléatoire préalable
+            skipped = zero_ratio[disk] if schedule["passes"] == 0 else 0.0
+            read_bytes += size
+            write_bytes += size * (1 - skipped)
+        seconds = write_bytes / (rate * WRITE_READ_RATIO) + read_bytes / rate
+        projections[disk] = {
+            "size": size,
+            "controller": controller_of(disk, sysfs_root),
+            "read_rate_solo": solo[disk],
+            "read_rate_shared": rate,
+            "zero_ratio": zero_ratio[disk],
+            "method": schedule["description"],
+            "seconds": seconds,
+        }
+
+    # Ordonnancement en file : chaque disque démarre dès qu'un emplacement se libère
+    workers = max_workers or len(disks)
+    slots = [0.0] * max(1, workers)
+    for disk in disks:
+        slot = slots.index(min(slots))
+        projections[disk]["start_seconds"] = slots[slot]
+        slots[slot] += projections[disk]["seconds"]
+        projections[disk]["end_seconds"] = slots[slot]
+    total = max(slots) if disks else 0.0
+    return {"disks": projections, "controllers": controllers, "total_seconds": total}
+
+def format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min" if hours else f"{minutes} min {secs:02d} s"
+
+def format_projection(report: dict) -> list[str]:
+    """Lignes lisibles du rapport de simulation."""
+    lines = []
+    for disk, projection in report["disks"].items():
+        lines.append(
+            f"/dev/{disk} : {projection['size'] / 1e9:.0f} Go, {projection['method']}, "
+            f"{projection['read_rate_shared'] / 1e6:.0f} Mo/s (seul : {projection['read_rate_solo'] / 1e6:.0f} Mo/s), "
+            f"contrôleur {projection['controller']}, fin estimée après {format_duration(projection['end_seconds'])}"
+        )
+    lines.append(f"Durée totale estimée : {format_duration(report['total_seconds'])}")
+    return lines
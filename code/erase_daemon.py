@@ -0,0 +1,522 @@
+import os
+import json
+import time
+import uuid
+import threading
+import socketserver
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from disk_operations import get_active_disk, get_device_graph, process_disk
+from disk_inventory import get_disk_identifiers
+from parallel_runner import AdmissionController, ThroughputSampler, SAMPLE_INTERVAL
+from erase_jobs import CancellationToken, EraseCancelled
+from erase_patterns import PROFILES
+from io_isolation import IsolationPolicy, RATE_UNIT
+from fleet_agent import publish_progress
+from crypto_profiles import CRYPTO_PROFILES, DEFAULT_CRYPTO_PROFILE
+from drive_health import HEALTH_POLICIES, DEFAULT_HEALTH_POLICY
+from partition_table import parse_target, TARGET_DISK
+from log_handler import log_info, log_error, session_start, session_end
+
+DEFAULT_SOCKET_PATH = "/run/disk_eraser.sock"
+DEFAULT_STATE_DIR = "/var/lib/disk_eraser"
+
+# Nombre maximal d'événements conservés en mémoire pour le flux de progression
+MAX_EVENTS = 10000
+
+# Identifiants comparés pour s'assurer que /dev/sdX désigne toujours le disque soumis
+IDENTITY_KEYS = ("wwn", "serial", "serial_long")
+
+# Statuts possibles d'un travail
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+JOB_DEFAULTS = {
+    "filesystem": "ext4",
+    "passes": 5,
+    "method": "overwrite",
+    "fill": "random",
+    "verify": False,
+    "zero_skip": False,
+    "profile": None,
+    "max_rate": None,
+    "crypto_profile": DEFAULT_CRYPTO_PROFILE,
+    "target": TARGET_DISK,
+    "unlock_hpa": False,
+    "health_policy": DEFAULT_HEALTH_POLICY,
+}
+
+class JobError(Exception):
+    """Levée lorsqu'un travail soumis est invalide ou refusé."""
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def same_disk(saved: dict, current: dict) -> bool:
+    """Vrai si les identifiants relevés à la soumission et ceux du disque présent concordent."""
+    common = [key for key in IDENTITY_KEYS if saved.get(key) and current.get(key)]
+    return bool(common) and all(saved[key] == current[key] for key in common)
+
+class EraseDaemon:
+    """
+    Service d'effacement longue durée : file de travaux persistante, workers et flux d'événements.
+
+    Les travaux survivent à la fermeture des clients (CLI, GUI) ; la file est sauvegardée
+    dans state_dir et rechargée au redémarrage du service. Un travail retient le WWN et le
+    numéro de série du disque soumis : au démarrage, le disque présent sous le même nom doit
+    les porter et ne pas être un disque système actif, sinon le travail échoue (les noms
+    sdX changent d'un démarrage à l'autre).
+    """
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR, runner=None, protected_disks=None,
+                 interval: float = SAMPLE_INTERVAL, io_policy: IsolationPolicy | None = None,
+                 identify=None) -> None:
+        self.state_dir = state_dir
+        self.state_path = os.path.join(state_dir, "jobs.json")
+        self.interval = interval
+        # Fonction d'effacement, disques protégés et identification remplaçables pour les tests sur périphériques loop
+        self.runner = runner or self._run_process_disk
+        self._protected_disks = protected_disks
+        self.identify = identify or get_disk_identifiers
+        self.io_policy = io_policy or IsolationPolicy()
+        self.jobs: dict[str, dict] = {}
+        # Jetons d'annulation des travaux en cours, indexés par identifiant de travail
+        self.tokens: dict[str, CancellationToken] = {}
+        self.order: list[str] = []
+        self.events: list[dict] = []
+        self.next_seq = 1
+        self.cond = threading.Condition()
+        self.stopping = False
+        self.controller = AdmissionController(max_workers=64)
+        self.sampler = ThroughputSampler()
+        self._load()
+
+    # --- Persistance ---
+
+    def _load(self) -> None:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            log_error(f"Impossible de relire la file de travaux {self.state_path} : {str(e)}")
+            return
+        for job in saved.get("jobs", []):
+            if job.get("status") == RUNNING:
+                # Un effacement interrompu par l'arrêt du service est repris depuis le début, après
+                # contrôle de l'identité du disque au démarrage (voir _dispatch_refusal)
+                job["status"] = QUEUED
+                job["message"] = "Repris après interruption du service"
+                log_info(f"Travail {job['id']} sur /dev/{job['device']} remis en file après interruption")
+            if job.get("status") == QUEUED:
+                job["restored"] = True
+            self.jobs[job["id"]] = job
+            self.order.append(job["id"])
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"jobs": [self.jobs[job_id] for job_id in self.order]}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            log_error(f"Impossible d'enregistrer la file de travaux : {str(e)}")
+
+    # --- Événements ---
+
+    def _emit(self, job_id: str | None, event_type: str, **data) -> None:
+        """Ajoute un événement au flux ; l'appelant doit détenir self.cond."""
+        event = {"seq": self.next_seq, "time": _now(), "job": job_id, "type": event_type}
+        event.update(data)
+        self.next_seq += 1
+        self.events.append(event)
+        if len(self.events) > MAX_EVENTS:
+            del self.events[:len(self.events) - MAX_EVENTS]
+        self.cond.notify_all()
+
+    def events_since(self, since: int, timeout: float) -> list[dict]:
+        """
+        Retourne les événements de numéro > since, en attendant au plus timeout secondes.
+        """
+        with self.cond:
+            if not self.events or self.events[-1]["seq"] <= since:
+                self.cond.wait(timeout)
+            return [event for event in self.events if event["seq"] > since]
+
+    def _set_status(self, job: dict, status: str, message: str = "") -> None:
+        job["status"] = status
+        if message:
+            job["message"] = message
+        if status == RUNNING:
+            job["started"] = _now()
+        elif status in FINISHED_STATES:
+            job["ended"] = _now()
+        self._emit(job["id"], "status", status=status, device=job["device"], message=message)
+        self._save()
+
+    # --- API ---
+
+    def protected_disks(self) -> set[str]:
+        if self._protected_disks is not None:
+            return set(self._protected_disks)
+        active = get_active_disk(graph=get_device_graph())
+        if not active:
+            raise JobError("Détection du disque système impossible : travail refusé", 503)
+        return set(active)
+
+    def submit(self, request: dict) -> dict:
+        """
+        Ajoute un travail à la file après validation et contrôle du disque actif.
+        """
+        device = str(request.get("device", "")).replace("/dev/", "")
+        if not device or "/" in device:
+            raise JobError("Périphérique manquant ou invalide")
+        if not os.path.exists(f"/dev/{device}"):
+            raise JobError(f"Périphérique /dev/{device} introuvable", 404)
+        settings = dict(JOB_DEFAULTS)
+        settings.update({key: request[key] for key in JOB_DEFAULTS if key in request})
+        if settings["method"] not in ("overwrite", "crypto") or settings["fill"] not in ("random", "zero"):
+            raise JobError("Méthode ou remplissage invalide")
+        if settings["filesystem"] not in ("ext4", "ntfs", "vfat"):
+            raise JobError("Système de fichiers invalide")
+        if not isinstance(settings["zero_skip"], bool) or not isinstance(settings["verify"], bool):
+            raise JobError("'verify' et 'zero_skip' doivent être des booléens")
+        # Une simple passe à zéro (passes = 0) n'est permise qu'avec zero_skip
+        min_passes = 0 if settings["zero_skip"] else 1
+        if not isinstance(settings["passes"], int) or settings["passes"] < min_passes:
+            raise JobError(f"Le nombre de passes doit être un entier >= {min_passes}")
+        if settings["profile"] is not None and settings["profile"] not in PROFILES:
+            raise JobError(f"Profil d'effacement inconnu : {settings['profile']}")
+        if settings["crypto_profile"] not in CRYPTO_PROFILES:
+            raise JobError(f"Profil cryptographique inconnu : {settings['crypto_profile']}")
+        max_rate = settings["max_rate"]
+        if max_rate is not None and (not isinstance(max_rate, (int, float)) or isinstance(max_rate, bool) or max_rate <= 0):
+            raise JobError("'max_rate' doit être un débit positif en Mo/s")
+        if not isinstance(settings["unlock_hpa"], bool):
+            raise JobError("'unlock_hpa' doit être un booléen")
+        if settings["health_policy"] not in HEALTH_POLICIES:
+            raise JobError(f"Politique de santé inconnue : {settings['health_policy']}")
+        try:
+            settings["target"] = parse_target(settings["target"])
+        except (ValueError, AttributeError):
+            raise JobError(f"Cible d'effacement invalide : {settings['target']} (disk, free ou partition:N)")
+        # Un effacement sélectif du disque actif est permis : la partition visée est contrôlée par process_disk
+        if settings["target"] == TARGET_DISK and device in self.protected_disks():
+            raise JobError(f"/dev/{device} est un disque système actif : effacement refusé", 403)
+        identity = {key: value for key, value in self.identify(device).items() if key in IDENTITY_KEYS}
+
+        with self.cond:
+            for job in self.jobs.values():
+                if job["device"] == device and job["status"] in (QUEUED, RUNNING):
+                    raise JobError(f"/dev/{device} a déjà un travail en cours ({job['id']})", 409)
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "device": device,
+                "identity": identity,
+                "settings": settings,
+                "operator": str(request.get("operator", "")),
+                "status": QUEUED,
+                "message": "",
+                "created": _now(),
+                "started": None,
+                "ended": None,
+                "cancel_requested": False,
+            }
+            self.jobs[job["id"]] = job
+            self.order.append(job["id"])
+            self._emit(job["id"], "status", status=QUEUED, device=device, message="")
+            self._save()
+        log_info(f"Travail {job['id']} soumis pour /dev/{device} par {job['operator'] or 'inconnu'}")
+        return dict(job)
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Annule un travail en file ; pour un travail en cours, tue ses commandes d'effacement
+        et le laisse se terminer avec le statut « cancelled ».
+        """
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None:
+                raise JobError(f"Travail {job_id} introuvable", 404)
+            if job["status"] == QUEUED:
+                self._set_status(job, CANCELLED, "Annulé avant démarrage")
+            elif job["status"] == RUNNING:
+                job["cancel_requested"] = True
+                self._emit(job_id, "cancel_requested", device=job["device"])
+                self._save()
+                token = self.tokens.get(job_id)
+                if token is not None:
+                    token.cancel()
+            log_info(f"Annulation demandée pour le travail {job_id} (/dev/{job['device']})")
+            return dict(job)
+
+    def list_jobs(self) -> list[dict]:
+        with self.cond:
+            return [dict(self.jobs[job_id]) for job_id in self.order]
+
+    def get_job(self, job_id: str) -> dict:
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None:
+                raise JobError(f"Travail {job_id} introuvable", 404)
+            return dict(job)
+
+    # --- Exécution ---
+
+    def _run_process_disk(self, job: dict, log_func, token: CancellationToken) -> None:
+        settings = job["settings"]
+        method = (f"Effacement cryptographique avec remplissage {settings['fill']}"
+                  if settings["method"] == "crypto" else f"{settings['passes']} passes d'écrasement")
+        profile = settings.get("profile")
+        if profile:
+            method = f"Profil {PROFILES[profile]['name']}"
+        # L'entrée du certificat est écrite par process_disk, avec le numéro de série, une fois l'effacement fait
+        identity = job.get("identity") or {}
+        disk_id = identity.get("wwn") or identity.get("serial") or identity.get("serial_long") or "identifiant inconnu"
+        log_info(f"Travail {job['id']} : début de l'effacement de /dev/{job['device']} ({disk_id}), {method}")
+        # Les plafonds de contrôleur sont partagés avec les travaux en cours au démarrage de celui-ci
+        max_rate = settings.get("max_rate")
+        with self.cond:
+            running = self._running_devices()
+        io_policy = self.io_policy.for_disks(running, {job["device"]: int(max_rate * RATE_UNIT)} if max_rate else None)
+        process_disk(
+            job["device"], settings["filesystem"], settings["passes"],
+            use_crypto=settings["method"] == "crypto", crypto_fill=settings["fill"],
+            log_func=log_func, verify=settings["verify"], token=token,
+            zero_skip=settings.get("zero_skip", False), profile=profile, io_policy=io_policy,
+            crypto_profile=settings.get("crypto_profile"), target=settings.get("target"),
+            unlock_hpa=settings.get("unlock_hpa", False),
+            health_policy=settings.get("health_policy")
+        )
+
+    def _worker(self, job: dict) -> None:
+        def log_func(message: str) -> None:
+            with self.cond:
+                self._emit(job["id"], "log", device=job["device"], message=message)
+        with self.cond:
+            token = self.tokens.setdefault(job["id"], CancellationToken())
+        try:
+            self.runner(job, log_func, token)
+            status, message = DONE, "Effacement terminé"
+        except EraseCancelled:
+            status, message = CANCELLED, "Annulé pendant l'effacement"
+        except SystemExit as e:
+            status, message = FAILED, f"Échec (code {e.code})"
+        except Exception as e:
+            status, message = FAILED, str(e)
+        with self.cond:
+            self.tokens.pop(job["id"], None)
+            self._set_status(job, status, message)
+        log_info(f"Travail {job['id']} sur /dev/{job['device']} : {status} ({message})")
+
+    def _dispatch_refusal(self, job: dict) -> str | None:
+        """
+        Motif de refus d'un travail au moment de son démarrage, None s'il peut démarrer : le disque
+        a disparu ou changé (autre WWN ou numéro de série sous le même nom), ou il est devenu
+        un disque système actif. Appelé sans self.cond : udevadm et la lecture de sysfs ne
+        bloquent ni les journaux des workers ni l'API.
+        """
+        device = job["device"]
+        if not os.path.exists(f"/dev/{device}"):
+            return f"/dev/{device} introuvable au démarrage du travail"
+        try:
+            if job["settings"].get("target") == TARGET_DISK and device in self.protected_disks():
+                return f"/dev/{device} est un disque système actif : effacement refusé"
+        except JobError as e:
+            return str(e)
+        saved = job.get("identity") or {}
+        if saved:
+            current = self.identify(device)
+            if not same_disk(saved, current):
+                return (f"/dev/{device} n'est plus le disque soumis (attendu {saved.get('wwn') or saved.get('serial')}, "
+                        f"trouvé {current.get('wwn') or current.get('serial') or 'inconnu'}) : travail à resoumettre")
+        elif job.get("restored"):
+            # Sans identifiant relevé, rien ne garantit que le nom désigne encore le même disque
+            return f"Identité de /dev/{device} inconnue après redémarrage du service : travail à resoumettre"
+        return None
+
+    def _running_devices(self) -> list[str]:
+        return [job["device"] for job in self.jobs.values() if job["status"] == RUNNING]
+
+    def dispatch_forever(self) -> None:
+        """
+        Démarre les travaux en file selon la limite de parallélisme adaptée au débit mesuré.
+        """
+        next_sample = time.monotonic() + self.interval
+        while True:
+            with self.cond:
+                if self.stopping:
+                    return
+                slots = max(0, self.controller.limit - len(self._running_devices()))
+                queued = [self.jobs[job_id] for job_id in self.order if self.jobs[job_id]["status"] == QUEUED]
+            # Contrôles hors verrou ; un travail refusé libère sa place pour le tour suivant
+            checked = [(job, self._dispatch_refusal(job)) for job in queued[:slots]]
+            with self.cond:
+                if self.stopping:
+                    return
+                slots = max(0, self.controller.limit - len(self._running_devices()))
+                refused = False
+                for job, refusal in checked:
+                    # Le travail a pu être annulé pendant les contrôles
+                    if job["status"] != QUEUED:
+                        continue
+                    if refusal is not None:
+                        self._set_status(job, FAILED, refusal)
+                        log_error(f"Travail {job['id']} refusé au démarrage : {refusal}")
+                        refused = True
+                        continue
+                    if not slots:
+                        break
+                    slots -= 1
+                    self._set_status(job, RUNNING)
+                    self.tokens[job["id"]] = CancellationToken()
+                    threading.Thread(target=self._worker, args=(job,), daemon=True).start()
+                if not refused:
+                    self.cond.wait(max(0.0, next_sample - time.monotonic()))
+            if time.monotonic() >= next_sample:
+                next_sample = time.monotonic() + self.interval
+                with self.cond:
+                    running = self._running_devices()
+                    pending = sum(1 for job in self.jobs.values() if job["status"] == QUEUED)
+                if running:
+                    rates, iowait = self.sampler.sample(running)
+                    self.controller.update(rates, iowait, pending, self.sampler.write_rates)
+                    publish_progress({"running": running, "queued": pending, "rates": rates, "iowait": iowait,
+                                      "parallelism": self.controller.limit})
+
+    def stop(self) -> None:
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    """
+    API de contrôle HTTP/JSON :
+        POST /jobs                 soumettre un travail
+        GET  /jobs, /jobs/<id>     consulter l'état
+        POST /jobs/<id>/cancel     annuler
+        GET  /events?since=N       flux de progression (une ligne JSON par événement)
+    """
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args) -> None:
+        # Les requêtes de contrôle ne sont pas journalisées (flux de progression très fréquent)
+        pass
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise JobError("Corps JSON invalide")
+        if not isinstance(payload, dict):
+            raise JobError("Le corps doit être un objet JSON")
+        return payload
+
+    def _handle(self, handler) -> None:
+        try:
+            status, payload = handler()
+            self._send_json(status, payload)
+        except JobError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self) -> None:
+        daemon = self.server.erase_daemon
+        path, _, query = self.path.partition("?")
+        parts = [part for part in path.split("/") if part]
+        if parts == ["jobs"]:
+            self._handle(lambda: (200, daemon.list_jobs()))
+        elif len(parts) == 2 and parts[0] == "jobs":
+            self._handle(lambda: (200, daemon.get_job(parts[1])))
+        elif parts == ["events"]:
+            self._stream_events(daemon, query)
+        else:
+            self._send_json(404, {"error": "Ressource inconnue"})
+
+    def do_POST(self) -> None:
+        daemon = self.server.erase_daemon
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["jobs"]:
+            self._handle(lambda: (201, daemon.submit(self._read_json())))
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            self._handle(lambda: (200, daemon.cancel(parts[1])))
+        else:
+            self._send_json(404, {"error": "Ressource inconnue"})
+
+    def _stream_events(self, daemon: EraseDaemon, query: str) -> None:
+        since = 0
+        for item in query.split("&"):
+            key, _, value = item.partition("=")
+            if key == "since" and value.isdigit():
+                since = int(value)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            while not daemon.stopping:
+                for event in daemon.events_since(since, timeout=15.0):
+                    self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+                    since = event["seq"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, state_dir: str = DEFAULT_STATE_DIR, daemon: EraseDaemon | None = None,
+          io_policy: IsolationPolicy | None = None) -> None:
+    """
+    Lance le service : répartiteur de travaux et API de contrôle sur un socket UNIX.
+    """
+    daemon = daemon or EraseDaemon(state_dir, io_policy=io_policy)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = _UnixHTTPServer(socket_path, ControlRequestHandler)
+    server.erase_daemon = daemon
+    os.chmod(socket_path, 0o660)
+    dispatcher = threading.Thread(target=daemon.dispatch_forever, daemon=True)
+    dispatcher.start()
+    log_info(f"Service d'effacement à l'écoute sur {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        daemon.stop()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        log_info("Service d'effacement arrêté")
+
+def run_daemon_mode(args) -> None:
+    """
+    Point d'entrée du mode service (--daemon).
+    """
+    session_start()
+    try:
+        serve(args.socket, args.state_dir, io_policy=getattr(args, "io_policy", None))
+    except KeyboardInterrupt:
+        log_info("Service d'effacement interrompu (Ctrl+C)")
+    except OSError as e:
+        log_error(f"Erreur système du service d'effacement : {str(e)}")
+    finally:
+        session_end()
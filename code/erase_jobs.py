@@ -0,0 +1,164 @@
+import os
+import signal
+import threading
+import subprocess
+from subprocess import CalledProcessError
+
+# Délai laissé à un processus enfant pour se terminer après SIGTERM avant SIGKILL
+TERMINATE_GRACE = 5.0
+
+# Statuts et codes de sortie d'un travail de disque
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_COMMAND_NOT_FOUND = 2
+EXIT_CANCELLED = 130
+
+class EraseCancelled(Exception):
+    """Levée dans le thread d'un disque lorsque son travail a été annulé."""
+
+class CancellationToken:
+    """
+    Jeton d'annulation d'un travail de disque.
+
+    Les processus enfants enregistrés (shred, dd, cryptsetup...) sont tués avec
+    leur groupe de processus dès l'annulation ; le thread du disque lève
+    EraseCancelled à son prochain point de contrôle. Lorsque le travail est isolé
+    (io_isolation.DiskIsolation), chaque processus enregistré rejoint le cgroup du disque.
+    Sous surveillance (drive_health.HealthMonitor), les moteurs par régions y trouvent les
+    délais et la politique du disque.
+    """
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: set[subprocess.Popen] = set()
+        self.isolation = None
+        self.health = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            _terminate(process)
+
+    def check(self) -> None:
+        """Lève EraseCancelled si le travail a été annulé."""
+        if self._event.is_set():
+            raise EraseCancelled("Travail annulé")
+
+    def wait(self, seconds: float) -> None:
+        """Attend la durée donnée en se réveillant dès l'annulation."""
+        self._event.wait(seconds)
+        self.check()
+
+    def register(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.add(process)
+        if self.isolation is not None:
+            self.isolation.attach(process.pid)
+        if self._event.is_set():
+            _terminate(process)
+
+    def unregister(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+def _terminate(process: subprocess.Popen) -> None:
+    """Termine un processus enfant et son groupe, puis le tue s'il ne s'arrête pas."""
+    def kill_group(sig) -> None:
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.poll() is not None:
+        return
+    kill_group(signal.SIGTERM)
+    def force_kill() -> None:
+        try:
+            process.wait(TERMINATE_GRACE)
+        except subprocess.TimeoutExpired:
+            kill_group(signal.SIGKILL)
+    threading.Thread(target=force_kill, daemon=True).start()
+
+def start_process(command: list[str], token: CancellationToken | None = None, **kwargs) -> subprocess.Popen:
+    """
+    Démarre un processus enfant dans sa propre session (Ctrl+C ne le tue pas) et l'associe au jeton.
+    """
+    process = subprocess.Popen(command, start_new_session=True, **kwargs)
+    if token is not None:
+        token.register(process)
+    return process
+
+def run_process(command: list[str], token: CancellationToken | None = None, log_func=None) -> None:
+    """
+    Exécute une commande en relayant sa sortie ligne par ligne vers log_func (ou stdout).
+
+    Raises:
+        EraseCancelled: Si le jeton a été annulé pendant l'exécution
+        CalledProcessError: Si la commande se termine avec un code non nul
+    """
+    if token is not None:
+        token.check()
+    process = start_process(command, token, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    try:
+        for line in process.stdout:
+            line = line.strip()
+            if line:
+                if log_func:
+                    log_func(line)
+                else:
+                    print(line)
+        process.wait()
+    finally:
+        if process.poll() is None:
+            _terminate(process)
+            process.wait()
+        if token is not None:
+            token.unregister(process)
+    if token is not None:
+        token.check()
+    if process.returncode != 0:
+        raise CalledProcessError(process.returncode, command[0])
+
+class JobResult:
+    """
+    Résultat typé du traitement d'un disque.
+    """
+    def __init__(self, disk: str, status: str, exit_code: int, message: str = "") -> None:
+        self.disk = disk
+        self.status = status
+        self.exit_code = exit_code
+        self.message = message
+
+    @property
+    def ok(self) -> bool:
+        return self.status == DONE
+
+    def __repr__(self) -> str:
+        return f"JobResult({self.disk!r}, {self.status!r}, {self.exit_code}, {self.message!r})"
+
+def result_from_future(disk: str, future) -> JobResult:
+    """
+    Convertit le futur d'un travail de disque en résultat typé, sans jamais propager l'erreur.
+    """
+    try:
+        value = future.result()
+    except EraseCancelled as e:
+        return JobResult(disk, CANCELLED, EXIT_CANCELLED, str(e))
+    except FileNotFoundError as e:
+        return JobResult(disk, FAILED, EXIT_COMMAND_NOT_FOUND, f"Commande requise introuvable : {str(e)}")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else EXIT_FAILED
+        return JobResult(disk, FAILED, code, f"Échec (code {e.code})")
+    except Exception as e:
+        return JobResult(disk, FAILED, EXIT_FAILED, str(e))
+    if value is False:
+        return JobResult(disk, FAILED, EXIT_FAILED, "Échec du traitement")
+    return JobResult(disk, DONE, EXIT_OK, "Effacement terminé")
@@ -0,0 +1,330 @@
+import os
+import mmap
+import bisect
+import hashlib
+import logging
+import itertools
+import threading
+from erase_jobs import CancellationToken
+from io_isolation import throttle
+from zero_fill import drop_cache
+from device_fill import open_direct
+from disk_verify import VerificationError
+from pattern_stream import PatternStream, new_seed, describe_stream, stream_sector_size, pattern_streams_available
+from region_erase import write_granularity, region_count, split_regions, ranges_size, describe_regions, RegionProgress, run_regions
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Taille d'une écriture : multiple de 1, 2 et 3 octets (motifs Gutmann) et de 4096 (secteurs)
+PATTERN_CHUNK_SIZE = 3 * 1024 * 1024
+
+# Types de passe
+FIXED = "fixed"
+COMPLEMENT = "complement"
+RANDOM = "random"
+
+class ProfileError(ValueError):
+    """Levée lorsqu'un profil d'effacement est inconnu ou mal défini."""
+
+def _gutmann_passes() -> list:
+    fixed = [b"\x55", b"\xaa", b"\x92\x49\x24", b"\x49\x24\x92", b"\x24\x92\x49"]
+    fixed += [bytes([value * 0x11]) for value in range(16)]
+    fixed += [b"\x92\x49\x24", b"\x49\x24\x92", b"\x24\x92\x49",
+              b"\x6d\xb6\xdb", b"\xb6\xdb\x6d", b"\xdb\x6d\xb6"]
+    return [(RANDOM,)] * 4 + [(FIXED, pattern) for pattern in fixed] + [(RANDOM,)] * 4
+
+# Profils normalisés : séquence de passes, passe de vérification, ou délégation à l'effacement cryptographique
+PROFILES = {
+    "dod-5220.22-m": {
+        "name": "DoD 5220.22-M",
+        "passes": [(FIXED, b"\x00"), (COMPLEMENT,), (RANDOM,)],
+        "verify": True,
+    },
+    "dod-5220.22-m-ece": {
+        "name": "DoD 5220.22-M ECE",
+        "passes": [(FIXED, b"\x00"), (COMPLEMENT,), (RANDOM,), (RANDOM,),
+                   (FIXED, b"\x00"), (COMPLEMENT,), (RANDOM,)],
+        "verify": True,
+    },
+    "gutmann": {
+        "name": "Gutmann",
+        "passes": _gutmann_passes(),
+        "verify": False,
+    },
+    "nist-800-88-clear": {
+        "name": "NIST SP 800-88 Clear",
+        "passes": [(FIXED, b"\x00")],
+        "verify": True,
+    },
+    # Pour NIST, l'écrasement ne vaut pas Purge : le profil utilise l'effacement cryptographique
+    "nist-800-88-purge": {
+        "name": "NIST SP 800-88 Purge (effacement cryptographique)",
+        "crypto": True,
+        "verify": True,
+    },
+}
+
+_buffers: dict[bytes, mmap.mmap] = {}
+_buffers_lock = threading.Lock()
+
+def pattern_buffer(pattern: bytes) -> mmap.mmap:
+    """
+    Retourne le tampon d'écriture d'un motif fixe, calculé une seule fois par session
+    et partagé en lecture seule (sans copie) par tous les disques. Alloué par mmap, il est
+    aligné sur la page comme l'exigent les écritures directes (O_DIRECT).
+    """
+    with _buffers_lock:
+        buffer = _buffers.get(pattern)
+        if buffer is None:
+            buffer = mmap.mmap(-1, PATTERN_CHUNK_SIZE)
+            buffer.write(pattern * (PATTERN_CHUNK_SIZE // len(pattern)))
+            _buffers[pattern] = buffer
+        return buffer
+
+def get_profile(key: str) -> dict:
+    profile = PROFILES.get(key)
+    if profile is None:
+        raise ProfileError(f"Profil d'effacement inconnu : {key} (disponibles : {', '.join(PROFILES)})")
+    return profile
+
+def resolve_passes(profile: dict) -> list:
+    """
+    Remplace les passes « complément » par le motif fixe complémentaire de la passe fixe précédente.
+    """
+    resolved = []
+    previous = None
+    for spec in profile.get("passes", []):
+        if spec[0] == COMPLEMENT:
+            if previous is None:
+                raise ProfileError(f"{profile['name']} : passe complément sans motif fixe précédent")
+            spec = (FIXED, bytes(~byte & 0xFF for byte in previous))
+        if spec[0] == FIXED:
+            previous = spec[1]
+        resolved.append(spec)
+    return resolved
+
+def prepare_profile(key: str) -> list:
+    """
+    Valide un profil et précalcule ses tampons de motifs avant le démarrage des disques.
+    """
+    passes = resolve_passes(get_profile(key))
+    for spec in passes:
+        if spec[0] == FIXED:
+            pattern_buffer(spec[1])
+    return passes
+
+def describe_pass(spec: tuple) -> str:
+    if spec[0] == RANDOM:
+        return "aléatoire"
+    return f"motif 0x{spec[1].hex().upper()}"
+
+def _device_path(device: str) -> str:
+    return device if device.startswith("/") else f"/dev/{device}"
+
+def run_profile_passes(device: str, key: str, log_func=None, token: CancellationToken | None = None,
+                       verify: bool | None = None, regions: int | None = None,
+                       ranges: list[tuple[int, int]] | None = None) -> int:
+    """
+    Écrit successivement toutes les passes d'un profil sur le disque, puis relit la dernière passe.
+
+    Returns:
+        int: Nombre de passes écrites
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        VerificationError: Si la relecture ne correspond pas à la dernière passe
+        OSError: En cas d'erreur d'écriture ou de lecture
+    """
+    profile = get_profile(key)
+    passes = prepare_profile(key)
+    verify = profile["verify"] if verify is None else verify
+    run_passes(device, passes, f"le profil {profile['name']}", log_func=log_func, token=token, verify=verify,
+               regions=regions, ranges=ranges)
+    return len(passes)
+
+def run_passes(device: str, passes: list, label: str, log_func=None, token: CancellationToken | None = None,
+               verify: bool = False, regions: int | None = None, ranges: list[tuple[int, int]] | None = None,
+               seed: bytes | None = None) -> bytes | None:
+    """
+    Écrit une séquence de passes (motifs fixes ou aléatoires) sur le disque.
+
+    Les passes fixes écrivent des tranches (memoryview) du tampon partagé. Les passes aléatoires
+    écrivent ce même tampon de zéros à travers un flux de motif (pattern_stream.PatternStream) :
+    le contenu de chaque passe ne dépend que de la graine, du numéro de passe et de la position,
+    si bien que la vérification le régénère sans rien avoir conservé. La graine est journalisée.
+    Sur les disques non rotatifs, chaque passe est écrite par régions parallèles (voir
+    region_erase), bornées sur PATTERN_CHUNK_SIZE pour conserver la phase des motifs ;
+    regions force le nombre de régions ; ranges limite les passes à des plages d'octets
+    du disque (partition, espace non alloué). Les écritures sont directes ou synchrones
+    (device_fill.open_direct) : une erreur du support est attribuée à la région écrite, que la
+    surveillance du disque réécrit ou réduit par dichotomie jusqu'au secteur du flux.
+
+    Sans cryptsetup ni device-mapper (et sans seed imposée), les passes aléatoires écrivent
+    des données de os.urandom, non rejouables ; la vérification d'une dernière passe aléatoire
+    relit alors l'empreinte de chaque bloc écrit.
+
+    Returns:
+        bytes: Graine des passes aléatoires (seed, ou tirée au hasard), None sans passe aléatoire
+               ou si elles ne sont pas rejouables
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        VerificationError: Si la relecture ne correspond pas à la dernière passe
+        CalledProcessError, FileNotFoundError: Si le flux d'une passe aléatoire ne peut être ouvert
+        OSError: En cas d'erreur d'écriture ou de lecture
+    """
+    path = _device_path(device)
+
+    def log(message: str) -> None:
+        logging.info(message)
+        if log_func:
+            log_func(message)
+
+    replayable = seed is not None or pattern_streams_available()
+    if any(spec[0] == RANDOM for spec in passes) and replayable:
+        seed = seed or new_seed()
+    else:
+        seed = None
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        total = size if ranges is None else ranges_size(ranges)
+        workers = region_count(path, total) if regions is None else regions
+        parts = split_regions(size, workers, PATTERN_CHUNK_SIZE, ranges)
+        log(f"Effacement de {path} selon {label} ({len(passes)} passes, {describe_regions(parts, workers)})...")
+        if seed is not None:
+            log(f"{path} : passes aléatoires rejouables, {describe_stream(seed, stream_sector_size(path, ranges))}")
+        elif any(spec[0] == RANDOM for spec in passes):
+            log(f"{path} : cryptsetup ou device-mapper indisponible, passes aléatoires tirées de os.urandom "
+                f"(non rejouables)")
+        digests = {}
+        for number, spec in enumerate(passes, start=1):
+            log(f"{path} : passe {number}/{len(passes)} ({describe_pass(spec)})")
+            urandom = spec[0] == RANDOM and seed is None
+            keep_digests = urandom and verify and number == len(passes)
+            view = memoryview(pattern_buffer(spec[1] if spec[0] == FIXED else b"\x00"))
+            progress = RegionProgress(f"{path} : passe {number}/{len(passes)}", total, log)
+            stream = PatternStream(path, seed, number, token, ranges).open() if spec[0] == RANDOM and not urandom else None
+            try:
+                target_path = stream.path if stream is not None else path
+                target, _ = open_direct(target_path)
+                try:
+                    def write_region(start: int, end: int, stop) -> None:
+                        # Passe os.urandom : tampon aligné propre à la région (O_DIRECT)
+                        buffer = mmap.mmap(-1, PATTERN_CHUNK_SIZE) if urandom else None
+                        try:
+                            offset = start
+                            while offset < end and not stop.is_set():
+                                if token is not None:
+                                    token.check()
+                                length = min(PATTERN_CHUNK_SIZE, end - offset)
+                                throttle(token, length)
+                                if buffer is not None:
+                                    data = os.urandom(length)
+                                    buffer[:length] = data
+                                    with memoryview(buffer) as chunk:
+                                        written = os.pwrite(target, chunk[:length], offset)
+                                else:
+                                    written = os.pwrite(target, view[:length], offset)
+                                if written != length:
+                                    raise OSError(f"Écriture incomplète sur {path} à l'octet {offset}")
+                                if keep_digests:
+                                    _record_digest(digests, offset, length, data)
+                                offset += length
+                                progress.add(length)
+                        finally:
+                            if buffer is not None:
+                                buffer.close()
+
+                    run_regions(parts, write_region, token, workers, sector_size=write_granularity(target_path))
+                    # Vide aussi le cache d'écriture du disque
+                    os.fsync(target)
+                finally:
+                    os.close(target)
+            finally:
+                if stream is not None:
+                    stream.close()
+
+        if verify and passes:
+            _verify_last_pass(fd, path, parts, workers, passes[-1], len(passes), seed, log, token, ranges, digests)
+    finally:
+        drop_cache(fd)
+        os.close(fd)
+    log(f"Effacement selon {label} terminé sur {path}")
+    return seed
+
+_digests_lock = threading.Lock()
+_digest_order = itertools.count()
+
+def _record_digest(digests: dict, offset: int, length: int, data: bytes) -> None:
+    """Retient l'empreinte d'un bloc aléatoire écrit, avec son ordre d'écriture."""
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    with _digests_lock:
+        digests[offset] = (length, digest, next(_digest_order))
+
+def _latest_blocks(digests: dict) -> list[tuple[int, int, bytes]]:
+    """
+    Blocs (position, longueur, empreinte) présents sur le disque : un bloc réécrit ensuite
+    (blocs réduits, dichotomie) remplace ceux qu'il recouvre.
+    """
+    blocks = sorted((offset, length, digest, order) for offset, (length, digest, order) in digests.items())
+    stale = set()
+    for index, (offset, length, _, order) in enumerate(blocks):
+        following = index + 1
+        while following < len(blocks) and blocks[following][0] < offset + length:
+            stale.add(index if blocks[following][3] > order else following)
+            following += 1
+    return [block[:3] for index, block in enumerate(blocks) if index not in stale]
+
+def _verify_digests(fd: int, path: str, parts: list, workers: int, digests: dict, log, token) -> None:
+    """Relit chaque bloc d'une passe os.urandom et compare son empreinte à celle de l'écriture."""
+    blocks = _latest_blocks(digests)
+    offsets = [block[0] for block in blocks]
+
+    def verify_region(start: int, end: int, stop) -> None:
+        for offset, length, digest in blocks[bisect.bisect_left(offsets, start):bisect.bisect_left(offsets, end)]:
+            if stop.is_set():
+                return
+            if token is not None:
+                token.check()
+            throttle(token, length, write=False)
+            if hashlib.blake2b(os.pread(fd, length, offset), digest_size=16).digest() != digest:
+                raise VerificationError(f"Contenu inattendu sur {path} dans le bloc commençant à l'octet {offset}")
+
+    run_regions(parts, verify_region, token, workers, retry=False)
+    log(f"{path} : vérification réussie ({sum(block[1] for block in blocks)} octets)")
+
+def _verify_last_pass(fd: int, path: str, parts: list, workers: int, spec: tuple, number: int, seed: bytes | None,
+                      log, token, ranges: list[tuple[int, int]] | None = None, digests: dict | None = None) -> None:
+    drop_cache(fd)
+    log(f"{path} : passe de vérification ({describe_pass(spec)})...")
+    if spec[0] == RANDOM and seed is None:
+        _verify_digests(fd, path, parts, workers, digests or {}, log, token)
+        return
+    # Passe aléatoire : relue à travers son flux, régénéré depuis la graine, elle doit redonner des zéros
+    stream = PatternStream(path, seed, number, token, ranges).open() if spec[0] == RANDOM else None
+    try:
+        source = os.open(stream.path, os.O_RDONLY) if stream is not None else fd
+        expected = memoryview(pattern_buffer(spec[1] if spec[0] == FIXED else b"\x00"))
+
+        def verify_region(start: int, end: int, stop) -> None:
+            offset = start
+            while offset < end and not stop.is_set():
+                if token is not None:
+                    token.check()
+                length = min(PATTERN_CHUNK_SIZE, end - offset)
+                throttle(token, length, write=False)
+                data = os.pread(source, length, offset)
+                if data != expected[:length]:
+                    raise VerificationError(f"Contenu inattendu sur {path} dans le bloc commençant à l'octet {offset}")
+                offset += length
+
+        try:
+            run_regions(parts, verify_region, token, workers, retry=False)
+        finally:
+            if stream is not None:
+                os.close(source)
+    finally:
+        if stream is not None:
+            stream.close()
+    log(f"{path} : vérification réussie ({ranges_size(parts)} octets)")
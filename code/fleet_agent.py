@@ -0,0 +1,200 @@
+import os
+import json
+import queue
+import socket
+import threading
+import http.client
+from datetime import datetime
+from log_handler import log_info, log_error
+
+# Port TCP par défaut du coordinateur de flotte
+DEFAULT_FLEET_PORT = 7475
+
+# Période d'envoi des enregistrements et de l'instantané de progression (secondes)
+FLUSH_INTERVAL = 2.0
+
+# Enregistrements conservés pendant une indisponibilité du coordinateur
+MAX_PENDING_RECORDS = 10000
+
+# Secret partagé entre le coordinateur et les postes, exigé en TCP (en-tête de chaque requête)
+FLEET_TOKEN_HEADER = "X-Fleet-Token"
+FLEET_TOKEN_ENV = "DISK_ERASER_FLEET_TOKEN"
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float | None = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def parse_address(address: str) -> tuple[str, str | int]:
+    """
+    Adresse du coordinateur : 'unix:/chemin/du/socket' (transport local, coordinateur et agents
+    sur la même machine) ou 'hôte[:port]' en TCP.
+
+    Returns:
+        tuple: ("unix", chemin) ou (hôte, port)
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, separator, port = address.rpartition(":")
+    if not separator:
+        return address, DEFAULT_FLEET_PORT
+    if not port.isdigit():
+        raise ValueError(f"Adresse de coordinateur invalide : {address}")
+    return host or "localhost", int(port)
+
+def fleet_token(value: str | None = None) -> str | None:
+    """Secret de flotte : valeur de --fleet-token, sinon variable d'environnement FLEET_TOKEN_ENV."""
+    return value or os.environ.get(FLEET_TOKEN_ENV) or None
+
+def connect(address: str, timeout: float | None = 10.0) -> http.client.HTTPConnection:
+    host, port = parse_address(address)
+    if host == "unix":
+        return _UnixHTTPConnection(port, timeout)
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+def request(address: str, method: str, path: str, payload=None, timeout: float | None = 10.0,
+            token: str | None = None):
+    """
+    Requête HTTP/JSON vers le coordinateur, authentifiée par le secret de flotte s'il est fourni.
+
+    Raises:
+        OSError: Si le coordinateur est injoignable ou refuse la requête
+    """
+    connection = connect(address, timeout)
+    try:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        if token:
+            headers[FLEET_TOKEN_HEADER] = token
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        data = json.loads(response.read().decode("utf-8") or "null")
+    except (http.client.HTTPException, json.JSONDecodeError) as e:
+        raise OSError(f"Réponse invalide du coordinateur {address} : {str(e)}")
+    finally:
+        connection.close()
+    if response.status >= 400:
+        raise OSError(data.get("error", f"Erreur HTTP {response.status}") if isinstance(data, dict) else f"Erreur HTTP {response.status}")
+    return data
+
+class FleetAgent:
+    """
+    Agent de poste : transmet au coordinateur de flotte les enregistrements d'effacement
+    (certificats) et le dernier instantané de progression, depuis un thread d'arrière-plan.
+
+    L'effacement n'attend jamais le coordinateur : les enregistrements sont mis en file et
+    renvoyés tant que le coordinateur est injoignable ; seul le dernier instantané est conservé.
+    """
+    def __init__(self, address: str, station: str | None = None, interval: float = FLUSH_INTERVAL,
+                 token: str | None = None) -> None:
+        parse_address(address)
+        self.address = address
+        self.token = token
+        self.station = station or socket.gethostname()
+        self.interval = interval
+        self._records: queue.Queue = queue.Queue(maxsize=MAX_PENDING_RECORDS)
+        self._progress = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._connected = None
+
+    def start(self) -> "FleetAgent":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        log_info(f"Agent de flotte : poste {self.station}, coordinateur {self.address}")
+        return self
+
+    def record(self, record: dict) -> None:
+        record = dict(record, station=self.station)
+        record.setdefault("time", datetime.now().isoformat(timespec="seconds"))
+        try:
+            self._records.put_nowait(record)
+        except queue.Full:
+            log_error(f"Agent de flotte : file pleine, enregistrement de {record.get('disk')} non transmis")
+
+    def progress(self, snapshot: dict) -> None:
+        with self._lock:
+            self._progress = dict(snapshot, station=self.station, time=datetime.now().isoformat(timespec="seconds"))
+
+    def flush(self) -> bool:
+        """
+        Envoie les enregistrements en attente et le dernier instantané.
+
+        Returns:
+            bool: False si le coordinateur est injoignable (les données restent en attente)
+        """
+        records = []
+        while True:
+            try:
+                records.append(self._records.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            snapshot, self._progress = self._progress, None
+        try:
+            if records:
+                request(self.address, "POST", "/records", {"station": self.station, "records": records}, token=self.token)
+                records = []
+            if snapshot is not None:
+                request(self.address, "POST", "/progress", snapshot, token=self.token)
+                snapshot = None
+            if self._connected is False:
+                log_info(f"Agent de flotte : coordinateur {self.address} de nouveau joignable")
+            self._connected = True
+            return True
+        except OSError as e:
+            # Ne journaliser qu'au début de l'indisponibilité
+            if self._connected is not False:
+                log_error(f"Agent de flotte : coordinateur {self.address} injoignable : {str(e)}")
+            self._connected = False
+            for record in records:
+                try:
+                    self._records.put_nowait(record)
+                except queue.Full:
+                    break
+            with self._lock:
+                if self._progress is None:
+                    self._progress = snapshot
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Arrête le thread d'envoi après une dernière transmission."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+_agent: FleetAgent | None = None
+
+def start_agent(address: str, station: str | None = None, token: str | None = None) -> FleetAgent:
+    """Démarre l'agent de flotte du processus ; les fonctions publish_* deviennent actives."""
+    global _agent
+    _agent = FleetAgent(address, station, token=token).start()
+    return _agent
+
+def stop_agent() -> None:
+    global _agent
+    if _agent is not None:
+        _agent.stop()
+        _agent = None
+
+def publish_record(record: dict) -> None:
+    """Transmet un enregistrement d'effacement au coordinateur (sans effet hors flotte)."""
+    if _agent is not None:
+        _agent.record(record)
+
+def publish_progress(snapshot: dict) -> None:
+    """Transmet un instantané de progression au coordinateur (sans effet hors flotte)."""
+    if _agent is not None:
+        _agent.progress(snapshot)
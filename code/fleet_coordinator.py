@@ -0,0 +1,265 @@
+import os
+import hmac
+import json
+import threading
+import socketserver
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from fleet_agent import parse_address, fleet_token, FLEET_TOKEN_HEADER
+from log_handler import log_info, log_error, session_start, session_end
+
+DEFAULT_FLEET_STATE_DIR = "/var/lib/disk_eraser/fleet"
+
+# Délai sans nouvelles au-delà duquel un poste est signalé hors ligne (secondes)
+STATION_TIMEOUT = 30.0
+
+class FleetCoordinator:
+    """
+    Coordinateur de flotte : agrège les instantanés de progression des postes et conserve
+    les enregistrements d'effacement (certificats) de toute la flotte.
+
+    Les enregistrements sont ajoutés à records.jsonl dans state_dir et rechargés au démarrage ;
+    les instantanés ne sont gardés qu'en mémoire.
+    """
+    def __init__(self, state_dir: str = DEFAULT_FLEET_STATE_DIR) -> None:
+        self.state_dir = state_dir
+        self.records_path = os.path.join(state_dir, "records.jsonl")
+        self.records: list[dict] = []
+        self.stations: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.records_path):
+            return
+        try:
+            with open(self.records_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.records.append(record)
+                        self._count(self._station(record.get("station") or "inconnu", seen=False), record)
+        except (OSError, json.JSONDecodeError) as e:
+            log_error(f"Coordinateur : enregistrements illisibles dans {self.records_path} : {str(e)}")
+        log_info(f"Coordinateur : {len(self.records)} enregistrement(s) rechargé(s)")
+
+    def _station(self, name: str, seen: bool = True) -> dict:
+        station = self.stations.get(name)
+        if station is None:
+            station = {"progress": None, "last_seen": None, "done": 0, "failed": 0, "cancelled": 0}
+            self.stations[name] = station
+        if seen:
+            station["last_seen"] = datetime.now().timestamp()
+        return station
+
+    @staticmethod
+    def _count(station: dict, record: dict) -> None:
+        status = record.get("status")
+        if status in ("done", "failed", "cancelled"):
+            station[status] += 1
+
+    def add_records(self, station_name: str, records: list) -> int:
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise ValueError("'records' doit être une liste d'objets")
+        with self.lock:
+            os.makedirs(self.state_dir, exist_ok=True)
+            station = self._station(station_name)
+            with open(self.records_path, "a", encoding="utf-8") as f:
+                for record in records:
+                    record = dict(record, station=record.get("station") or station_name, seq=len(self.records) + 1)
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    self.records.append(record)
+                    self._count(station, record)
+                f.flush()
+                os.fsync(f.fileno())
+        return len(records)
+
+    def set_progress(self, snapshot: dict) -> None:
+        station_name = snapshot.get("station")
+        if not station_name:
+            raise ValueError("'station' manquant")
+        with self.lock:
+            self._station(station_name)["progress"] = snapshot
+
+    def records_since(self, since: int = 0, station: str | None = None) -> list[dict]:
+        with self.lock:
+            return [record for record in self.records[since:] if station is None or record.get("station") == station]
+
+    def fleet_view(self) -> dict:
+        """
+        Vue agrégée : par poste, disques en cours et en attente, débit, bilan des effacements ;
+        puis les totaux de la flotte.
+        """
+        now = datetime.now().timestamp()
+        view = {"stations": {}, "totals": {"running": 0, "queued": 0, "throughput": 0.0,
+                                           "done": 0, "failed": 0, "cancelled": 0, "online": 0}}
+        with self.lock:
+            for name, station in sorted(self.stations.items()):
+                progress = station["progress"] or {}
+                rates = progress.get("rates") or {}
+                online = station["last_seen"] is not None and now - station["last_seen"] <= STATION_TIMEOUT
+                entry = {
+                    "online": online,
+                    "last_seen": datetime.fromtimestamp(station["last_seen"]).isoformat(timespec="seconds") if station["last_seen"] else None,
+                    "running": progress.get("running", []),
+                    "queued": progress.get("queued", 0),
+                    "rates": rates,
+                    "throughput": sum(rates.values()),
+                    "done": station["done"],
+                    "failed": station["failed"],
+                    "cancelled": station["cancelled"],
+                }
+                view["stations"][name] = entry
+                totals = view["totals"]
+                if online:
+                    totals["online"] += 1
+                    totals["running"] += len(entry["running"])
+                    totals["queued"] += entry["queued"]
+                    totals["throughput"] += entry["throughput"]
+                for key in ("done", "failed", "cancelled"):
+                    totals[key] += entry[key]
+        return view
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class _ThreadingTCPHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class FleetRequestHandler(BaseHTTPRequestHandler):
+    """
+    API HTTP/JSON du coordinateur :
+        POST /records      enregistrements d'effacement d'un poste ({"station", "records": [...]})
+        POST /progress     instantané de progression d'un poste
+        GET  /fleet        vue agrégée de la flotte
+        GET  /records      certificats (?since=N, ?station=NOM)
+
+    Si le serveur a un secret (server.token), toute requête doit le présenter dans l'en-tête
+    FLEET_TOKEN_HEADER, sinon elle est refusée (401).
+    """
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def address_string(self) -> str:
+        # Les connexions UNIX n'ont pas d'adresse (hôte, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length).decode("utf-8")) if length else {}
+        if not isinstance(payload, dict):
+            raise ValueError("Le corps doit être un objet JSON")
+        return payload
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if token is None:
+            return True
+        presented = self.headers.get(FLEET_TOKEN_HEADER) or ""
+        if hmac.compare_digest(presented.encode("utf-8"), token.encode("utf-8")):
+            return True
+        log_error(f"Coordinateur : requête {self.command} {self.path} refusée depuis {self.address_string()} (secret de flotte absent ou invalide)")
+        self._send_json(401, {"error": "Secret de flotte absent ou invalide"})
+        return False
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        coordinator = self.server.coordinator
+        path, _, query = self.path.partition("?")
+        params = dict(item.partition("=")[::2] for item in query.split("&") if item)
+        try:
+            if path == "/fleet":
+                self._send_json(200, coordinator.fleet_view())
+            elif path == "/records":
+                since = int(params.get("since") or 0)
+                self._send_json(200, coordinator.records_since(since, params.get("station") or None))
+            else:
+                self._send_json(404, {"error": "Ressource inconnue"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        coordinator = self.server.coordinator
+        try:
+            payload = self._read_json()
+            if self.path == "/records":
+                count = coordinator.add_records(str(payload.get("station", "")) or "inconnu", payload.get("records"))
+                self._send_json(201, {"accepted": count})
+            elif self.path == "/progress":
+                coordinator.set_progress(payload)
+                self._send_json(200, {"ok": True})
+            else:
+                self._send_json(404, {"error": "Ressource inconnue"})
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except OSError as e:
+            log_error(f"Coordinateur : écriture des enregistrements impossible : {str(e)}")
+            self._send_json(500, {"error": str(e)})
+
+def make_server(address: str, coordinator: FleetCoordinator, token: str | None = None) -> socketserver.BaseServer:
+    """
+    Serveur du coordinateur sur un socket UNIX ('unix:/chemin') ou TCP ('hôte:port').
+
+    Seul le socket UNIX (droits 0660) est sûr sans secret : en TCP, n'importe quel hôte du réseau
+    pourrait ajouter de faux certificats, le secret de flotte (token) y est donc obligatoire.
+
+    Raises:
+        ValueError: Adresse invalide, ou TCP sans secret de flotte
+    """
+    host, port = parse_address(address)
+    if host != "unix" and not token:
+        raise ValueError(f"Coordinateur en TCP ({address}) sans secret de flotte : utiliser --fleet-token "
+                         f"(ou un socket unix:/chemin)")
+    if host == "unix":
+        if os.path.exists(port):
+            os.unlink(port)
+        server = _ThreadingUnixHTTPServer(port, FleetRequestHandler)
+        os.chmod(port, 0o660)
+    else:
+        server = _ThreadingTCPHTTPServer((host, port), FleetRequestHandler)
+    server.coordinator = coordinator
+    server.token = token
+    return server
+
+def serve(address: str, state_dir: str = DEFAULT_FLEET_STATE_DIR, token: str | None = None) -> None:
+    coordinator = FleetCoordinator(state_dir)
+    server = make_server(address, coordinator, token)
+    log_info(f"Coordinateur de flotte à l'écoute sur {address} (enregistrements dans {coordinator.records_path})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        host, path = parse_address(address)
+        if host == "unix" and os.path.exists(path):
+            os.unlink(path)
+        log_info("Coordinateur de flotte arrêté")
+
+def run_coordinator_mode(args) -> None:
+    """
+    Point d'entrée du mode coordinateur (--fleet-serve).
+    """
+    session_start()
+    try:
+        serve(args.fleet_serve, args.state_dir or DEFAULT_FLEET_STATE_DIR, fleet_token(args.fleet_token))
+    except KeyboardInterrupt:
+        log_info("Coordinateur de flotte interrompu (Ctrl+C)")
+    except (OSError, ValueError) as e:
+        log_error(f"Erreur du coordinateur de flotte : {str(e)}")
+    finally:
+        session_end()
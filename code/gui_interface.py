@@ -5,19 +5,43 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from subprocess import CalledProcessError, SubprocessError
 from disk_erase import get_disk_serial, is_ssd
+from media_type import detect_media, is_flash_media, describe_media
 from utils import get_disk_list, get_base_disk
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from log_handler import (
     log_info, log_error, log_erase_operation,
     session_start, session_end, generate_session_pdf, generate_log_file_pdf
 )
-from disk_operations import get_active_disk, process_disk
+from disk_operations import get_active_disk, get_device_graph, process_disk
+from parallel_runner import run_adaptive
+from erase_jobs import CancellationToken, EraseCancelled, result_from_future, DONE, FAILED, CANCELLED
+from io_isolation import IsolationPolicy
+from erase_patterns import PROFILES, prepare_profile
+from daemon_client import DaemonClient, DaemonError
+from erase_daemon import DEFAULT_SOCKET_PATH
+from disk_classes import load_classes, classify_disk, describe_assignment, ClassificationError
 import threading
 from typing import Dict, List
 
+def describe_outcome(counts: Dict[str, int], total: int) -> str:
+    """Bilan des disques traités : effacés, en échec et annulés sont comptés séparément."""
+    summary = f"{sum(counts.values())}/{total} disques traités : {counts[DONE]} effacé(s)"
+    if counts[FAILED]:
+        summary += f", {counts[FAILED]} en échec"
+    if counts[CANCELLED]:
+        summary += f", {counts[CANCELLED]} annulé(s)"
+    return summary
+
 class DiskEraserGUI:
-    def __init__(self, root: tk.Tk) -> None:
+    def __init__(self, root: tk.Tk, socket_path: str = DEFAULT_SOCKET_PATH, io_policy: IsolationPolicy | None = None,
+                 classes_path: str | None = None) -> None:
         self.root = root
+        # Table de classification de la méthode « selon le type de disque » (emplacement par défaut si None)
+        self.classes_path = classes_path
+        self.disk_settings: Dict[str, dict] = {}
+        self.daemon_client = DaemonClient(socket_path)
+        # Les travaux d'effacement tournent avec des priorités réduites pour garder l'interface réactive
+        self.io_policy = io_policy or IsolationPolicy()
+        self.disk_io_policy = self.io_policy
         self.root.title("Effaceur de Disque Sécurisé")
         self.root.geometry("600x500")
         self.root.attributes("-fullscreen", True)
@@ -27,9 +51,14 @@ class DiskEraserGUI:
         self.passes_var = tk.StringVar(value="5")
         self.erase_method_var = tk.StringVar(value="overwrite")
         self.crypto_fill_var = tk.StringVar(value="random")
+        self.profile_var = tk.StringVar(value=PROFILES["dod-5220.22-m"]["name"])
         self.disks: List[Dict[str, str]] = []
         self.disk_progress: Dict[str, float] = {}
-        self.active_disk = get_active_disk()
+        self.tokens: Dict[str, CancellationToken] = {}
+        self.running_disks: List[str] = []
+        # Renseigné par la détection en arrière-plan, après le premier affichage de la fenêtre
+        self.active_disk = None
+        self.probing = False
         self.active_drive_logged = False
         session_start()
         if os.geteuid() != 0:
@@ -37,7 +66,7 @@ class DiskEraserGUI:
             root.destroy()
             sys.exit(1)
         self.create_widgets()
-        self.refresh_disks()
+        self.root.after_idle(self.refresh_disks)
 
     def create_widgets(self) -> None:
         main_frame = ttk.Frame(self.root, padding="10")
@@ -81,7 +110,9 @@ class DiskEraserGUI:
         method_label.pack(anchor="w", pady=(10, 5))
         methods = [
             ("Écrasement Standard", "overwrite"),
-            ("Effacement Cryptographique", "crypto")
+            ("Effacement Cryptographique", "crypto"),
+            ("Profil Normalisé", "profile"),
+            ("Selon le Type de Disque", "auto")
         ]
         for text, value in methods:
             rb = ttk.Radiobutton(
@@ -103,6 +134,13 @@ class DiskEraserGUI:
             rb = ttk.Radiobutton(self.crypto_fill_frame, text=text, value=value, variable=self.crypto_fill_var)
             rb.pack(anchor="w", padx=20, pady=2)
 
+        self.profile_frame = ttk.LabelFrame(options_frame, text="Profil Normalisé")
+        self.profile_combo = ttk.Combobox(
+            self.profile_frame, textvariable=self.profile_var, state="disabled",
+            values=[profile["name"] for profile in PROFILES.values()]
+        )
+        self.profile_combo.pack(fill=tk.X, padx=20, pady=2)
+
         fs_label = ttk.Label(options_frame, text="Choisir le Système de Fichiers :")
         fs_label.pack(anchor="w", pady=(10, 5))
         filesystems = [("ext4", "ext4"), ("NTFS", "ntfs"), ("FAT32", "vfat")]
@@ -116,6 +154,16 @@ class DiskEraserGUI:
         start_button = ttk.Button(options_frame, text="Démarrer l'Effacement", command=self.start_erasure)
         start_button.pack(pady=20, padx=10, fill=tk.X)
 
+        jobs_frame = ttk.LabelFrame(options_frame, text="Travaux en cours")
+        jobs_frame.pack(pady=5, padx=10, fill=tk.X)
+        self.running_var = tk.StringVar()
+        self.running_combo = ttk.Combobox(jobs_frame, textvariable=self.running_var, state="readonly", values=[])
+        self.running_combo.pack(fill=tk.X, padx=5, pady=5)
+        stop_button = ttk.Button(jobs_frame, text="Arrêter", command=self.stop_selected_disk)
+        stop_button.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.X, expand=True)
+        stop_all_button = ttk.Button(jobs_frame, text="Tout arrêter", command=self.stop_all_disks)
+        stop_all_button.pack(side=tk.RIGHT, padx=5, pady=5, fill=tk.X, expand=True)
+
         log_buttons_frame = ttk.Frame(options_frame)
         log_buttons_frame.pack(pady=5, padx=10, fill=tk.X)
         print_session_button = ttk.Button(log_buttons_frame, text="Imprimer Journal de Session", command=self.print_session_log)
@@ -146,16 +194,80 @@ class DiskEraserGUI:
         self.update_method_options()
 
     def refresh_disks(self) -> None:
+        """
+        Lance la détection des disques dans un thread ; la liste est affichée à la fin de la détection.
+        La fenêtre reste ainsi réactive sur les médias lents (ISO sur clé USB).
+        """
+        if self.probing:
+            return
+        self.probing = True
         for widget in self.scrollable_disk_frame.winfo_children():
             widget.destroy()
         self.disk_vars = {}
         self.disk_checkboxes = {}  # Clear checkbox references
+        ttk.Label(self.scrollable_disk_frame, text="Détection des disques en cours...").pack(pady=10)
+        self.status_var.set("Détection des disques...")
+        threading.Thread(target=self.probe_disks, daemon=True).start()
+
+    def probe_disks(self) -> None:
+        """Collecte les informations des disques hors du thread de l'interface."""
+        messages = []
         try:
-            self.disks = get_disk_list()
+            disks = get_disk_list()
         except Exception as e:
-            self.update_gui_log(str(e))
-            log_error(str(e))
-            self.disks = []
+            messages.append(str(e))
+            disks = []
+        # Graphe des périphériques construit une seule fois par actualisation
+        device_graph = get_device_graph() if disks else None
+        active_device = None
+        active_physical_drives = set()
+        if disks:
+            try:
+                active_device = get_active_disk(graph=device_graph)
+            except Exception as e:
+                messages.append(str(e))
+            for dev in active_device or []:
+                try:
+                    active_physical_drives.add(get_base_disk(dev))
+                except Exception as e:
+                    messages.append(str(e))
+        entries = []
+        for disk in disks:
+            device_name = disk['device'].replace('/dev/', '')
+            try:
+                disk_identifier = get_disk_serial(device_name)
+            except Exception:
+                disk_identifier = f"{device_name} (Numéro de série indisponible)"
+            try:
+                media = detect_media(device_name)
+                # Support non reconnu : ni SSD ni mécanique affirmé
+                is_device_ssd = None if media["media"] == "unknown" else is_flash_media(media)
+            except Exception as e:
+                messages.append(str(e))
+                media = None
+                is_device_ssd = None
+            try:
+                is_active = get_base_disk(device_name) in active_physical_drives
+            except Exception:
+                is_active = False
+            stacked = sorted(device_graph.descendants(device_name)) if device_graph else []
+            entries.append((disk, disk_identifier, is_device_ssd, is_active, stacked, media))
+        try:
+            self.root.after(0, self.show_disks, disks, active_device, active_physical_drives, entries, messages)
+        except (RuntimeError, tk.TclError):
+            # Fenêtre fermée pendant la détection
+            pass
+
+    def show_disks(self, disks: List[Dict[str, str]], active_device, active_physical_drives: set, entries: list, messages: List[str]) -> None:
+        self.probing = False
+        self.status_var.set("Prêt")
+        for message in messages:
+            self.update_gui_log(message)
+            log_error(message)
+        for widget in self.scrollable_disk_frame.winfo_children():
+            widget.destroy()
+        self.disks = disks
+        self.active_disk = active_device
         if not self.disks:
             no_disk_label = ttk.Label(self.scrollable_disk_frame, text="Aucun disque trouvé")
             no_disk_label.pack(pady=10)
@@ -164,20 +276,7 @@ class DiskEraserGUI:
             self.update_gui_log("Aucun disque trouvé.")
             log_info("Aucun disque trouvé lors de l'actualisation des disques")
             return
-        try:
-            active_device = get_active_disk()
-        except Exception as e:
-            self.update_gui_log(str(e))
-            log_error(str(e))
-            active_device = None
-        active_physical_drives = set()
         if active_device:
-            for dev in active_device:
-                try:
-                    active_physical_drives.add(get_base_disk(dev))
-                except Exception as e:
-                    self.update_gui_log(str(e))
-                    log_error(str(e))
             if not self.active_drive_logged and active_physical_drives:
                 log_info(f"Périphériques physiques actifs : {active_physical_drives}")
                 self.active_drive_logged = True
@@ -190,17 +289,7 @@ class DiskEraserGUI:
                 self.disclaimer_var.set("")
         else:
             self.disclaimer_var.set("")
-        has_ssd = False
-        for disk in self.disks:
-            device_name = disk['device'].replace('/dev/', '')
-            try:
-                if is_ssd(device_name):
-                    has_ssd = True
-                    break
-            except Exception as e:
-                self.update_gui_log(str(e))
-                log_error(str(e))
-        if has_ssd:
+        if any(entry[2] for entry in entries):
             self.ssd_disclaimer_var.set(
                 "AVERTISSEMENT : Périphériques SSD détectés. L'effacement multi-passes peut endommager les SSD "
                 "et NE PAS réaliser une suppression sécurisée des données à cause du nivellement de l'usure des SSD. "
@@ -208,7 +297,7 @@ class DiskEraserGUI:
             )
         else:
             self.ssd_disclaimer_var.set("")
-        for disk in self.disks:
+        for disk, disk_identifier, is_device_ssd, is_active, stacked, media in entries:
             disk_entry_frame = ttk.Frame(self.scrollable_disk_frame)
             disk_entry_frame.pack(fill=tk.X, pady=5, padx=2)
             checkbox_row = ttk.Frame(disk_entry_frame)
@@ -221,21 +310,7 @@ class DiskEraserGUI:
             # Store the checkbox reference
             self.disk_checkboxes[disk['device']] = cb
             
-            device_name = disk['device'].replace('/dev/', '')
-            try:
-                disk_identifier = get_disk_serial(device_name)
-            except Exception:
-                disk_identifier = f"{device_name} (Numéro de série indisponible)"
-            try:
-                is_device_ssd = is_ssd(device_name)
-                ssd_indicator = " (État solide)" if is_device_ssd else " (Mécanique)"
-            except Exception:
-                ssd_indicator = " (Type inconnu)"
-            try:
-                base_device_name = get_base_disk(device_name)
-                is_active = base_device_name in active_physical_drives
-            except Exception:
-                is_active = False
+            ssd_indicator = f" ({describe_media(media)})" if media else " (Type inconnu)"
             
             # Disable checkbox and change state for active disks
             if is_active:
@@ -247,7 +322,7 @@ class DiskEraserGUI:
             
             disk_label = disk.get('label', 'Inconnu')
             label_indicator = f" [Étiquette : {disk_label}]" if disk_label and disk_label != "No Label" else " [Aucune Étiquette]"
-            text_color = "red" if is_active else "blue" if 'is_device_ssd' in locals() and is_device_ssd else "black"
+            text_color = "red" if is_active else "blue" if is_device_ssd else "black"
             disk_id_label = ttk.Label(
                 checkbox_row, 
                 text=f"{disk_identifier}{ssd_indicator}{active_indicator}{label_indicator}",
@@ -257,9 +332,10 @@ class DiskEraserGUI:
             disk_id_label.pack(side=tk.LEFT, padx=5, fill=tk.X)
             details_row = ttk.Frame(disk_entry_frame)
             details_row.pack(fill=tk.X, padx=25)
+            stacked_indicator = f" - Volumes : {', '.join(stacked)}" if stacked else ""
             disk_details_label = ttk.Label(
                 details_row,
-                text=f"Taille : {disk['size']} - Modèle : {disk['model']}",
+                text=f"Taille : {disk['size']} - Modèle : {disk['model']}{stacked_indicator}",
                 wraplength=300,
                 foreground=text_color
             )
@@ -276,7 +352,7 @@ class DiskEraserGUI:
         active_disk_selected = False
         for disk in selected_disks:
             disk_name = disk.replace('/dev/', '')
-            if self.active_disk and any(active_disk in disk_name for active_disk in self.active_disk):
+            if self.active_disk and disk_name in self.active_disk:
                 active_disk_selected = True
                 break
         
@@ -291,8 +367,11 @@ class DiskEraserGUI:
             return
         
         erase_method = self.erase_method_var.get()
+        if erase_method == "auto" and not self.classify_selected(selected_disks):
+            return
         ssd_selected = False
-        if erase_method == "overwrite":
+        profile = self.selected_profile()
+        if erase_method == "overwrite" or (profile and not PROFILES[profile].get("crypto")):
             for disk in selected_disks:
                 disk_name = disk.replace('/dev/', '')
                 try:
@@ -322,7 +401,12 @@ class DiskEraserGUI:
                 disk_identifier = f"{disk_name} (Numéro de série indisponible)"
             disk_identifiers.append(disk_identifier)
             fs_choice = self.filesystem_var.get()
-            if erase_method == "crypto":
+            if erase_method == "auto":
+                method_description = self.disk_settings[disk]["description"]
+                disk_identifiers[-1] = f"{disk_identifier} : {method_description}"
+            elif erase_method == "profile":
+                method_description = f"profil {self.profile_var.get()}"
+            elif erase_method == "crypto":
                 fill_method = self.crypto_fill_var.get()
                 method_description = f"effacement cryptographique avec remplissage {fill_method}"
             else:
@@ -332,7 +416,11 @@ class DiskEraserGUI:
             except Exception:
                 pass
         disk_list = "\n".join(disk_identifiers)
-        if erase_method == "crypto":
+        if erase_method == "auto":
+            method_info = "avec la méthode choisie pour chacun selon son type"
+        elif erase_method == "profile":
+            method_info = f"selon le profil {self.profile_var.get()}"
+        elif erase_method == "crypto":
             fill_method = self.crypto_fill_var.get()
             method_info = f"en utilisant l'effacement cryptographique avec remplissage {fill_method}"
         else:
@@ -372,8 +460,42 @@ class DiskEraserGUI:
             messagebox.showerror("Erreur", str(e))
             self.status_var.set("Prêt")
 
+    def classify_selected(self, disks: List[str]) -> bool:
+        """
+        Choisit les réglages de chaque disque sélectionné d'après la table de classification
+        (self.disk_settings) ; False si la table est invalide ou si un disque n'est pas classé.
+        """
+        try:
+            classes = load_classes(self.classes_path)
+        except ClassificationError as e:
+            messagebox.showerror("Erreur", str(e))
+            log_error(str(e))
+            return False
+        self.disk_settings = {}
+        for disk in disks:
+            disk_name = disk.replace('/dev/', '')
+            assignment = classify_disk(disk_name, classes)
+            if assignment is None:
+                messagebox.showerror("Erreur", f"Aucune règle de classification ne correspond à {disk}.")
+                return False
+            settings = {"method": "overwrite", "passes": 3, "fill": "random", "verify": False, "zero_skip": False,
+                        "profile": None, "crypto_profile": None, "health_policy": None, "unlock_hpa": False}
+            settings.update(assignment["settings"])
+            settings["class"] = assignment["class"]
+            settings["description"] = describe_assignment(dict(assignment, settings=settings))
+            self.disk_settings[disk] = settings
+        return True
+
     def progress_state(self, disks: List[str], fs_choice: str, passes: int, erase_method: str) -> None:
-        if erase_method == "crypto":
+        if erase_method == "auto":
+            method_str = "la méthode de la classe de chaque disque"
+            for profile in {self.disk_settings[disk]["profile"] for disk in disks if self.disk_settings[disk]["profile"]}:
+                prepare_profile(profile)
+        elif erase_method == "profile":
+            method_str = f"profil {self.profile_var.get()}"
+            # Tampons des motifs fixes calculés une fois et partagés par tous les disques
+            prepare_profile(self.selected_profile())
+        elif erase_method == "crypto":
             fill_method = self.crypto_fill_var.get()
             method_str = f"effacement cryptographique avec remplissage {fill_method}"
         else:
@@ -385,33 +507,90 @@ class DiskEraserGUI:
         self.update_gui_log(fs_msg)
         log_info(fs_msg)
         total_disks = len(disks)
-        completed_disks = 0
+        outcomes = {DONE: 0, FAILED: 0, CANCELLED: 0}
+        # Si le service d'effacement tourne, lui confier les travaux : ils survivent à la fermeture de l'interface
+        if self.daemon_client.is_available():
+            self.progress_with_daemon(disks, fs_choice, passes, erase_method)
+            return
+        self.disk_progress = {disk: 0 for disk in disks}
+        # Un jeton d'annulation par disque, utilisé par les boutons « Arrêter » et « Tout arrêter »
+        self.tokens = {disk: CancellationToken() for disk in disks}
+        self.disk_io_policy = self.io_policy.for_disks(disks)
+        def on_disk_done(disk: str, future) -> None:
+            result = result_from_future(disk, future)
+            self.set_disk_running(disk, False)
+            outcomes[result.status] += 1
+            self.update_progress((sum(outcomes.values()) / total_disks) * 100)
+            self.status_var.set(describe_outcome(outcomes, total_disks))
+            if not result.ok:
+                self.update_gui_log(f"{disk} : {result.status} (code {result.exit_code}) {result.message}".rstrip())
+                log_error(f"{disk} : {result.status} (code {result.exit_code}) {result.message}".rstrip())
         try:
-            with ThreadPoolExecutor() as executor:
-                self.disk_progress = {disk: 0 for disk in disks}
-                futures = {executor.submit(self.process_disk_wrapper, disk, fs_choice, passes, erase_method): disk for disk in disks}
-                for future in as_completed(futures):
-                    disk = futures[future]
-                    try:
-                        future.result()
-                        completed_disks += 1
-                        self.update_progress((completed_disks / total_disks) * 100)
-                        self.status_var.set(f"Terminé {completed_disks}/{total_disks} disques")
-                    except Exception as e:
-                        self.update_gui_log(str(e))
-                        log_error(str(e))
+            # Le parallélisme s'adapte au débit mesuré au lieu d'un nombre fixe de workers
+            run_adaptive(
+                disks,
+                lambda disk: self.process_disk_wrapper(disk, fs_choice, passes, erase_method),
+                on_done=on_disk_done,
+                tokens=self.tokens
+            )
         except Exception as e:
             self.update_gui_log(str(e))
             log_error(str(e))
-        complete_msg = "Processus d'effacement terminé"
+        complete_msg = f"Processus d'effacement terminé ({describe_outcome(outcomes, total_disks)})"
         self.status_var.set(complete_msg)
         log_info(complete_msg)
         try:
-            messagebox.showinfo("Terminé", "L'opération d'effacement de disque est terminée !")
+            self.show_outcome(outcomes, total_disks)
         except Exception as e:
             self.update_gui_log(str(e))
             log_error(str(e))
 
+    def progress_with_daemon(self, disks: List[str], fs_choice: str, passes: int, erase_method: str) -> None:
+        fill_method = self.crypto_fill_var.get() if erase_method == "crypto" else "random"
+        job_ids = []
+        for disk in disks:
+            if erase_method == "auto":
+                settings = {key: value for key, value in self.disk_settings[disk].items()
+                            if key not in ("class", "description") and value is not None}
+            else:
+                settings = {"passes": passes, "method": erase_method if erase_method == "crypto" else "overwrite",
+                            "fill": fill_method, "profile": self.selected_profile()}
+            try:
+                job = self.daemon_client.submit(disk.replace('/dev/', ''), filesystem=fs_choice, **settings)
+                job_ids.append(job["id"])
+                self.update_gui_log(f"Travail {job['id']} soumis au service pour {disk}")
+            except DaemonError as e:
+                self.update_gui_log(f"Soumission refusée pour {disk} : {str(e)}")
+                log_error(f"Soumission refusée pour {disk} : {str(e)}")
+        if not job_ids:
+            self.status_var.set("Prêt")
+            return
+        outcomes = {DONE: 0, FAILED: 0, CANCELLED: 0}
+        def on_event(event: dict) -> None:
+            if event["type"] == "log":
+                self.update_gui_log(f"[{event['device']}] {event['message']}")
+            elif event["type"] == "status" and event["status"] in outcomes:
+                outcomes[event["status"]] += 1
+                self.update_progress((sum(outcomes.values()) / len(job_ids)) * 100)
+                self.status_var.set(describe_outcome(outcomes, len(job_ids)))
+                self.update_gui_log(f"[{event['device']}] {event['status']} {event.get('message', '')}")
+        try:
+            self.daemon_client.follow(job_ids, on_event)
+            self.status_var.set(f"Processus d'effacement terminé ({describe_outcome(outcomes, len(job_ids))})")
+            self.show_outcome(outcomes, len(job_ids))
+        except DaemonError as e:
+            self.update_gui_log(f"{str(e)} - les effacements continuent dans le service.")
+            log_error(str(e))
+
+    def show_outcome(self, outcomes: Dict[str, int], total: int) -> None:
+        """Message de fin : un avertissement si des disques ont échoué ou ont été annulés."""
+        if outcomes[FAILED] or outcomes[CANCELLED]:
+            messagebox.showwarning("Terminé avec des disques non effacés",
+                                   f"L'opération d'effacement est terminée : {describe_outcome(outcomes, total)}.\n"
+                                   "Consultez le journal pour le détail des disques en échec ou annulés.")
+        else:
+            messagebox.showinfo("Terminé", "L'opération d'effacement de disque est terminée !")
+
     def process_disk_wrapper(self, disk: str, fs_choice: str, passes: int, erase_method: str) -> None:
         disk_name = disk.replace('/dev/', '')
         try:
@@ -421,12 +600,63 @@ class DiskEraserGUI:
             self.status_var.set(f"Effacement {disk_name}...")
         def gui_log_callback(message: str) -> None:
             self.update_gui_log(message)
+        self.set_disk_running(disk, True)
         try:
+            if erase_method == "auto":
+                settings = self.disk_settings[disk]
+                profile = settings["profile"]
+                use_crypto = bool(PROFILES[profile].get("crypto")) if profile else settings["method"] == "crypto"
+                process_disk(disk_name, fs_choice, settings["passes"], use_crypto, settings["fill"], log_func=gui_log_callback,
+                             verify=settings["verify"], token=self.tokens.get(disk), zero_skip=settings["zero_skip"],
+                             profile=profile, io_policy=self.disk_io_policy, crypto_profile=settings["crypto_profile"],
+                             unlock_hpa=settings["unlock_hpa"], health_policy=settings["health_policy"])
+                return
             use_crypto = (erase_method == "crypto")
             crypto_fill = self.crypto_fill_var.get() if use_crypto else "random"
-            process_disk(disk_name, fs_choice, passes, use_crypto, crypto_fill, log_func=gui_log_callback)
+            process_disk(disk_name, fs_choice, passes, use_crypto, crypto_fill, log_func=gui_log_callback, token=self.tokens.get(disk),
+                         profile=self.selected_profile(), io_policy=self.disk_io_policy)
+        except EraseCancelled:
+            self.update_gui_log(f"Effacement de {disk} arrêté à la demande de l'utilisateur")
+            raise
         except Exception as e:
             self.update_gui_log(str(e))
+            raise
+
+    def set_disk_running(self, disk: str, running: bool) -> None:
+        if running and disk not in self.running_disks:
+            self.running_disks.append(disk)
+        elif not running and disk in self.running_disks:
+            self.running_disks.remove(disk)
+        def refresh() -> None:
+            self.running_combo.configure(values=list(self.running_disks))
+            if self.running_var.get() not in self.running_disks:
+                self.running_var.set(self.running_disks[0] if self.running_disks else "")
+        try:
+            self.root.after(0, refresh)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def stop_selected_disk(self) -> None:
+        disk = self.running_var.get()
+        token = self.tokens.get(disk)
+        if not disk or token is None or token.cancelled:
+            messagebox.showwarning("Avertissement", "Aucun effacement en cours sélectionné !")
+            return
+        if messagebox.askyesno("Arrêter l'effacement", f"Arrêter l'effacement de {disk} ?\n\nLe disque restera partiellement effacé."):
+            log_info(f"Arrêt demandé par l'utilisateur pour {disk}")
+            self.update_gui_log(f"Arrêt demandé pour {disk}...")
+            token.cancel()
+
+    def stop_all_disks(self) -> None:
+        pending = [disk for disk, token in self.tokens.items() if not token.cancelled]
+        if not pending:
+            messagebox.showwarning("Avertissement", "Aucun effacement en cours !")
+            return
+        if messagebox.askyesno("Arrêter les effacements", f"Arrêter l'effacement de {len(pending)} disque(s) ?\n\nLes disques resteront partiellement effacés."):
+            log_info("Arrêt de tous les effacements demandé par l'utilisateur")
+            self.update_gui_log("Arrêt de tous les effacements demandé...")
+            for disk in pending:
+                self.tokens[disk].cancel()
 
     def update_progress(self, value: float) -> None:
         try:
@@ -471,9 +701,23 @@ class DiskEraserGUI:
             log_error(str(e))
             self.status_var.set("Prêt")
 
+    def selected_profile(self) -> str | None:
+        """Retourne la clé du profil normalisé choisi, ou None hors méthode « profil »."""
+        if self.erase_method_var.get() != "profile":
+            return None
+        for key, profile in PROFILES.items():
+            if profile["name"] == self.profile_var.get():
+                return key
+        return None
+
     def update_method_options(self) -> None:
         method = self.erase_method_var.get()
         self.crypto_fill_frame.pack(fill=tk.X, pady=10, padx=5, after=self.passes_frame)
+        self.profile_frame.pack(fill=tk.X, pady=10, padx=5, after=self.crypto_fill_frame)
+        try:
+            self.profile_combo.configure(state="readonly" if method == "profile" else "disabled")
+        except tk.TclError:
+            pass
         for child in self.crypto_fill_frame.winfo_children():
             try:
                 child.configure(state="normal" if method == "crypto" else "disabled")
@@ -482,7 +726,7 @@ class DiskEraserGUI:
         for child in self.passes_frame.winfo_children():
             if isinstance(child, ttk.Entry):
                 try:
-                    child.configure(state="disabled" if method == "crypto" else "normal")
+                    child.configure(state="normal" if method == "overwrite" else "disabled")
                 except tk.TclError:
                     pass
 
@@ -490,6 +734,9 @@ class DiskEraserGUI:
         exit_message = "Application fermée par l'utilisateur via le bouton Quitter"
         log_info(exit_message)
         self.update_gui_log(exit_message)
+        # Ne pas laisser de shred ou dd orphelin : les processus enfants ne reçoivent pas les signaux du terminal
+        for token in self.tokens.values():
+            token.cancel()
         session_end()
         self.root.destroy()
 
@@ -500,10 +747,10 @@ class DiskEraserGUI:
         except tk.TclError:
             pass
 
-def run_gui_mode() -> None:
+def run_gui_mode(socket_path: str | None = None, io_policy: IsolationPolicy | None = None, classes_path: str | None = None) -> None:
     try:
         root = tk.Tk()
-        app = DiskEraserGUI(root)
+        app = DiskEraserGUI(root, socket_path or DEFAULT_SOCKET_PATH, io_policy, classes_path)
         root.mainloop()
     except tk.TclError as e:
         print(f"Erreur d'initialisation de l'interface graphique : {str(e)}")
@@ -0,0 +1,153 @@
+import os
+import re
+import logging
+from subprocess import CalledProcessError
+from block_devices import SYSFS_ROOT
+from erase_jobs import CancellationToken
+from utils import run_command
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Sortie de hdparm -N : « max sectors = courant/natif, HPA is enabled »
+_MAX_SECTORS = re.compile(r"max sectors\s*=\s*(\d+)\s*/\s*(\d+)")
+# Sortie de hdparm --dco-identify : capacité réelle du disque avant restriction DCO
+_DCO_MAX = re.compile(r"Real max sectors:\s*(\d+)")
+
+# Seuls les disques ATA (pilote sd, y compris derrière un pont SAT) connaissent HPA et DCO
+ATA_DISK = re.compile(r"^sd[a-z]+$")
+
+def _sector_size(disk: str, sysfs_root: str) -> int:
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", disk, "queue", "logical_block_size"), "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 512
+
+def parse_max_sectors(output: str) -> tuple[int, int] | None:
+    """Retourne (secteurs visibles, secteurs natifs) d'une sortie de hdparm -N."""
+    match = _MAX_SECTORS.search(output)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def parse_dco_max(output: str) -> int | None:
+    match = _DCO_MAX.search(output)
+    return int(match.group(1)) if match else None
+
+def probe_hidden_areas(disk: str, token: CancellationToken | None = None, runner=run_command,
+                       sysfs_root: str = SYSFS_ROOT) -> dict:
+    """
+    Compare la capacité visible d'un disque ATA à sa capacité native (HPA, hdparm -N) et à sa
+    capacité réelle avant restriction DCO (hdparm --dco-identify).
+
+    Les commandes passent par runner (run_command par défaut), remplaçable pour les essais.
+
+    Returns:
+        dict: {"supported", "sector_size", "current", "native", "dco_max", "hpa", "dco",
+               "hpa_bytes", "dco_bytes", "error"} (secteurs logiques, octets cachés)
+    """
+    disk = disk.replace("/dev/", "")
+    status = {"supported": False, "sector_size": _sector_size(disk, sysfs_root), "current": None, "native": None,
+              "dco_max": None, "hpa": False, "dco": False, "hpa_bytes": 0, "dco_bytes": 0, "error": None}
+    if not ATA_DISK.match(disk):
+        status["error"] = "disque non ATA"
+        return status
+    try:
+        sectors = parse_max_sectors(runner(["hdparm", "-N", f"/dev/{disk}"], token))
+    except (CalledProcessError, FileNotFoundError) as e:
+        status["error"] = f"hdparm -N indisponible : {str(e)}"
+        return status
+    if sectors is None:
+        status["error"] = "capacité native non rapportée par le disque"
+        return status
+    current, native = sectors
+    status.update(supported=True, current=current, native=native, hpa=native > current,
+                  hpa_bytes=max(0, native - current) * status["sector_size"])
+    try:
+        dco_max = parse_dco_max(runner(["hdparm", "--dco-identify", f"/dev/{disk}"], token))
+    except (CalledProcessError, FileNotFoundError):
+        dco_max = None
+    if dco_max is not None:
+        # Certains disques rapportent le dernier LBA adressable plutôt qu'un nombre de secteurs
+        status["dco_max"] = dco_max
+        status["dco"] = dco_max > native + 1
+        status["dco_bytes"] = max(0, dco_max - native) * status["sector_size"] if status["dco"] else 0
+    return status
+
+def set_max_sectors(disk: str, sectors: int, token: CancellationToken | None = None, runner=run_command,
+                    sysfs_root: str = SYSFS_ROOT) -> int:
+    """
+    Fixe la capacité visible du disque de manière volatile (hdparm -N sans préfixe p : le réglage
+    disparaît à la mise hors tension), puis fait relire sa taille au noyau.
+
+    Returns:
+        int: Taille du disque en octets vue par le noyau après la relecture
+
+    Raises:
+        CalledProcessError, FileNotFoundError: Si hdparm échoue ou est introuvable
+        OSError: Si la taille ne peut pas être relue
+    """
+    disk = disk.replace("/dev/", "")
+    runner(["hdparm", "--yes-i-know-what-i-am-doing", "-N", str(sectors), f"/dev/{disk}"], token)
+    with open(os.path.join(sysfs_root, "class", "block", disk, "device", "rescan"), "w") as f:
+        f.write("1")
+    with open(os.path.join(sysfs_root, "class", "block", disk, "size"), "r") as f:
+        return int(f.read().strip()) * 512
+
+def describe_hidden_areas(status: dict) -> str:
+    """Résumé lisible de l'état des zones cachées, pour le journal et le certificat."""
+    if not status["supported"]:
+        return f"zones cachées non vérifiées ({status['error']})"
+    parts = []
+    if status["hpa"]:
+        parts.append(f"HPA de {status['hpa_bytes'] // (1024 * 1024)} Mo"
+                     + (" retirée temporairement et effacée" if status.get("unlocked") else " non effacée"))
+    if status["dco"]:
+        parts.append(f"DCO masquant {status['dco_bytes'] // (1024 * 1024)} Mo (non modifiée)")
+    return ", ".join(parts) if parts else "aucune zone cachée (HPA/DCO)"
+
+def unlock_hpa(disk: str, status: dict, token: CancellationToken | None = None, runner=run_command,
+               sysfs_root: str = SYSFS_ROOT, log_func=None) -> bool:
+    """
+    Retire temporairement la HPA détectée par probe_hidden_areas pour que l'effacement couvre
+    la capacité native. status["unlocked"] est positionné en cas de succès.
+
+    Returns:
+        bool: True si la capacité native est désormais visible
+    """
+    if not status["hpa"]:
+        return False
+    try:
+        size = set_max_sectors(disk, status["native"], token, runner, sysfs_root)
+    except (CalledProcessError, FileNotFoundError, OSError, ValueError) as e:
+        message = f"Retrait de la HPA de /dev/{disk} impossible : {str(e)}"
+        logging.error(message)
+        if log_func:
+            log_func(message)
+        return False
+    status["changed"] = True
+    expected = status["native"] * status["sector_size"]
+    status["unlocked"] = size >= expected
+    message = (f"HPA de /dev/{disk} retirée temporairement : {size // (1024 * 1024)} Mo visibles"
+               if status["unlocked"] else
+               f"HPA de /dev/{disk} : le noyau voit encore {size // (1024 * 1024)} Mo sur {expected // (1024 * 1024)} Mo")
+    logging.info(message)
+    if log_func:
+        log_func(message)
+    return status["unlocked"]
+
+def restore_hpa(disk: str, status: dict, token: CancellationToken | None = None, runner=run_command,
+                sysfs_root: str = SYSFS_ROOT, log_func=None) -> None:
+    """
+    Rétablit la capacité visible d'origine après l'effacement, afin que la table de partitions
+    soit créée pour la taille que le disque présentera après sa prochaine mise sous tension.
+    """
+    if not status.get("changed") or status.get("restored"):
+        return
+    status["restored"] = True
+    try:
+        set_max_sectors(disk, status["current"], token, runner, sysfs_root)
+        message = f"HPA de /dev/{disk} rétablie ({status['current']} secteurs visibles)"
+    except (CalledProcessError, FileNotFoundError, OSError, ValueError) as e:
+        message = f"Rétablissement de la HPA de /dev/{disk} impossible (elle reviendra à la mise hors tension) : {str(e)}"
+    logging.info(message)
+    if log_func:
+        log_func(message)
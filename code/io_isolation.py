@@ -0,0 +1,322 @@
+import os
+import time
+import ctypes
+import logging
+import platform
+import threading
+from block_devices import SYSFS_ROOT, controller_of
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_NAME = "disk_eraser"
+
+# Priorités par défaut des travaux d'effacement : le système live, la GUI et le disque
+# racine restent prioritaires sur les écritures massives
+DEFAULT_NICE = 10
+DEFAULT_IONICE_LEVEL = 7
+DEFAULT_IO_WEIGHT = 50
+
+# Unité des débits saisis par l'utilisateur (Mo/s)
+RATE_UNIT = 1024 * 1024
+
+# ioprio_set(2) / ioprio_get(2) : pas d'appel dans le module os
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASS_BE = 2
+IOPRIO_SYSCALLS = {
+    "x86_64": (251, 252),
+    "i686": (289, 290),
+    "aarch64": (30, 31),
+    "armv7l": (314, 315),
+    "ppc64le": (273, 274),
+    "riscv64": (30, 31),
+    "s390x": (282, 283),
+}
+
+class IsolationPolicy:
+    """
+    Réglages d'isolation des travaux d'effacement : priorités CPU et E/S des threads et
+    commandes de chaque disque, poids et plafonds de débit de leur cgroup.
+
+    Les plafonds sont en octets/s. Le plafond d'un contrôleur est partagé à parts égales
+    entre les disques sélectionnés qui y sont raccordés.
+    """
+    def __init__(self, nice: int = DEFAULT_NICE, ionice_level: int = DEFAULT_IONICE_LEVEL,
+                 io_weight: int = DEFAULT_IO_WEIGHT, default_limit: int | None = None,
+                 disk_limits: dict | None = None, controller_limits: dict | None = None,
+                 disks: list[str] | None = None, sysfs_root: str = SYSFS_ROOT) -> None:
+        if not -20 <= nice <= 19:
+            raise ValueError(f"Priorité nice invalide : {nice} (-20 à 19)")
+        if not 0 <= ionice_level <= 7:
+            raise ValueError(f"Niveau ionice invalide : {ionice_level} (0 à 7)")
+        if not 1 <= io_weight <= 10000:
+            raise ValueError(f"Poids d'E/S invalide : {io_weight} (1 à 10000)")
+        self.nice = nice
+        self.ionice_level = ionice_level
+        self.io_weight = io_weight
+        self.default_limit = default_limit
+        self.disk_limits = {disk.replace("/dev/", ""): limit for disk, limit in (disk_limits or {}).items()}
+        self.controller_limits = dict(controller_limits or {})
+        self.disks = [disk.replace("/dev/", "") for disk in disks or []]
+        self.sysfs_root = sysfs_root
+
+    def for_disks(self, disks: list[str], disk_limits: dict | None = None) -> "IsolationPolicy":
+        """
+        Copie de la politique pour une sélection de disques (partage des plafonds de contrôleur),
+        avec d'éventuels plafonds propres à certains disques.
+        """
+        limits = dict(self.disk_limits)
+        limits.update({disk.replace("/dev/", ""): limit for disk, limit in (disk_limits or {}).items() if limit})
+        return IsolationPolicy(self.nice, self.ionice_level, self.io_weight, self.default_limit,
+                               limits, self.controller_limits, disks, self.sysfs_root)
+
+    def limit_for(self, disk: str) -> int | None:
+        """Plafond de débit du disque en octets/s, ou None sans plafond."""
+        disk = disk.replace("/dev/", "")
+        limits = []
+        own = self.disk_limits.get(disk, self.default_limit)
+        if own:
+            limits.append(own)
+        if self.controller_limits:
+            controller = controller_of(disk, self.sysfs_root)
+            shared = self.controller_limits.get(controller)
+            if shared:
+                peers = [peer for peer in set(self.disks) | {disk} if controller_of(peer, self.sysfs_root) == controller]
+                limits.append(shared // len(peers))
+        return min(limits) if limits else None
+
+def parse_rate(value: str) -> int:
+    """Convertit un débit en Mo/s (ex: '150' ou '2.5') en octets/s."""
+    rate = float(value)
+    if rate <= 0:
+        raise ValueError(f"Débit invalide : {value} (Mo/s strictement positif)")
+    return int(rate * RATE_UNIT)
+
+def parse_limits(values: list[str] | None) -> tuple[int | None, dict]:
+    """
+    Analyse des plafonds saisis comme 'MO/S' (tous les disques) ou 'NOM=MO/S'.
+
+    Returns:
+        tuple: (plafond par défaut ou None, {nom: plafond})
+    """
+    default = None
+    limits = {}
+    for value in values or []:
+        name, separator, rate = value.rpartition("=")
+        if separator:
+            limits[name.replace("/dev/", "")] = parse_rate(rate)
+        else:
+            default = parse_rate(rate)
+    return default, limits
+
+def policy_from_args(args) -> IsolationPolicy:
+    """Politique d'isolation construite à partir des options de la ligne de commande."""
+    default_limit, disk_limits = parse_limits(getattr(args, "max_rate", None))
+    _, controller_limits = parse_limits(getattr(args, "controller_max_rate", None))
+    return IsolationPolicy(
+        nice=getattr(args, "nice", DEFAULT_NICE),
+        ionice_level=getattr(args, "ionice", DEFAULT_IONICE_LEVEL),
+        io_weight=getattr(args, "io_weight", DEFAULT_IO_WEIGHT),
+        default_limit=default_limit,
+        disk_limits=disk_limits,
+        controller_limits=controller_limits,
+    )
+
+def cgroup_v2_available(cgroup_root: str = CGROUP_ROOT) -> bool:
+    """Vrai si la hiérarchie cgroup v2 est montée avec le contrôleur io."""
+    try:
+        with open(os.path.join(cgroup_root, "cgroup.controllers"), "r") as f:
+            return "io" in f.read().split()
+    except OSError:
+        return False
+
+def _write(path: str, value: str) -> None:
+    with open(path, "w") as f:
+        f.write(value)
+
+def _ioprio(function: int, value: int | None = None) -> int:
+    numbers = IOPRIO_SYSCALLS.get(platform.machine())
+    if numbers is None:
+        raise OSError(f"ioprio non pris en charge sur {platform.machine()}")
+    libc = ctypes.CDLL(None, use_errno=True)
+    tid = threading.get_native_id()
+    if function == 0:
+        result = libc.syscall(numbers[0], IOPRIO_WHO_PROCESS, tid, value)
+    else:
+        result = libc.syscall(numbers[1], IOPRIO_WHO_PROCESS, tid)
+    if result < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+    return result
+
+def io_stat(cgroup_path: str, major_minor: str) -> dict | None:
+    """Compteurs io.stat d'un cgroup pour un périphérique (rbytes, wbytes, rios, wios...)."""
+    try:
+        with open(os.path.join(cgroup_path, "io.stat"), "r") as f:
+            for line in f:
+                fields = line.split()
+                if fields and fields[0] == major_minor:
+                    return {key: int(value) for key, value in (field.split("=", 1) for field in fields[1:])}
+    except (OSError, ValueError):
+        return None
+    return {}
+
+_active: dict[str, "DiskIsolation"] = {}
+_active_lock = threading.Lock()
+
+class DiskIsolation:
+    """
+    Isolation d'un travail de disque.
+
+    Le thread du disque reçoit la priorité nice et ionice de la politique, héritée par les
+    commandes qu'il lance (shred, dd, cryptsetup). Ces commandes sont placées dans le cgroup
+    v2 du disque, limité par io.weight et io.max. Les moteurs natifs (passe à zéro, profils),
+    qui écrivent depuis les threads du processus, respectent le même plafond par cadencement.
+    """
+    def __init__(self, disk: str, policy: IsolationPolicy | None = None, cgroup_root: str = CGROUP_ROOT,
+                 log_func=None) -> None:
+        self.disk = disk.replace("/dev/", "")
+        self.policy = policy or IsolationPolicy()
+        self.limit = self.policy.limit_for(self.disk)
+        self.cgroup_root = cgroup_root
+        self.cgroup_path = None
+        self.log_func = log_func
+        self._lock = threading.Lock()
+        self._next = {True: 0.0, False: 0.0}
+        self._native = {"rbytes": 0, "wbytes": 0}
+        self._saved_priority = None
+        self._saved_ioprio = None
+        with open(os.path.join(self.policy.sysfs_root, "class", "block", self.disk, "dev"), "r") as f:
+            self.major_minor = f.read().strip()
+
+    def _log(self, message: str) -> None:
+        logging.info(message)
+        if self.log_func:
+            self.log_func(message)
+
+    def start(self) -> "DiskIsolation":
+        """Applique les priorités au thread courant et crée le cgroup du disque si possible."""
+        tid = threading.get_native_id()
+        try:
+            self._saved_priority = os.getpriority(os.PRIO_PROCESS, tid)
+            os.setpriority(os.PRIO_PROCESS, tid, self.policy.nice)
+        except OSError as e:
+            logging.warning(f"Priorité nice non appliquée pour {self.disk} : {str(e)}")
+        try:
+            self._saved_ioprio = _ioprio(1)
+            _ioprio(0, (IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT) | self.policy.ionice_level)
+        except OSError as e:
+            logging.warning(f"Priorité ionice non appliquée pour {self.disk} : {str(e)}")
+
+        if cgroup_v2_available(self.cgroup_root):
+            try:
+                self.cgroup_path = self._create_cgroup()
+            except OSError as e:
+                logging.warning(f"cgroup d'E/S non créé pour {self.disk} : {str(e)}")
+                self.cgroup_path = None
+        else:
+            logging.warning(f"cgroup v2 (contrôleur io) indisponible : {self.disk} isolé par priorités et cadencement seulement")
+
+        limit = f", plafond {self.limit / RATE_UNIT:.0f} Mo/s" if self.limit else ""
+        where = f"cgroup {self.cgroup_path}" if self.cgroup_path else "sans cgroup"
+        self._log(f"Isolation de /dev/{self.disk} : nice {self.policy.nice}, ionice best-effort "
+                  f"{self.policy.ionice_level}, poids {self.policy.io_weight}{limit} ({where})")
+        with _active_lock:
+            _active[self.disk] = self
+        return self
+
+    def _create_cgroup(self) -> str:
+        parent = os.path.join(self.cgroup_root, CGROUP_NAME)
+        os.makedirs(parent, exist_ok=True)
+        # Le contrôleur io doit être délégué de la racine jusqu'aux cgroups des disques
+        for directory in (self.cgroup_root, parent):
+            with open(os.path.join(directory, "cgroup.subtree_control"), "r") as f:
+                enabled = f.read().split()
+            if "io" not in enabled:
+                _write(os.path.join(directory, "cgroup.subtree_control"), "+io")
+        path = os.path.join(parent, self.disk)
+        os.makedirs(path, exist_ok=True)
+        _write(os.path.join(path, "io.weight"), f"default {self.policy.io_weight}")
+        rate = str(self.limit) if self.limit else "max"
+        _write(os.path.join(path, "io.max"), f"{self.major_minor} rbps={rate} wbps={rate}")
+        return path
+
+    def attach(self, pid: int) -> None:
+        """Place un processus enfant dans le cgroup du disque."""
+        if self.cgroup_path is None:
+            return
+        try:
+            _write(os.path.join(self.cgroup_path, "cgroup.procs"), str(pid))
+        except (ProcessLookupError, OSError) as e:
+            logging.warning(f"Processus {pid} non placé dans le cgroup de {self.disk} : {str(e)}")
+
+    def account(self, nbytes: int, write: bool = True) -> float:
+        """
+        Comptabilise une E/S d'un moteur natif et retourne le délai à respecter (en secondes)
+        pour rester sous le plafond du disque.
+        """
+        with self._lock:
+            self._native["wbytes" if write else "rbytes"] += nbytes
+            if not self.limit:
+                return 0.0
+            now = time.monotonic()
+            self._next[write] = max(self._next[write], now) + nbytes / self.limit
+            return self._next[write] - now
+
+    def stats(self) -> dict:
+        """Octets lus et écrits sur le disque : cgroup (commandes) et moteurs natifs."""
+        with self._lock:
+            totals = dict(self._native)
+        if self.cgroup_path is not None:
+            counters = io_stat(self.cgroup_path, self.major_minor) or {}
+            totals["rbytes"] += counters.get("rbytes", 0)
+            totals["wbytes"] += counters.get("wbytes", 0)
+        return totals
+
+    def close(self) -> dict:
+        """Restaure les priorités du thread, supprime le cgroup et retourne le bilan des E/S."""
+        with _active_lock:
+            if _active.get(self.disk) is self:
+                del _active[self.disk]
+        totals = self.stats()
+        tid = threading.get_native_id()
+        if self._saved_priority is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, tid, self._saved_priority)
+            except OSError:
+                pass
+        if self._saved_ioprio is not None:
+            try:
+                _ioprio(0, self._saved_ioprio)
+            except OSError:
+                pass
+        if self.cgroup_path is not None:
+            try:
+                os.rmdir(self.cgroup_path)
+            except OSError as e:
+                logging.warning(f"cgroup {self.cgroup_path} non supprimé : {str(e)}")
+        self._log(f"Bilan E/S de /dev/{self.disk} : {totals['wbytes'] // RATE_UNIT} Mo écrits, "
+                  f"{totals['rbytes'] // RATE_UNIT} Mo lus")
+        return totals
+
+def throttle(token, nbytes: int, write: bool = True) -> None:
+    """
+    Cadence un moteur natif selon le plafond du disque associé au jeton ; l'attente
+    est interrompue par l'annulation.
+    """
+    isolation = getattr(token, "isolation", None)
+    if isolation is None:
+        return
+    delay = isolation.account(nbytes, write)
+    if delay > 0:
+        token.wait(delay)
+
+def isolated_io_bytes(disk: str) -> tuple[int, int] | None:
+    """(octets lus, octets écrits) par le travail isolé en cours sur le disque, ou None."""
+    with _active_lock:
+        isolation = _active.get(disk.replace("/dev/", ""))
+    if isolation is None:
+        return None
+    totals = isolation.stats()
+    return totals["rbytes"], totals["wbytes"]
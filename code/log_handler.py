@@ -32,21 +32,19 @@ logger.setLevel(logging.INFO)
 session_handler = SessionCapturingHandler()
 logger.addHandler(session_handler)
 
-try:
-    log_handler = logging.FileHandler(log_file)
-    log_handler.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s - %(message)s')
-    log_handler.setFormatter(formatter)
-    logger.addHandler(log_handler)
-except PermissionError:
-    print("Erreur : Permission refusée. Veuillez exécuter le script avec sudo.", file=sys.stderr)
-    sys.exit(1)  # Quitter le script pour imposer l'utilisation de sudo
-except FileNotFoundError:
+# Le fichier de log n'est ouvert qu'au premier message (delay=True) pour ne pas ralentir le démarrage ;
+# les droits sont vérifiés dès maintenant par de simples appels stat
+if not os.path.isdir(os.path.dirname(log_file)):
     print(f"Erreur : Le répertoire de log n'existe pas : {os.path.dirname(log_file)}", file=sys.stderr)
     sys.exit(1)
-except OSError as e:
-    print(f"Erreur : Impossible de créer le gestionnaire de log : {e}", file=sys.stderr)
-    sys.exit(1)
+if not os.access(log_file if os.path.exists(log_file) else os.path.dirname(log_file), os.W_OK):
+    print("Erreur : Permission refusée. Veuillez exécuter le script avec sudo.", file=sys.stderr)
+    sys.exit(1)  # Quitter le script pour imposer l'utilisation de sudo
+log_handler = logging.FileHandler(log_file, delay=True)
+log_handler.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(message)s')
+log_handler.setFormatter(formatter)
+logger.addHandler(log_handler)
 
 
 def log_info(message: str) -> None:
@@ -61,9 +59,17 @@ def log_warning(message: str) -> None:
     """Enregistrer un message d'avertissement dans la console et le fichier de log."""
     logger.warning(message)
 
-def log_erase_operation(disk_id: str, filesystem: str, method: str) -> None:
-    """Enregistrer une opération d'effacement détaillée avec identifiant de disque stable."""
+def log_erase_operation(disk_id: str, filesystem: str, method: str, profile: str | None = None,
+                        unsanitized: str | None = None) -> None:
+    """
+    Enregistrer une opération d'effacement détaillée avec identifiant de disque stable.
+    unsanitized liste les LBA restés non effacés (carte d'erreurs) : le disque doit alors être détruit.
+    """
     message = f"Opération d'effacement pour l'ID disque : {disk_id}. Système de fichiers : {filesystem}. Méthode d'effacement : {method}"
+    if profile:
+        message += f". Profil : {profile}"
+    if unsanitized:
+        message += f". LBA non effacés : {unsanitized}. Disque à orienter vers la destruction physique"
     logger.info(message)
 
 def log_disk_completed(disk_id: str) -> None:
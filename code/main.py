@@ -2,8 +2,12 @@
 import os
 import sys
 from argparse import ArgumentParser
-from cli_interface import run_cli_mode
-from gui_interface import run_gui_mode
+from erase_patterns import PROFILES
+from crypto_profiles import CRYPTO_PROFILES, DEFAULT_CRYPTO_PROFILE
+from drive_health import HEALTH_POLICIES, DEFAULT_HEALTH_POLICY
+
+# Les interfaces sont importées à la demande : le mode CLI ou batch ne charge pas tkinter,
+# et le fichier de log n'est ouvert qu'au premier message
 
 def main():
     parser = ArgumentParser(description="Outil sécurisé d'effacement de disque")
@@ -12,16 +16,74 @@ def main():
     parser.add_argument('-p', '--passes', type=int, default=5, help="Nombre de passes pour l'effacement")
     parser.add_argument('--crypto', action='store_true', help="Utiliser l'effacement cryptographique à la place de la méthode multi-passes standard")
     parser.add_argument('--zero', action='store_true', help="Remplir le disque chiffré avec des zéros au lieu de données aléatoires")
+    parser.add_argument('--target', default='disk', metavar='CIBLE', help="Cible de l'effacement (CLI) : 'disk' (disque entier, défaut), 'free' (espace non alloué) ou 'partition:N' ; la table de partitions et les autres partitions sont conservées")
+    parser.add_argument('--unlock-hpa', action='store_true', help="Retirer temporairement la zone cachée HPA des disques ATA pour l'effacer avec le reste du disque (rétablie avant le partitionnement)")
+    parser.add_argument('--health-policy', choices=list(HEALTH_POLICIES), default=DEFAULT_HEALTH_POLICY, help="Traitement d'un disque défaillant (SMART en échec, blocage, débit effondré, erreur d'E/S) : 'skip' (ignoré), 'quarantine' (ignoré et refusé ensuite), 'retry' (régions en erreur réécrites par blocs réduits, défaut), 'map' (secteurs défaillants isolés, sautés et listés au certificat) ou 'destroy' (déclaré à détruire physiquement)")
+    parser.add_argument('--crypto-profile', choices=list(CRYPTO_PROFILES), default=DEFAULT_CRYPTO_PROFILE, help="Réglages dm-crypt de l'effacement cryptographique : 'fast' (PBKDF2 minimal, secteurs 4K, AES-XTS, sans files de travail) ou 'default' (défaut : fast)")
+    parser.add_argument('--classes', nargs='?', const='', metavar='FICHIER', help="Choisir la méthode de chaque disque (CLI) selon son type (transport, rotation, fabricant/modèle, capacité) d'après une table de classification JSON/YAML (défaut : /etc/disk_eraser/classes.json, sinon table intégrée) ; dans la GUI, table de la méthode « Selon le Type de Disque »")
+    parser.add_argument('--select', metavar='CRITÈRES', help="Sélectionner les disques à effacer (CLI) par critères au lieu de leurs noms, ex. \"transport=usb,sata model='^ST4000' size=100G-2T path='pci-0000:03:00.0-*'\" (critères : transport, media, vendor, model, size, path) ; le lot est confirmé en une seule fois")
+    parser.add_argument('--profile', choices=list(PROFILES), help="Effacer selon un profil normalisé (DoD 5220.22-M, Gutmann, NIST 800-88) au lieu des passes et de la méthode")
+    parser.add_argument('--dry-run', action='store_true', help="Simuler sans écrire (CLI et batch) : mesure de lecture et durée projetée de l'effacement")
+    parser.add_argument('--nice', type=int, default=10, help="Priorité CPU (nice) des travaux d'effacement (défaut : 10)")
+    parser.add_argument('--ionice', type=int, default=7, help="Niveau ionice best-effort des travaux d'effacement, 0 à 7 (défaut : 7)")
+    parser.add_argument('--io-weight', type=int, default=50, help="Poids io.weight du cgroup de chaque disque, 1 à 10000 (défaut : 50)")
+    parser.add_argument('--max-rate', action='append', metavar='[DISQUE=]MO/S', help="Plafond de débit par disque en Mo/s, pour tous les disques ou un seul (répétable)")
+    parser.add_argument('--controller-max-rate', action='append', metavar='CONTRÔLEUR=MO/S', help="Plafond de débit d'un contrôleur (adresse PCI) partagé entre ses disques (répétable)")
+    parser.add_argument('--batch', metavar='MANIFESTE', help="Exécuter sans interaction les effacements décrits dans un manifeste JSON/YAML")
+    parser.add_argument('--results', metavar='FICHIER', help="Fichier de résultats JSON du mode batch")
+    parser.add_argument('--daemon', action='store_true', help="Lancer le service d'effacement (file de travaux et API de contrôle)")
+    parser.add_argument('--socket', help="Socket UNIX de l'API de contrôle du service (défaut : /run/disk_eraser.sock)")
+    parser.add_argument('--state-dir', help="Répertoire de la file de travaux persistante du service (défaut : /var/lib/disk_eraser) ou des enregistrements du coordinateur (défaut : /var/lib/disk_eraser/fleet)")
+    parser.add_argument('--fleet', metavar='ADRESSE', help="Transmettre enregistrements et progression au coordinateur de flotte (hôte:port ou unix:/chemin)")
+    parser.add_argument('--station', help="Nom du poste auprès du coordinateur de flotte (défaut : nom d'hôte)")
+    parser.add_argument('--fleet-serve', metavar='ADRESSE', help="Lancer le coordinateur de flotte sur cette adresse (hôte:port ou unix:/chemin)")
+    parser.add_argument('--fleet-token', metavar='SECRET', help="Secret partagé entre le coordinateur et les postes, obligatoire en TCP (défaut : variable DISK_ERASER_FLEET_TOKEN)")
     args = parser.parse_args()
 
+    from io_isolation import policy_from_args
+    from partition_table import parse_target
+    try:
+        args.io_policy = policy_from_args(args)
+        args.target = parse_target(args.target)
+    except ValueError as e:
+        parser.error(str(e))
+
     if os.geteuid() != 0:
         print("Ce programme doit être exécuté avec les privilèges administrateur (root) !")
         sys.exit(1)
 
-    if args.cli:
+    if args.fleet_serve:
+        from fleet_coordinator import run_coordinator_mode
+        run_coordinator_mode(args)
+        return
+
+    if args.fleet:
+        from fleet_agent import start_agent, stop_agent, fleet_token
+        try:
+            start_agent(args.fleet, args.station, fleet_token(args.fleet_token))
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        run_mode(args)
+    finally:
+        if args.fleet:
+            stop_agent()
+
+def run_mode(args) -> None:
+    if args.daemon:
+        from erase_daemon import run_daemon_mode, DEFAULT_SOCKET_PATH, DEFAULT_STATE_DIR
+        args.socket = args.socket or DEFAULT_SOCKET_PATH
+        args.state_dir = args.state_dir or DEFAULT_STATE_DIR
+        run_daemon_mode(args)
+    elif args.batch:
+        from batch_interface import run_batch_mode
+        run_batch_mode(args)
+    elif args.cli:
+        from cli_interface import run_cli_mode
         run_cli_mode(args)
     else:
-        run_gui_mode()
+        from gui_interface import run_gui_mode
+        run_gui_mode(args.socket, args.io_policy, args.classes or None)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import os
+import re
+import math
+from block_devices import SYSFS_ROOT, device_name_from_path, get_parent_disk
+
+# Types de support d'un disque
+MEDIA_HDD = "hdd"
+MEDIA_SSD = "ssd"
+MEDIA_NVME = "nvme"
+MEDIA_FLASH = "flash"
+MEDIA_UNKNOWN = "unknown"
+MEDIA_TYPES = (MEDIA_HDD, MEDIA_SSD, MEDIA_NVME, MEDIA_FLASH, MEDIA_UNKNOWN)
+
+# Supports sans plateaux : ni passes multiples utiles, ni écriture séquentielle imposée
+FLASH_MEDIA = (MEDIA_SSD, MEDIA_NVME, MEDIA_FLASH)
+
+MEDIA_LABELS = {
+    MEDIA_HDD: "Mécanique",
+    MEDIA_SSD: "État solide",
+    MEDIA_NVME: "NVMe",
+    MEDIA_FLASH: "Clé/carte flash",
+    MEDIA_UNKNOWN: "Type inconnu",
+}
+
+# Page VPD B1 (Block Device Characteristics) : vitesse de rotation du support, octets 4-5
+VPD_NON_ROTATING = 0x0001
+VPD_MIN_RPM = 0x0401
+
+# Poids des indices, en log-cote en faveur d'un support sans plateaux (négatif : rotatif)
+WEIGHT_VPD = 4.0
+WEIGHT_NONROTATIONAL = 2.5
+WEIGHT_ROTATIONAL = -1.5
+# Les ponts USB-stockage déclarent rotational=1 quel que soit le support : indice presque nul
+WEIGHT_ROTATIONAL_USB = -0.3
+WEIGHT_REMOVABLE_USB = 2.0
+WEIGHT_MODEL = 2.0
+
+FLASH_MODELS = re.compile(
+    r"SSD|Solid.?State|NVMe|Flash|Cruzer|DataTraveler|Ultra.?Fit|JetFlash|USB.?DISK|Pen.?Drive|"
+    r"SD.?Card|Card.?Reader|MicroSD|eMMC|Optane", re.IGNORECASE)
+HDD_MODELS = re.compile(
+    r"^(WDC )?WD\d|^ST\d+[A-Z]{2}|^HGST|^HUS|^HDW|^HDS|^MQ\d|^MG\d|^DT01|Hitachi|Barracuda|IronWolf|"
+    r"SkyHawk|Exos|^Seagate|HDD", re.IGNORECASE)
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+def transport(name: str, sysfs_root: str = SYSFS_ROOT) -> str:
+    """
+    Bus d'un disque d'après son chemin sysfs : nvme, mmc, usb, virtio, sata, sas ou scsi.
+    """
+    if name.startswith("nvme"):
+        return "nvme"
+    if name.startswith("mmcblk"):
+        return "mmc"
+    path = os.path.realpath(os.path.join(sysfs_root, "class", "block", name))
+    if "/usb" in path:
+        return "usb"
+    if "/virtio" in path:
+        return "virtio"
+    if "/ata" in path:
+        return "sata"
+    if "/end_device-" in path or "/sas_" in path:
+        return "sas"
+    return "scsi"
+
+def rotation_rate(name: str, sysfs_root: str = SYSFS_ROOT) -> int | None:
+    """
+    Vitesse de rotation déclarée par la page VPD B1 (device/vpd_pgb1) : 1 pour un support
+    sans rotation, en tr/min sinon ; None si la page est absente ou la valeur non renseignée.
+    """
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", name, "device", "vpd_pgb1"), "rb") as f:
+            page = f.read(8)
+    except OSError:
+        return None
+    if len(page) < 6 or page[1] != 0xB1:
+        return None
+    rate = int.from_bytes(page[4:6], "big")
+    if rate == VPD_NON_ROTATING or VPD_MIN_RPM <= rate < 0xFFFF:
+        return rate
+    return None
+
+def detect_media(device: str, sysfs_root: str = SYSFS_ROOT) -> dict:
+    """
+    Type de support d'un disque, déduit de sysfs sans aucune commande : queue/rotational,
+    bus, removable, vitesse de rotation de la page VPD B1 et modèle. Chaque indice ajoute son
+    poids (log-cote) en faveur d'un support sans plateaux ; la confiance est la probabilité
+    du type retenu. Une partition est rapportée à son disque.
+
+    Returns:
+        dict: {"device", "media", "confidence" (0.5 à 1), "transport", "rotational", "removable",
+               "rotation_rate", "vendor", "model", "reasons": [...]}
+    """
+    name = get_parent_disk(device_name_from_path(device, sysfs_root), sysfs_root)
+    base = os.path.join(sysfs_root, "class", "block", name)
+    bus = transport(name, sysfs_root)
+    rotational = _read(os.path.join(base, "queue", "rotational"))
+    removable = _read(os.path.join(base, "removable")) == "1"
+    rate = rotation_rate(name, sysfs_root)
+    vendor = _read(os.path.join(base, "device", "vendor"))
+    model = _read(os.path.join(base, "device", "model"))
+    info = {"device": name, "media": MEDIA_UNKNOWN, "confidence": 0.5, "transport": bus,
+            "rotational": rotational == "1", "removable": removable, "rotation_rate": rate,
+            "vendor": vendor, "model": model, "reasons": []}
+
+    if bus == "nvme":
+        info.update(media=MEDIA_NVME, confidence=0.99, reasons=["bus NVMe"])
+        return info
+    score = 0.0
+    reasons = info["reasons"]
+    if bus == "mmc":
+        score += WEIGHT_VPD
+        reasons.append("carte MMC/SD")
+    if rate == VPD_NON_ROTATING:
+        score += WEIGHT_VPD
+        reasons.append("VPD B1 : support sans rotation")
+    elif rate is not None:
+        score -= WEIGHT_VPD
+        reasons.append(f"VPD B1 : {rate} tr/min")
+    if rotational == "0":
+        score += WEIGHT_NONROTATIONAL
+        reasons.append("rotational=0")
+    elif rotational == "1":
+        score += WEIGHT_ROTATIONAL_USB if bus == "usb" else WEIGHT_ROTATIONAL
+        reasons.append("rotational=1" + (" (peu fiable derrière un pont USB)" if bus == "usb" else ""))
+    if bus == "usb" and removable:
+        score += WEIGHT_REMOVABLE_USB
+        reasons.append("support USB amovible")
+    label = f"{vendor} {model}".strip()
+    if FLASH_MODELS.search(label):
+        score += WEIGHT_MODEL
+        reasons.append(f"modèle « {label} » de type flash")
+    elif HDD_MODELS.search(model) or HDD_MODELS.search(label):
+        score -= WEIGHT_MODEL
+        reasons.append(f"modèle « {label} » de disque dur")
+
+    if score == 0:
+        return info
+    confidence = 1 / (1 + math.exp(-abs(score)))
+    if score < 0:
+        media = MEDIA_HDD
+    elif bus in ("usb", "mmc"):
+        media = MEDIA_FLASH
+    else:
+        media = MEDIA_SSD
+    info.update(media=media, confidence=round(confidence, 2))
+    return info
+
+def is_flash_media(info: dict) -> bool:
+    return info["media"] in FLASH_MEDIA
+
+def describe_media(info: dict) -> str:
+    """Type de support lisible avec sa confiance, ex. « Clé/carte flash (confiance 98 %) »."""
+    return f"{MEDIA_LABELS[info['media']]} (confiance {int(info['confidence'] * 100)} %)"
@@ -0,0 +1,257 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from erase_jobs import EraseCancelled
+from io_isolation import isolated_io_bytes
+from fleet_agent import publish_progress
+from log_handler import log_info, log_error
+
+# Taille d'un secteur dans /sys/block/<dev>/stat (toujours 512 octets, indépendamment du matériel)
+SECTOR_SIZE = 512
+
+# Réglages par défaut du contrôle d'admission
+INITIAL_WORKERS = 2
+SAMPLE_INTERVAL = 5.0
+SETTLE_SAMPLES = 2
+GAIN_THRESHOLD = 0.05
+COLLAPSE_RATIO = 0.5
+IOWAIT_MAX = 0.6
+
+def read_disk_bytes(disk: str, sysfs_root: str = "/sys") -> tuple[int, int] | None:
+    """
+    Retourne (octets lus, octets écrits) par un disque depuis le démarrage.
+    """
+    try:
+        with open(os.path.join(sysfs_root, "block", disk, "stat"), "r") as f:
+            fields = f.read().split()
+        return int(fields[2]) * SECTOR_SIZE, int(fields[6]) * SECTOR_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def read_cpu_times(proc_stat: str = "/proc/stat") -> tuple[int, int] | None:
+    """
+    Retourne (temps iowait, temps total) cumulés de la ligne 'cpu' de /proc/stat.
+    """
+    try:
+        with open(proc_stat, "r") as f:
+            fields = f.readline().split()
+        values = [int(v) for v in fields[1:]]
+        return values[4], sum(values[:8])
+    except (OSError, IndexError, ValueError):
+        return None
+
+class ThroughputSampler:
+    """
+    Mesure le débit par disque et l'iowait entre deux appels successifs à sample().
+
+    Le débit d'un disque isolé est celui de son travail seul (cgroup et moteurs natifs) ;
+    sinon il est lu dans /sys/block/<disque>/stat. write_rates retient la part écrite du
+    dernier échantillon, qui distingue les phases d'écriture des relectures et des finitions.
+    """
+    def __init__(self, sysfs_root: str = "/sys", proc_stat: str = "/proc/stat") -> None:
+        self.sysfs_root = sysfs_root
+        self.proc_stat = proc_stat
+        self._last_bytes: dict[str, tuple[bool, tuple[int, int]]] = {}
+        self.write_rates: dict[str, float] = {}
+        self._last_cpu = read_cpu_times(proc_stat)
+        self._last_time = time.monotonic()
+
+    def sample(self, disks: list[str]) -> tuple[dict[str, float], float]:
+        """
+        Retourne ({disque: Mo/s}, proportion d'iowait) depuis le dernier échantillon.
+        """
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-6)
+        self._last_time = now
+        rates = {}
+        self.write_rates = {}
+        for disk in disks:
+            current = isolated_io_bytes(disk)
+            isolated = current is not None
+            if not isolated:
+                current = read_disk_bytes(disk, self.sysfs_root)
+            if current is None:
+                continue
+            previous = self._last_bytes.get(disk)
+            self._last_bytes[disk] = (isolated, current)
+            # Pas de débit au changement de source (début ou fin de l'isolation)
+            if previous is not None and previous[0] == isolated:
+                read = current[0] - previous[1][0]
+                written = current[1] - previous[1][1]
+                rates[disk] = (read + written) / elapsed / (1024 * 1024)
+                self.write_rates[disk] = written / elapsed / (1024 * 1024)
+        cpu = read_cpu_times(self.proc_stat)
+        iowait = 0.0
+        if cpu and self._last_cpu:
+            total = cpu[1] - self._last_cpu[1]
+            if total > 0:
+                iowait = (cpu[0] - self._last_cpu[0]) / total
+        self._last_cpu = cpu
+        return rates, iowait
+
+class AdmissionController:
+    """
+    Ajuste le nombre de disques traités simultanément selon le débit mesuré.
+
+    Un worker est ajouté tant que le débit total augmente ; le parallélisme recule
+    lorsque le débit d'un disque s'effondre par rapport à son pic pendant settle_samples
+    échantillons consécutifs, ou que l'iowait explose. Avec les débits écrits (write_rates),
+    seuls les disques en phase d'écriture (écritures au moins égales aux lectures) comptent :
+    une relecture de vérification ou la finition d'un travail (formatage) n'est pas un
+    effondrement. Chaque recul ramène la référence de débit total à la mesure courante.
+    Chaque décision est journalisée avec sa justification.
+    """
+    def __init__(self, max_workers: int, initial_workers: int = INITIAL_WORKERS,
+                 gain_threshold: float = GAIN_THRESHOLD, collapse_ratio: float = COLLAPSE_RATIO,
+                 iowait_max: float = IOWAIT_MAX, settle_samples: int = SETTLE_SAMPLES) -> None:
+        self.max_workers = max(1, max_workers)
+        self.limit = max(1, min(initial_workers, self.max_workers))
+        self.gain_threshold = gain_threshold
+        self.collapse_ratio = collapse_ratio
+        self.iowait_max = iowait_max
+        self.settle_samples = settle_samples
+        self.baseline_total = 0.0
+        self._samples_since_change = 0
+        self._collapse_samples = 0
+        self._peaks: dict[str, float] = {}
+        self._last_hold_reason = None
+
+    def _set_limit(self, new_limit: int, reason: str) -> None:
+        log_info(f"Parallélisme : {self.limit} -> {new_limit} disque(s) simultané(s) ({reason})")
+        self.limit = new_limit
+        self._samples_since_change = 0
+        self._collapse_samples = 0
+        self._last_hold_reason = None
+
+    def _hold(self, category: str, reason: str) -> None:
+        # Un maintien n'est journalisé qu'au changement de motif pour ne pas saturer le journal
+        if category != self._last_hold_reason:
+            log_info(f"Parallélisme maintenu à {self.limit} disque(s) ({reason})")
+            self._last_hold_reason = category
+
+    def _back_off(self, reason: str, total: float) -> None:
+        self._set_limit(self.limit - 1, reason)
+        self._peaks.clear()
+        # La référence suit le débit constaté : sinon aucune hausse ne la dépasse plus
+        self.baseline_total = total
+
+    def update(self, rates: dict[str, float], iowait: float, pending: int,
+               write_rates: dict[str, float] | None = None) -> int:
+        """
+        Intègre un échantillon de débit et retourne la nouvelle limite de parallélisme.
+        write_rates (ThroughputSampler.write_rates) restreint l'analyse aux disques en écriture.
+        """
+        if write_rates is not None:
+            # Seules les lectures dominantes excluent un disque : un disque privé de toute E/S reste compté (effondrement)
+            rates = {disk: rate for disk, rate in write_rates.items() if rate * 2 >= rates.get(disk, 0.0)}
+        self._samples_since_change += 1
+        for disk, rate in rates.items():
+            if self._samples_since_change > 1:
+                self._peaks[disk] = max(self._peaks.get(disk, 0.0), rate)
+        if self._samples_since_change < self.settle_samples:
+            return self.limit
+
+        total = sum(rates.values())
+        collapsed = [
+            disk for disk, rate in rates.items()
+            if self._peaks.get(disk, 0.0) > 0 and rate < self._peaks[disk] * self.collapse_ratio
+        ]
+        self._collapse_samples = self._collapse_samples + 1 if collapsed else 0
+        if iowait > self.iowait_max and self.limit > 1:
+            self._back_off(f"iowait {iowait:.0%} > {self.iowait_max:.0%}", total)
+        elif self._collapse_samples >= self.settle_samples and self.limit > 1:
+            details = ", ".join(f"{disk} {rates[disk]:.1f}/{self._peaks[disk]:.1f} Mo/s" for disk in collapsed)
+            self._back_off(f"effondrement du débit par disque : {details}", total)
+        elif collapsed:
+            self._hold("collapse", f"débit en baisse sur {', '.join(collapsed)}, confirmation attendue")
+        elif pending <= 0:
+            self._hold("idle", "aucun disque en attente")
+        elif self.limit >= self.max_workers:
+            self._hold("max", f"maximum de {self.max_workers} atteint")
+        elif total > self.baseline_total * (1 + self.gain_threshold):
+            previous = self.baseline_total
+            self.baseline_total = total
+            self._set_limit(self.limit + 1, f"débit total en hausse : {previous:.1f} -> {total:.1f} Mo/s")
+        else:
+            self._hold("stable", f"débit total stable : {total:.1f} Mo/s (référence {self.baseline_total:.1f} Mo/s)")
+        return self.limit
+
+def run_adaptive(disks: list[str], task, on_done=None, initial_workers: int = INITIAL_WORKERS,
+                 max_workers: int | None = None, interval: float = SAMPLE_INTERVAL,
+                 sampler: ThroughputSampler | None = None, tokens: dict | None = None,
+                 on_interrupt=None) -> dict:
+    """
+    Exécute task(disque) pour chaque disque avec un parallélisme adapté au débit mesuré.
+
+    Args:
+        disks: Liste des disques (ex: 'sda' ou '/dev/sda')
+        task: Fonction appelée dans un thread pour chaque disque
+        on_done: Fonction optionnelle appelée avec (disque, future) à la fin de chaque disque
+        initial_workers: Nombre de disques démarrés immédiatement
+        max_workers: Plafond du parallélisme (par défaut : nombre de disques)
+        interval: Période d'échantillonnage du débit en secondes
+        sampler: Échantillonneur de débit (remplaçable pour les tests)
+        tokens: Jetons d'annulation optionnels {disque: CancellationToken} ; un disque annulé
+                avant son démarrage n'est pas lancé et se termine par EraseCancelled
+        on_interrupt: Fonction optionnelle appelée avec la liste des disques en cours sur Ctrl+C
+                      (par défaut : annulation de tous les jetons, ou propagation sans jetons)
+
+    Returns:
+        dict: {disque: future} pour tous les disques traités
+    """
+    queue = list(disks)
+    if not queue:
+        return {}
+    controller = AdmissionController(max_workers or len(queue), initial_workers)
+    sampler = sampler or ThroughputSampler()
+    futures = {}
+    running = {}
+    next_sample = time.monotonic() + interval
+    log_info(f"Démarrage de {len(queue)} disque(s) avec un parallélisme initial de {controller.limit}")
+
+    def notify(disk: str, future: Future) -> None:
+        if on_done:
+            try:
+                on_done(disk, future)
+            except Exception as e:
+                log_error(f"Erreur lors du traitement du résultat pour {disk} : {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=len(queue)) as executor:
+        while queue or running:
+            while queue and len(running) < controller.limit:
+                disk = queue.pop(0)
+                token = tokens.get(disk) if tokens else None
+                if token is not None and token.cancelled:
+                    future = Future()
+                    future.set_exception(EraseCancelled("Travail annulé avant son démarrage"))
+                    futures[disk] = future
+                    notify(disk, future)
+                    continue
+                future = executor.submit(task, disk)
+                futures[disk] = future
+                running[future] = disk
+            if not running:
+                continue
+            try:
+                done, _ = wait(list(running), timeout=max(0.0, next_sample - time.monotonic()), return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                if on_interrupt is not None:
+                    on_interrupt(list(running.values()))
+                elif tokens:
+                    log_info("Interruption par l'utilisateur : annulation de tous les disques")
+                    for token in tokens.values():
+                        token.cancel()
+                else:
+                    raise
+                continue
+            for future in done:
+                disk = running.pop(future)
+                notify(disk, future)
+            if time.monotonic() >= next_sample:
+                next_sample = time.monotonic() + interval
+                active = [disk.replace("/dev/", "") for disk in running.values()]
+                rates, iowait = sampler.sample(active)
+                controller.update(rates, iowait, len(queue), sampler.write_rates)
+                publish_progress({"running": active, "queued": len(queue), "rates": rates, "iowait": iowait,
+                                  "parallelism": controller.limit})
+    return futures
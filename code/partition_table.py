@@ -0,0 +1,252 @@
+import os
+import re
+import zlib
+import struct
+import logging
+from block_devices import SYSFS_ROOT
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MBR_SIGNATURE = b"\x55\xaa"
+GPT_SIGNATURE = b"EFI PART"
+
+# Types MBR : partition étendue (chaîne d'EBR) et MBR protecteur d'un disque GPT
+MBR_EXTENDED_TYPES = (0x05, 0x0F, 0x85)
+MBR_GPT_PROTECTIVE = 0xEE
+
+# Nombre maximal de partitions logiques suivies dans une chaîne d'EBR (protection contre les boucles)
+MAX_LOGICAL_PARTITIONS = 128
+
+# Cibles d'effacement : disque entier, espace non alloué ou une partition (partition:N)
+TARGET_DISK = "disk"
+TARGET_FREE = "free"
+_PARTITION_TARGET = re.compile(r"^partition:(\d+)$")
+
+class PartitionTableError(ValueError):
+    """Levée lorsqu'une table de partitions est absente, illisible ou ne contient pas la partition demandée."""
+
+def _sector_size(disk: str, sysfs_root: str) -> int:
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", disk, "queue", "logical_block_size"), "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 512
+
+def _read_at(fd: int, offset: int, length: int) -> bytes:
+    data = os.pread(fd, length, offset)
+    if len(data) != length:
+        raise PartitionTableError(f"Lecture incomplète à l'octet {offset}")
+    return data
+
+def _parse_gpt_header(data: bytes) -> dict | None:
+    if data[:8] != GPT_SIGNATURE:
+        return None
+    header_size = struct.unpack_from("<I", data, 12)[0]
+    if not 92 <= header_size <= len(data):
+        return None
+    header = bytearray(data[:header_size])
+    expected = struct.unpack_from("<I", header, 16)[0]
+    header[16:20] = b"\x00\x00\x00\x00"
+    if zlib.crc32(header) != expected:
+        return None
+    first_usable, last_usable = struct.unpack_from("<QQ", data, 40)
+    entries_lba, count, entry_size, entries_crc = struct.unpack_from("<QIII", data, 72)
+    return {"first_usable": first_usable, "last_usable": last_usable, "entries_lba": entries_lba,
+            "count": count, "entry_size": entry_size, "entries_crc": entries_crc}
+
+def _read_gpt(fd: int, sector: int, size: int) -> dict:
+    last_lba = size // sector - 1
+    header = None
+    # En-tête principal (LBA 1), sinon en-tête de secours (dernier LBA)
+    for lba in (1, last_lba):
+        header = _parse_gpt_header(_read_at(fd, lba * sector, sector))
+        if header is not None:
+            if lba != 1:
+                logging.warning("En-tête GPT principal invalide : utilisation de l'en-tête de secours")
+            break
+    if header is None:
+        raise PartitionTableError("En-têtes GPT principal et de secours invalides")
+    if header["entry_size"] < 128 or header["count"] > 1024:
+        raise PartitionTableError("Tableau d'entrées GPT invalide")
+    entries = _read_at(fd, header["entries_lba"] * sector, header["count"] * header["entry_size"])
+    if zlib.crc32(entries) != header["entries_crc"]:
+        raise PartitionTableError("Somme de contrôle du tableau d'entrées GPT invalide")
+    partitions = []
+    for index in range(header["count"]):
+        entry = entries[index * header["entry_size"]:(index + 1) * header["entry_size"]]
+        if entry[:16] == bytes(16):
+            continue
+        first, last = struct.unpack_from("<QQ", entry, 32)
+        partitions.append({
+            "number": index + 1,
+            "start": first * sector,
+            "end": (last + 1) * sector,
+            "type": entry[:16].hex(),
+            "name": entry[56:128].decode("utf-16-le", "replace").rstrip("\x00"),
+        })
+    return {"scheme": "gpt", "usable": (header["first_usable"] * sector, (header["last_usable"] + 1) * sector),
+            "partitions": partitions, "reserved": []}
+
+def _mbr_entries(data: bytes) -> list[tuple[int, int, int]]:
+    entries = []
+    for index in range(4):
+        kind, start, count = struct.unpack_from("<B3xII", data, 446 + index * 16 + 4)
+        entries.append((kind, start, count))
+    return entries
+
+def _read_mbr(fd: int, sector: int, size: int, data: bytes) -> dict:
+    partitions = []
+    reserved = []
+    for index, (kind, start, count) in enumerate(_mbr_entries(data), start=1):
+        if not kind or not count:
+            continue
+        if kind in MBR_EXTENDED_TYPES:
+            # Le conteneur étendu (EBR compris) n'est jamais considéré comme espace libre
+            reserved.append((start * sector, (start + count) * sector))
+            partitions.extend(_read_logical(fd, sector, start))
+            continue
+        partitions.append({"number": index, "start": start * sector, "end": (start + count) * sector,
+                           "type": f"{kind:02x}", "name": ""})
+    # La zone entre le MBR et la première partition porte souvent le chargeur (GRUB core.img) : conservée
+    first = min((part["start"] for part in partitions), default=size)
+    reserved.append((sector, first))
+    return {"scheme": "mbr", "usable": (sector, size), "partitions": partitions, "reserved": reserved}
+
+def _read_logical(fd: int, sector: int, extended_start: int) -> list[dict]:
+    partitions = []
+    ebr = extended_start
+    for number in range(5, 5 + MAX_LOGICAL_PARTITIONS):
+        data = _read_at(fd, ebr * sector, 512)
+        if data[510:512] != MBR_SIGNATURE:
+            break
+        entries = _mbr_entries(data)
+        kind, start, count = entries[0]
+        if kind and count:
+            partitions.append({"number": number, "start": (ebr + start) * sector, "end": (ebr + start + count) * sector,
+                               "type": f"{kind:02x}", "name": ""})
+        next_kind, next_start, _ = entries[1]
+        if next_kind not in MBR_EXTENDED_TYPES or not next_start:
+            break
+        ebr = extended_start + next_start
+    return partitions
+
+def read_partition_table(disk: str, sysfs_root: str = SYSFS_ROOT) -> dict:
+    """
+    Lit directement sur le disque sa table de partitions (GPT ou MBR, partitions logiques comprises).
+
+    Les sommes de contrôle GPT sont vérifiées et l'en-tête de secours est utilisé si l'en-tête
+    principal est endommagé. Les positions sont exprimées en octets, fin exclue.
+
+    Returns:
+        dict: {"scheme": "gpt" | "mbr", "sector_size", "size", "usable": (début, fin),
+               "partitions": [{"number", "start", "end", "type", "name", "device"}, ...],
+               "reserved": [(début, fin), ...]}
+
+    Raises:
+        PartitionTableError: Si le disque n'a pas de table de partitions lisible
+        OSError: En cas d'erreur de lecture
+    """
+    disk = disk.replace("/dev/", "")
+    sector = _sector_size(disk, sysfs_root)
+    fd = os.open(f"/dev/{disk}", os.O_RDONLY)
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        mbr = _read_at(fd, 0, 512)
+        if mbr[510:512] != MBR_SIGNATURE:
+            raise PartitionTableError(f"Aucune table de partitions sur /dev/{disk}")
+        if any(kind == MBR_GPT_PROTECTIVE for kind, _, _ in _mbr_entries(mbr)):
+            table = _read_gpt(fd, sector, size)
+        else:
+            table = _read_mbr(fd, sector, size, mbr)
+    finally:
+        os.close(fd)
+    table["sector_size"] = sector
+    table["size"] = size
+    table["partitions"].sort(key=lambda part: part["start"])
+    for part in table["partitions"]:
+        part["device"] = partition_device(disk, part["number"], sysfs_root)
+    return table
+
+def partition_device(disk: str, number: int, sysfs_root: str = SYSFS_ROOT) -> str:
+    """Nom noyau de la partition numéro number du disque (sda2, nvme0n1p2), d'après sysfs."""
+    base = os.path.join(sysfs_root, "class", "block", disk)
+    try:
+        children = sorted(os.listdir(base))
+    except OSError:
+        children = []
+    for child in children:
+        try:
+            with open(os.path.join(base, child, "partition"), "r") as f:
+                if int(f.read().strip()) == number:
+                    return child
+        except (OSError, ValueError):
+            continue
+    return f"{disk}p{number}" if disk[-1:].isdigit() else f"{disk}{number}"
+
+def free_ranges(table: dict) -> list[tuple[int, int]]:
+    """
+    Plages non allouées de la zone utilisable du disque, hors partitions et zones réservées
+    (conteneur étendu MBR, zone du chargeur avant la première partition MBR).
+    """
+    occupied = sorted([(part["start"], part["end"]) for part in table["partitions"]] + table["reserved"])
+    ranges = []
+    position, end = table["usable"]
+    for start, stop in occupied:
+        if start > position:
+            ranges.append((position, min(start, end)))
+        position = max(position, stop)
+        if position >= end:
+            break
+    if position < end:
+        ranges.append((position, end))
+    return [(start, stop) for start, stop in ranges if stop > start]
+
+def parse_target(target: str | None) -> str:
+    """
+    Valide une cible d'effacement : "disk" (disque entier), "free" (espace non alloué)
+    ou "partition:N".
+
+    Raises:
+        ValueError: Si la cible est invalide
+    """
+    target = (target or TARGET_DISK).strip().lower()
+    if target in (TARGET_DISK, TARGET_FREE) or _PARTITION_TARGET.match(target):
+        return target
+    raise ValueError(f"Cible d'effacement invalide : {target} (disk, free ou partition:N)")
+
+def resolve_target(disk: str, target: str | None, sysfs_root: str = SYSFS_ROOT) -> dict:
+    """
+    Traduit une cible d'effacement en plages d'octets du disque.
+
+    Returns:
+        dict: {"target", "description", "ranges": [(début, fin), ...] ou None pour le disque entier,
+               "partition": nom noyau de la partition ou None, "size": octets à effacer}
+
+    Raises:
+        PartitionTableError: Si la table est illisible ou la partition inexistante
+        ValueError: Si la cible est invalide
+    """
+    target = parse_target(target)
+    if target == TARGET_DISK:
+        return {"target": target, "description": "disque entier", "ranges": None, "partition": None, "size": None}
+    table = read_partition_table(disk, sysfs_root)
+    if target == TARGET_FREE:
+        ranges = free_ranges(table)
+        return {"target": target, "description": f"espace non alloué ({len(ranges)} plage(s), table {table['scheme'].upper()})",
+                "ranges": ranges, "partition": None, "size": sum(end - start for start, end in ranges)}
+    number = int(_PARTITION_TARGET.match(target).group(1))
+    part = next((part for part in table["partitions"] if part["number"] == number), None)
+    if part is None:
+        raise PartitionTableError(f"La partition {number} n'existe pas sur /dev/{disk}")
+    return {"target": target, "description": f"partition {number} (/dev/{part['device']})",
+            "ranges": [(part["start"], part["end"])], "partition": part["device"], "size": part["end"] - part["start"]}
+
+def describe_table(table: dict) -> list[str]:
+    """Lignes lisibles de la table : une par partition puis le total non alloué."""
+    lines = []
+    for part in table["partitions"]:
+        label = f" « {part['name']} »" if part["name"] else ""
+        lines.append(f"partition:{part['number']}  /dev/{part['device']}  {(part['end'] - part['start']) // (1024 * 1024)} Mo{label}")
+    free = sum(end - start for start, end in free_ranges(table))
+    lines.append(f"free  espace non alloué : {free // (1024 * 1024)} Mo")
+    return lines
@@ -0,0 +1,100 @@
+import os
+import shutil
+import hashlib
+import logging
+import subprocess
+from utils import run_command
+from erase_jobs import CancellationToken
+from crypto_profiles import open_options, supports_sector_size, cryptsetup_supports
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Flux aléatoires rejouables des passes d'écrasement : un mapper dm-crypt plain AES-XTS dont la clé
+# dérive d'une graine. Des zéros écrits à travers le mapper donnent sur le disque un flux
+# pseudo-aléatoire qui ne dépend que de la clé et de la position (le numéro de secteur sert de
+# compteur) ; relus à travers un mapper ouvert avec la même clé, ils redonnent des zéros.
+# Paramètres fixes, indépendants de l'accélération AES du poste : un autre poste rejoue le même flux
+PATTERN_CIPHER = "aes-xts-plain64"
+PATTERN_KEY_BITS = 256
+PATTERN_SECTOR_SIZE = 4096
+SEED_SIZE = 32
+
+def new_seed() -> bytes:
+    return os.urandom(SEED_SIZE)
+
+def pattern_streams_available() -> bool:
+    """Vrai si cryptsetup et le device-mapper sont disponibles pour ouvrir des flux de motifs."""
+    return shutil.which("cryptsetup") is not None and os.path.exists("/dev/mapper/control")
+
+def stream_key(seed: bytes, stream: int) -> bytearray:
+    """Clé du flux numéro stream (un par passe) : SHAKE-256 de la graine et du numéro."""
+    return bytearray(hashlib.shake_256(seed + stream.to_bytes(4, "big")).digest(PATTERN_KEY_BITS // 8))
+
+def stream_sector_size(device: str, ranges: list[tuple[int, int]] | None = None) -> int:
+    """
+    Taille de secteur du flux : 4096 octets si le disque le permet et que les plages écrites
+    (ranges) y sont alignées, sinon 512 (elle fait partie de la définition du flux).
+    """
+    name = os.path.basename(os.path.realpath(device))
+    if ranges and any(start % PATTERN_SECTOR_SIZE or end % PATTERN_SECTOR_SIZE for start, end in ranges):
+        return 512
+    if cryptsetup_supports("--sector-size") and supports_sector_size(name, PATTERN_SECTOR_SIZE):
+        return PATTERN_SECTOR_SIZE
+    return 512
+
+def describe_stream(seed: bytes, sector_size: int) -> str:
+    """Tout ce qu'il faut pour régénérer les passes aléatoires : graine et paramètres du flux."""
+    return f"graine {seed.hex()} ({PATTERN_CIPHER}, clé {PATTERN_KEY_BITS} bits, secteurs de {sector_size} octets)"
+
+class PatternStream:
+    """
+    Flux aléatoire d'une passe, entièrement déterminé par (graine, numéro de flux) : tout bloc
+    se régénère à la demande et en parallèle, sans rien conserver des données écrites.
+
+    Écrire des zéros dans path dépose le flux sur le disque à la même position ; lire path
+    redonne des zéros tant que le disque contient le flux (vérification à pleine vitesse de
+    lecture, déchiffrement dans le noyau). Le mapper commence à l'octet 0 du disque : les
+    positions, les plages et la carte d'erreurs sont celles du disque. ranges restreint le flux
+    aux secteurs de 512 octets si les plages écrites ne sont pas alignées sur 4096.
+
+    Usage :
+        with PatternStream("/dev/sda", seed, 1, token) as stream:
+            fd = os.open(stream.path, os.O_RDWR)
+    """
+    def __init__(self, device: str, seed: bytes, stream: int, token: CancellationToken | None = None,
+                 ranges: list[tuple[int, int]] | None = None) -> None:
+        self.device = device
+        self.ranges = ranges
+        self.seed = seed
+        self.stream = stream
+        self.token = token
+        self.name = f"pattern_{os.path.basename(os.path.realpath(device))}_{os.getpid()}_{stream}"
+        self.path = f"/dev/mapper/{self.name}"
+
+    def open(self) -> "PatternStream":
+        sector_size = stream_sector_size(self.device, self.ranges)
+        options = ["--type", "plain", "--cipher", PATTERN_CIPHER, "--key-size", str(PATTERN_KEY_BITS),
+                   "--key-file", "-", "--keyfile-size", str(PATTERN_KEY_BITS // 8)]
+        if sector_size != 512:
+            options += ["--sector-size", str(sector_size)]
+        key = stream_key(self.seed, self.stream)
+        try:
+            run_command(["cryptsetup", "open", *options, *open_options("ephemeral"), self.device, self.name],
+                        self.token, input_data=key)
+        finally:
+            key[:] = bytes(len(key))
+        return self
+
+    def close(self) -> None:
+        # Sans le jeton : le mapper doit être refermé même après une annulation
+        if os.path.exists(self.path):
+            result = subprocess.run(["cryptsetup", "close", self.name], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                logging.error(f"Fermeture du flux de motif {self.name} impossible : {result.stderr.decode().strip()}")
+
+    def __enter__(self) -> "PatternStream":
+        return self.open()
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        return False
@@ -0,0 +1,318 @@
+import os
+import time
+import logging
+import threading
+from erase_jobs import CancellationToken
+from block_devices import SYSFS_ROOT, device_name_from_path, get_parent_disk
+from media_type import detect_media, is_flash_media
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Nombre maximal de régions écrites en parallèle sur un même disque
+MAX_REGIONS = 8
+
+# Requêtes de la file du disque réservées à chaque région (nr_requests / REQUESTS_PER_REGION)
+REQUESTS_PER_REGION = 32
+
+# Taille minimale d'une région : en dessous, le découpage ne fait que disperser les écritures
+MIN_REGION_SIZE = 1024 * 1024 * 1024
+
+# Fréquence des messages de progression fusionnés (en octets traités)
+PROGRESS_STEP = 1024 * 1024 * 1024
+
+def _read_queue(name: str, attribute: str, sysfs_root: str) -> str:
+    try:
+        with open(os.path.join(sysfs_root, "class", "block", name, "queue", attribute), "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def write_granularity(path: str, sysfs_root: str = SYSFS_ROOT) -> int:
+    """
+    Plus petite écriture isolable sur le périphérique écrit : sa taille de secteur logique,
+    celle du mapper (4096 octets pour un flux de motif ou un volume chiffré) et non du disque.
+    """
+    try:
+        return int(_read_queue(device_name_from_path(path, sysfs_root), "logical_block_size", sysfs_root))
+    except ValueError:
+        return 512
+
+def region_count(device: str, size: int | None = None, sysfs_root: str = SYSFS_ROOT) -> int:
+    """
+    Nombre de régions à écrire en parallèle, déduit de la file du disque.
+
+    Les disques mécaniques, et ceux dont le support n'est pas reconnu, restent séquentiels
+    (une région) : plusieurs flux les font chercher en permanence. Le support est celui de
+    media_type.detect_media, et non queue/rotational que les ponts USB positionnent à tort.
+    Sinon, une région par tranche de REQUESTS_PER_REGION requêtes de queue/nr_requests,
+    dans la limite de MAX_REGIONS et d'une région par MIN_REGION_SIZE.
+    """
+    name = get_parent_disk(device_name_from_path(device, sysfs_root), sysfs_root)
+    if not is_flash_media(detect_media(name, sysfs_root)):
+        return 1
+    try:
+        requests = int(_read_queue(name, "nr_requests", sysfs_root))
+    except ValueError:
+        return 1
+    count = max(1, min(MAX_REGIONS, requests // REQUESTS_PER_REGION))
+    if size is not None:
+        count = max(1, min(count, size // MIN_REGION_SIZE))
+    return count
+
+def split_regions(size: int, count: int, alignment: int, ranges: list[tuple[int, int]] | None = None) -> list[tuple[int, int]]:
+    """
+    Découpe [0, size), ou les plages ranges (effacement sélectif), en régions contiguës
+    d'au plus 1/count de la taille totale, alignées sur alignment depuis le début de leur plage.
+
+    Returns:
+        list: [(début, fin), ...]
+    """
+    ranges = [(0, size)] if ranges is None else ranges
+    total = sum(end - start for start, end in ranges)
+    blocks = (total + alignment - 1) // alignment
+    piece = max(1, (blocks + max(1, count) - 1) // max(1, count)) * alignment
+    regions = []
+    for start, end in ranges:
+        while start < end:
+            regions.append((start, min(end, start + piece)))
+            start += piece
+    return regions
+
+def ranges_size(regions: list[tuple[int, int]]) -> int:
+    return sum(end - start for start, end in regions)
+
+class RegionProgress:
+    """
+    Progression fusionnée des régions d'un disque : un seul message par PROGRESS_STEP
+    octets, quel que soit le nombre de régions.
+    """
+    def __init__(self, label: str, total: int, log) -> None:
+        self.label = label
+        self.total = total
+        self.log = log
+        self.done = 0
+        self._next = PROGRESS_STEP
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int, detail: str = "") -> None:
+        with self._lock:
+            self.done += nbytes
+            if self.done < self._next:
+                return
+            self._next += PROGRESS_STEP
+            done = self.done
+        self.log(f"{self.label}, {done // (1024 * 1024)} / {self.total // (1024 * 1024)} Mo{detail}")
+
+class RegionTimeout(OSError):
+    """Levée lorsqu'une région dépasse le délai accordé par la surveillance du disque."""
+
+# Période de contrôle des délais par région (secondes)
+REGION_POLL = 1.0
+
+def _run_bounded(worker, start: int, end: int, timeout: float) -> None:
+    """Exécute worker(début, fin, stop) dans un thread, abandonné s'il dépasse timeout."""
+    stop = threading.Event()
+    errors = []
+
+    def run() -> None:
+        try:
+            worker(start, end, stop)
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        stop.set()
+        raise RegionTimeout(f"aucune fin d'écriture après {int(timeout)} s")
+    if errors:
+        raise errors[0]
+
+def _retry_region(worker, start: int, end: int, health, token: CancellationToken | None,
+                  sector_size: int | None = None) -> None:
+    """
+    Réécrit une région en erreur par blocs de health.retry_block (arrondis au secteur du
+    périphérique écrit), chacun sous délai : l'écrivain étant synchrone, une erreur ou un
+    dépassement désigne le bloc fautif et les blocs sains restent effacés.
+    """
+    sector = max(health.sector_size, sector_size or 0)
+    block = -(-health.retry_block // sector) * sector
+    offset = start
+    while offset < end:
+        if token is not None:
+            token.check()
+        block_end = min(end, offset + block)
+        try:
+            _run_bounded(worker, offset, block_end, health.region_timeout(block_end - offset))
+        except OSError as e:
+            health.retry_failed(offset, block_end, e)
+        offset = block_end
+
+def subtract_ranges(ranges: list[tuple[int, int]], excluded: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Plages ranges privées des plages excluded (triées, disjointes)."""
+    result = []
+    for start, end in ranges:
+        for skip_start, skip_end in excluded:
+            if skip_end <= start or skip_start >= end:
+                continue
+            if skip_start > start:
+                result.append((start, skip_start))
+            start = max(start, skip_end)
+        if start < end:
+            result.append((start, end))
+    return result
+
+def _bisect_region(worker, start: int, end: int, health, token: CancellationToken | None,
+                   sector_size: int | None = None) -> None:
+    """
+    Réécrit une région en erreur par dichotomie : chaque moitié est écrite d'un seul tenant
+    (à pleine vitesse), seule la moitié en erreur est à nouveau divisée, jusqu'au secteur
+    logique (celui du disque, ou sector_size s'il est plus grand), consigné dans la carte
+    d'erreurs de health puis sauté.
+    """
+    sector = max(health.sector_size, sector_size or 0)
+    pending = [(start, end)]
+    while pending:
+        if token is not None:
+            token.check()
+        start, end = pending.pop()
+        try:
+            _run_bounded(worker, start, end, health.region_timeout(end - start))
+            continue
+        except OSError as e:
+            if end - start <= sector:
+                health.sector_failed(start, end, e)
+                continue
+        # Coupures sur des multiples de trois secteurs tant que possible : la phase des motifs
+        # de trois octets (Gutmann) est conservée d'une moitié à l'autre
+        unit = 3 * sector if end - start >= 6 * sector else sector
+        middle = start + max(1, (end - start) // unit // 2) * unit
+        # La première moitié est traitée d'abord : la pile reçoit la seconde en dessous
+        pending.append((middle, end))
+        pending.append((start, middle))
+
+def run_regions(regions: list[tuple[int, int]], worker, token: CancellationToken | None = None,
+                workers: int | None = None, retry: bool = True, sector_size: int | None = None) -> None:
+    """
+    Exécute worker(début, fin, stop) pour chaque région, par au plus workers threads
+    (un par région par défaut) qui se partagent les régions dans l'ordre ; directement dans
+    le thread appelant s'il n'y en a qu'un.
+
+    La première erreur arrête les autres régions (stop est positionné) puis est relevée.
+    Sous surveillance du disque (token.health, voir drive_health.HealthMonitor), chaque région
+    a un délai : une région hors délai est abandonnée à son thread et un autre la remplace.
+    Les régions en erreur d'E/S ou hors délai sont confiées à la politique du disque, qui les
+    fait réécrire par blocs réduits (retry, pour les écritures), par dichotomie jusqu'au
+    secteur (map : les secteurs défaillants sont consignés et sautés par les passes suivantes)
+    ou lève DriveHealthError. sector_size est la plus petite écriture possible sur le
+    périphérique écrit (voir write_granularity) : la dichotomie ne descend pas en dessous.
+    Les écrivains doivent être synchrones (O_DIRECT ou O_DSYNC) : une erreur ou un délai
+    n'est attribué à la région que si l'écriture a atteint le disque avant le retour.
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        DriveHealthError: Si la politique du disque arrête son effacement
+        OSError: En cas d'erreur d'une région
+    """
+    stop = threading.Event()
+    health = getattr(token, "health", None)
+    if health is not None and health.bisect:
+        regions = subtract_ranges(regions, health.excluded())
+        if not regions:
+            return
+    workers = max(1, min(workers or len(regions), len(regions)))
+    if workers == 1 and health is None:
+        for start, end in regions:
+            worker(start, end, stop)
+        return
+    pending = list(reversed(regions))
+    lock = threading.Lock()
+    errors = []
+    # Régions en cours par thread, threads abandonnés (bloqués hors délai), régions à reprendre
+    active = {}
+    stops = {}
+    abandoned = set()
+    failed = []
+
+    def stop_all() -> None:
+        stop.set()
+        for event in list(stops.values()):
+            event.set()
+
+    def run() -> None:
+        thread = threading.current_thread()
+        try:
+            while not stop.is_set():
+                with lock:
+                    if not pending or thread in abandoned:
+                        return
+                    start, end = pending.pop()
+                    active[thread] = (start, end, time.monotonic())
+                try:
+                    worker(start, end, stops[thread])
+                except OSError as e:
+                    if health is None:
+                        raise
+                    with lock:
+                        if thread not in abandoned:
+                            failed.append((start, end, e))
+                finally:
+                    with lock:
+                        active.pop(thread, None)
+        except BaseException as e:
+            errors.append(e)
+            stop_all()
+
+    def spawn() -> threading.Thread:
+        thread = threading.Thread(target=run, daemon=True)
+        stops[thread] = threading.Event()
+        if stop.is_set():
+            stops[thread].set()
+        threads.append(thread)
+        thread.start()
+        return thread
+
+    threads = []
+    for _ in range(workers):
+        spawn()
+    if health is None:
+        for thread in threads:
+            thread.join()
+    else:
+        while True:
+            running = [thread for thread in threads if thread.is_alive() and thread not in abandoned]
+            if not running:
+                break
+            running[0].join(REGION_POLL)
+            if token.cancelled:
+                # Les threads bloqués dans une écriture ne sont pas attendus
+                stop_all()
+                break
+            now = time.monotonic()
+            with lock:
+                for thread, (start, end, started) in list(active.items()):
+                    timeout = health.region_timeout(end - start)
+                    if now - started > timeout:
+                        abandoned.add(thread)
+                        stops[thread].set()
+                        del active[thread]
+                        failed.append((start, end, RegionTimeout(f"aucune fin d'écriture après {int(timeout)} s")))
+                        if pending:
+                            spawn()
+    if errors:
+        raise errors[0]
+    if token is not None:
+        token.check()
+    for start, end, error in sorted(failed, key=lambda item: item[0]):
+        health.region_failed(start, end, error, retry)
+        if health.bisect:
+            _bisect_region(worker, start, end, health, token, sector_size)
+        else:
+            _retry_region(worker, start, end, health, token, sector_size)
+
+def describe_regions(regions: list[tuple[int, int]], workers: int | None = None) -> str:
+    workers = max(1, min(workers or len(regions), len(regions)))
+    if workers == 1:
+        return "séquentiel"
+    return f"{len(regions)} régions de {(regions[0][1] - regions[0][0]) // (1024 * 1024)} Mo, {workers} en parallèle"
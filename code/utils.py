@@ -2,23 +2,48 @@ import subprocess
 import logging
 import sys
 import re
+from block_devices import BlockDeviceGraph, build_device_graph, device_name_from_path
+from erase_jobs import CancellationToken, start_process
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def run_command(command_list: list[str]) -> str:
+def run_command(command_list: list[str], token: CancellationToken | None = None, input_data=None) -> str:
+    """
+    Exécute une commande et retourne sa sortie standard.
+    Les erreurs sont levées (jamais de sys.exit) pour pouvoir être appelée depuis les threads de disque ;
+    le processus enfant est associé au jeton d'annulation éventuel.
+    input_data (octets) est transmis sur l'entrée standard par un tube, sans fichier intermédiaire.
+
+    Raises:
+        FileNotFoundError: Si la commande est introuvable
+        CalledProcessError: Si la commande se termine avec un code non nul
+        EraseCancelled: Si le jeton a été annulé
+    """
     try:
-        result = subprocess.run(command_list, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return result.stdout.decode('utf-8').strip()
+        if token is not None:
+            token.check()
+        process = start_process(command_list, token, stdin=subprocess.PIPE if input_data is not None else None,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            stdout, stderr = process.communicate(input_data)
+        finally:
+            if token is not None:
+                token.unregister(process)
+        if token is not None:
+            token.check()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command_list, stdout, stderr)
+        return stdout.decode('utf-8').strip()
     except FileNotFoundError:
         logging.error(f"Erreur : Commande introuvable : {' '.join(command_list)}")
-        sys.exit(2)
+        raise
     except subprocess.CalledProcessError:
         logging.error(f"Erreur : Échec d'exécution de la commande : {' '.join(command_list)}")
-        sys.exit(1)
+        raise
     except KeyboardInterrupt:
         logging.error("Opération interrompue par l'utilisateur (Ctrl+C)")
         print("\nOpération interrompue par l'utilisateur (Ctrl+C)")
-        sys.exit(130)  # Code de sortie standard pour SIGINT
+        raise
 
 def get_disk_label(device: str) -> str:
     """
@@ -129,47 +154,23 @@ def choose_filesystem() -> str:
             print("\nFlux d'entrée fermé de manière inattendue")
             sys.exit(1)
 
-def get_physical_drives_for_logical_volumes(active_devices: list) -> set:
+def get_physical_drives_for_logical_volumes(active_devices: list, graph: BlockDeviceGraph | None = None) -> set:
     """
-    Associe les volumes logiques à leurs disques physiques sous-jacents.
+    Associe les volumes logiques (LVM, dm-crypt, md RAID, multipath) à leurs disques physiques sous-jacents.
+    Le graphe de dépendances sysfs est construit une seule fois puis interrogé pour chaque périphérique.
     """
     if not active_devices:
         return set()
     physical_drives = set()
     try:
-        disk_list = get_disk_list()
-        physical_device_names = [disk['device'].replace('/dev/', '') for disk in disk_list]
-        for physical_device in physical_device_names:
-            try:
-                output = run_command([
-                    "lsblk",
-                    f"/dev/{physical_device}",
-                    "-o", "NAME",
-                    "-l",
-                    "-n"
-                ])
-                device_tree = []
-                for line in output.strip().split('\n'):
-                    if line.strip():
-                        device_name = line.strip()
-                        device_tree.append(f"/dev/{device_name}")
-                        device_tree.append(device_name)
-                for active_device in active_devices:
-                    active_variants = [
-                        active_device,
-                        active_device.replace('/dev/', ''),
-                        active_device.replace('/dev/mapper/', '')
-                    ]
-                    for variant in active_variants:
-                        if variant in device_tree:
-                            physical_drives.add(physical_device)
-                            logging.info(f"Périphérique actif trouvé '{active_device}' sur le disque physique '{physical_device}'")
-                            break
-                    if physical_device in physical_drives:
-                        break
-            except (subprocess.CalledProcessError, FileNotFoundError) as e:
-                logging.error(f"Impossible de lire la hiérarchie pour {physical_device} : {str(e)}")
-                continue
+        if graph is None:
+            graph = build_device_graph()
+        for active_device in active_devices:
+            device_name = device_name_from_path(active_device)
+            drives = graph.physical_disks(device_name)
+            for physical_device in drives:
+                logging.info(f"Périphérique actif trouvé '{active_device}' sur le disque physique '{physical_device}'")
+            physical_drives.update(drives)
     except (AttributeError, TypeError) as e:
         logging.error(f"Erreur lors du traitement des structures de données : {str(e)}")
     except MemoryError:
@@ -183,10 +184,10 @@ def get_base_disk(device_name: str) -> str:
     Extrait le nom du disque de base à partir d'un périphérique.
     """
     try:
-        if 'nvme' in device_name:
-            match = re.match(r'(nvme\d+n\d+)', device_name)
-            if match:
-                return match.group(1)
+        # Les noms se terminant par un chiffre avant le suffixe 'pN' (nvme, mmcblk, loop, md)
+        match = re.match(r'(nvme\d+n\d+|mmcblk\d+|loop\d+|md\d+)', device_name)
+        if match:
+            return match.group(1)
         match = re.match(r'([a-zA-Z/]+[a-zA-Z])', device_name)
         if match:
             return match.group(1)
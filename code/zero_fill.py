@@ -0,0 +1,158 @@
+import os
+import mmap
+import queue
+import logging
+import threading
+from erase_jobs import CancellationToken
+from io_isolation import throttle
+from device_fill import open_direct
+from region_erase import write_granularity, region_count, split_regions, ranges_size, describe_regions, RegionProgress, run_regions
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Taille des blocs lus, comparés et éventuellement réécrits
+ZERO_FILL_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Nombre de blocs à réécrire en attente entre le lecteur et l'écrivain
+WRITE_QUEUE_DEPTH = 8
+
+def _device_path(device: str) -> str:
+    return device if device.startswith("/") else f"/dev/{device}"
+
+def drop_cache(fd: int) -> None:
+    """
+    Vide le cache de pages du périphérique pour que les lectures suivantes relisent le support.
+    """
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except (OSError, AttributeError):
+        pass
+
+def zero_fill(device: str, skip_zero: bool = True, chunk_size: int = ZERO_FILL_CHUNK_SIZE,
+              log_func=None, token: CancellationToken | None = None, regions: int | None = None,
+              ranges: list[tuple[int, int]] | None = None) -> dict:
+    """
+    Passe à zéro « lire-comparer-ignorer » : chaque bloc est lu et comparé à zéro,
+    seuls les blocs contenant des données sont réécrits.
+
+    Un thread lecteur parcourt le disque pendant qu'un thread écrivain réécrit les blocs
+    non nuls, de sorte que lecture et écriture se recouvrent. Les disques revenus de location,
+    déjà à zéro ou ayant subi un TRIM, ne coûtent alors qu'une lecture. Avec skip_zero=False,
+    tous les blocs sont écrits sans lecture préalable.
+
+    Sur les disques non rotatifs, le disque est découpé en régions (voir region_erase) dont
+    chacune a son propre couple lecteur/écrivain ; regions force le nombre de régions.
+    ranges limite la passe à des plages d'octets du disque (partition, espace non alloué).
+    Les écritures sont directes ou synchrones (device_fill.open_direct), depuis un tampon de
+    zéros aligné : une erreur du support est attribuée au bloc de la région qui l'a causée.
+
+    Returns:
+        dict: {"written": octets écrits, "skipped": octets déjà à zéro, "total": taille parcourue}
+
+    Raises:
+        EraseCancelled: Si le jeton d'annulation a été déclenché
+        OSError: En cas d'erreur de lecture ou d'écriture
+    """
+    path = _device_path(device)
+    zero_chunk = bytes(chunk_size)
+    # Tampon d'écriture aligné sur la page (O_DIRECT) ; mmap le fournit rempli de zéros
+    zero_view = memoryview(mmap.mmap(-1, chunk_size))
+    stats = {"written": 0, "skipped": 0, "total": 0}
+    stats_lock = threading.Lock()
+
+    def log(message: str) -> None:
+        logging.info(message)
+        if log_func:
+            log_func(message)
+
+    def count(key: str, length: int) -> None:
+        with stats_lock:
+            stats[key] += length
+
+    fd = os.open(path, os.O_RDONLY)
+    write_fd = None
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        write_fd, _ = open_direct(path)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except (OSError, AttributeError):
+            pass
+        total = size if ranges is None else ranges_size(ranges)
+        workers = region_count(path, total) if regions is None else regions
+        parts = split_regions(size, workers, chunk_size, ranges)
+        mode = "lecture-comparaison, seuls les blocs non nuls sont écrits" if skip_zero else "écriture complète"
+        log(f"Passe à zéro de {path} ({mode}, {describe_regions(parts, workers)})...")
+        progress = RegionProgress(f"{path} : passe à zéro", total, log)
+
+        def fill_region(start: int, end: int, stop: threading.Event) -> None:
+            pending = queue.Queue(maxsize=WRITE_QUEUE_DEPTH)
+            errors = []
+            failed = threading.Event()
+
+            def writer() -> None:
+                try:
+                    while True:
+                        item = pending.get()
+                        if item is None:
+                            return
+                        offset, length = item
+                        if os.pwrite(write_fd, zero_view[:length], offset) != length:
+                            raise OSError(f"Écriture incomplète sur {path} à l'octet {offset}")
+                        count("written", length)
+                except OSError as e:
+                    errors.append(e)
+                    failed.set()
+                    # Débloquer le lecteur s'il attend une place dans la file
+                    while not pending.empty():
+                        pending.get_nowait()
+
+            writer_thread = threading.Thread(target=writer, daemon=True)
+            writer_thread.start()
+            try:
+                offset = start
+                while offset < end and not failed.is_set() and not stop.is_set():
+                    if token is not None:
+                        token.check()
+                    length = min(chunk_size, end - offset)
+                    if skip_zero:
+                        throttle(token, length, write=False)
+                        data = os.pread(fd, length, offset)
+                        if len(data) != length:
+                            raise OSError(f"Lecture incomplète de {path} à l'octet {offset}")
+                        # Comparaison mémoire en C (memcmp) sur tout le bloc
+                        if data == (zero_chunk if length == chunk_size else zero_chunk[:length]):
+                            count("skipped", length)
+                        else:
+                            # Le lecteur cadence aussi les écritures : la file bornée retient l'écrivain
+                            throttle(token, length)
+                            pending.put((offset, length))
+                    else:
+                        throttle(token, length)
+                        pending.put((offset, length))
+                    offset += length
+                    count("total", length)
+                    progress.add(length, f", {stats['skipped'] // (1024 * 1024)} Mo déjà à zéro")
+            finally:
+                if not failed.is_set():
+                    pending.put(None)
+                else:
+                    pending.put_nowait(None)
+                writer_thread.join()
+            if errors:
+                raise errors[0]
+
+        run_regions(parts, fill_region, token, workers, sector_size=write_granularity(path))
+        # Le cache d'écriture du disque doit être vidé avant une éventuelle vérification
+        os.fsync(write_fd)
+        if token is not None:
+            token.check()
+    finally:
+        if write_fd is not None:
+            os.close(write_fd)
+        drop_cache(fd)
+        os.close(fd)
+
+    log(f"Passe à zéro terminée sur {path} : {stats['written'] // (1024 * 1024)} Mo écrits, "
+        f"{stats['skipped'] // (1024 * 1024)} Mo ignorés (déjà à zéro)")
+    return stats
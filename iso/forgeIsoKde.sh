@@ -67,6 +67,8 @@ console-setup
 keyboard-configuration
 cryptsetup
 dmsetup
+hdparm
+smartmontools
 EOF
 
 # Set system locale and keyboard layout to French AZERTY
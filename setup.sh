@@ -7,7 +7,7 @@ sudo apt-get update -y
 
 echo "Installing necessary packages..."
 # Install shred for secure erasure, parted for partitioning, and ntfs-3g for NTFS support
-sudo apt-get install -y coreutils parted ntfs-3g python3 python3-tk dosfstools cryptsetup dmsetup
+sudo apt-get install -y coreutils parted ntfs-3g python3 python3-tk dosfstools cryptsetup dmsetup hdparm smartmontools
 
 echo "Setup complete. You can now run the Secure Disk Erase Tool."
 